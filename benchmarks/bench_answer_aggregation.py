@@ -0,0 +1,94 @@
+"""CPU cost of answer aggregation over the snippet corpus.
+
+For each question in fixtures/snippets.jsonl, compares what it costs to pick
+an answer from one backend response three ways:
+
+* extract: AnswerExtractor.extract over the top snippets (the default),
+* aggregate: AnswerAggregator voting over the same snippets,
+* merge: voting again over two backends' candidates, as when a
+  low-confidence answer makes SearchService ask the next backend.
+
+CPU time is measured with time.process_time, so the figures are the CPU
+added per request rather than wall time. The answers that change are listed
+with their confidence.
+
+    python benchmarks/bench_answer_aggregation.py --rounds 200
+"""
+import argparse
+import json
+import os
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def cpu_per_call(fn, corpus, rounds):
+    """Return the CPU seconds fn(row) takes per call, averaged over rounds of the corpus."""
+    start = time.process_time()
+    for _ in range(rounds):
+        for row in corpus:
+            fn(row)
+    return (time.process_time() - start) / (rounds * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=os.path.join(FIXTURES_DIR, 'snippets.jsonl'))
+    parser.add_argument('--rounds', type=int, default=200, help='Timed passes over the corpus')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from loguru import logger
+    from services.answer_aggregator import AnswerAggregator
+    from services.answer_extractor import AnswerExtractor
+
+    logger.remove()
+    corpus = load_corpus(args.corpus)
+    extractor = AnswerExtractor()
+    aggregator = AnswerAggregator(extractor)
+
+    def extract(row):
+        return extractor.extract(row["snippets"])
+
+    def aggregate(row):
+        return aggregator.aggregate(row["question"], aggregator.page_candidates('google', row["snippets"]))
+
+    # The second backend sees the same results, as two engines usually do
+    answers = {
+        row["question"]: [aggregate(row), aggregator.aggregate(
+            row["question"], aggregator.page_candidates('duckduckgo', row["snippets"][::-1])
+        )]
+        for row in corpus
+    }
+
+    def merge(row):
+        return aggregator.merge(row["question"], answers[row["question"]])
+
+    timings = {name: cpu_per_call(fn, corpus, args.rounds)
+               for name, fn in (('extract', extract), ('aggregate', aggregate), ('merge', merge))}
+    base = timings['extract']
+    print(f"{len(corpus)} questions x {args.rounds} rounds, CPU per request:")
+    for name, seconds in timings.items():
+        added = f" ({(seconds - base) * 1e6:+.0f}us vs extract)" if name != 'extract' else ''
+        print(f"  {name:<10} {seconds * 1e6:7.0f}us{added}")
+
+    changed = 0
+    confidences = []
+    for row in corpus:
+        voted = aggregate(row)
+        confidences.append(voted.confidence)
+        if voted != extract(row):
+            changed += 1
+            print(f"  changed: {row['question']!r}\n    extract:   {extract(row)!r}\n"
+                  f"    aggregate: {voted!r} (confidence {voted.confidence:.2f})")
+    print(f"{changed}/{len(corpus)} answers changed | mean confidence "
+          f"{sum(confidences) / len(confidences):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Micro-benchmark for answer extraction.
+
+Compares the original regex loop from SearchService._clean_answer with
+AnswerExtractor over a corpus of saved result snippets and reports
+throughput in sentences per second.
+
+    python benchmarks/bench_answer_extractor.py --rounds 200
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path
+
+
+def legacy_clean_answer(text):
+    """The original SearchService._clean_answer, kept as the baseline."""
+    if not text:
+        return None
+    text = re.sub(r'\s+', ' ', text)
+    prefixes = [
+        'Search Results', 'Featured snippet from the web', 'Web results',
+        'People also ask', 'Description', 'Overview', 'Quick Answer',
+        'Top answer:', 'Advertisement', 'According to', 'Below, we\'ve compiled',
+        'Here are', 'In this article'
+    ]
+    for prefix in prefixes:
+        if text.lower().startswith(prefix.lower()):
+            text = text[len(prefix):].strip()
+    text = re.sub(r'\[\d+\]', '', text)
+    text = re.sub(r'http\S+', '', text)
+    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+    if not sentences:
+        return text.strip()
+    scored_sentences = []
+    for sentence in sentences:
+        score = 0
+        lower_sentence = sentence.lower()
+        if any(word in lower_sentence for word in ['click here', 'read more', 'learn more', 'find out', 'subscribe']):
+            continue
+        if re.search(r'\d', sentence):
+            score += 3
+        if re.search(r'\b(?:19|20)\d{2}\b', sentence):
+            score += 2
+        if re.search(r'\$\s*\d+(?:\.\d+)?', sentence):
+            score += 2
+        if re.search(r'\b(?:is|are|was|were|has|have|had)\b', lower_sentence):
+            score += 2
+        if re.search(r'\b(?:because|therefore|thus|hence|since|due to)\b', lower_sentence):
+            score += 2
+        if re.search(r'[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*', sentence):
+            score += 1
+        words = sentence.split()
+        if 6 <= len(words) <= 20:
+            score += 2
+        elif len(words) < 6:
+            score -= 1
+        else:
+            score -= len(words) // 20
+        scored_sentences.append((score, sentence))
+    scored_sentences.sort(key=lambda x: (-x[0], len(x[1])))
+    if scored_sentences:
+        return scored_sentences[0][1].strip()
+    return sentences[0].strip()
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run(name, func, corpus, rounds, sentence_count):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in corpus:
+            func(item['snippets'])
+    elapsed = time.perf_counter() - start
+    total = sentence_count * rounds
+    print(f"{name:<32} {total / elapsed:>12,.0f} sentences/s  ({elapsed:.3f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=os.path.join(FIXTURES_DIR, 'snippets.jsonl'))
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from services.answer_extractor import AnswerExtractor
+
+    extractor = AnswerExtractor()
+    corpus = load_corpus(args.corpus)
+    sentence_count = sum(
+        len(extractor.split_sentences(extractor.strip_boilerplate(snippet)))
+        for item in corpus for snippet in item['snippets']
+    )
+    print(f"{len(corpus)} questions, {sentence_count} sentences, {args.rounds} rounds")
+
+    def legacy_per_snippet(snippets):
+        # What the scrapers used to do: clean each element until one answers
+        for snippet in snippets:
+            answer = legacy_clean_answer(snippet)
+            if answer:
+                return answer
+
+    def legacy_all_snippets(snippets):
+        return [legacy_clean_answer(snippet) for snippet in snippets]
+
+    def extractor_all_snippets(snippets):
+        return [extractor.clean(snippet) for snippet in snippets]
+
+    baseline = run('legacy _clean_answer (all)', legacy_all_snippets, corpus, args.rounds, sentence_count)
+    current = run('AnswerExtractor.clean (all)', extractor_all_snippets, corpus, args.rounds, sentence_count)
+    run('AnswerExtractor.extract (batch)', extractor.extract, corpus, args.rounds, sentence_count)
+    print(f"speedup clean vs legacy: {baseline / current:.2f}x")
+
+    agree = sum(
+        legacy_clean_answer(snippet) == extractor.clean(snippet)
+        for item in corpus for snippet in item['snippets']
+    )
+    total = sum(len(item['snippets']) for item in corpus)
+    print(f"per-snippet agreement with legacy: {agree}/{total}")
+    for item in corpus[:5]:
+        print(f"  {item['question']!r}: legacy={legacy_per_snippet(item['snippets'])!r}")
+        print(f"  {'':{len(repr(item['question']))}}  batch ={extractor.extract(item['snippets'])!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Bytes downloaded and parse time per question, before and after trimming responses.
+
+Replays the responses recorded by bench_e2e.py --record (in
+benchmarks/fixtures/http) and asks every backend each question directly,
+once per configuration:
+
+* before: uncompressed responses read to the end (SEARCH_COMPRESSION and
+  SEARCH_STOP_AT_ANSWER off), as the search layer used to fetch them,
+* compressed: gzip responses read to the end,
+* after: gzip responses read until the answer region has been received.
+
+The replay adapter serves the recorded bodies the way a server would, so
+the byte counts are what the search layer reads off the connection. For
+each configuration the run reports the average bytes per question, in
+total and per backend, the time spent parsing per question and how many
+backend answers match the before run.
+
+Without a recording, --from-html builds one from the result pages in
+benchmarks/fixtures/html: every question is answered with the same pages,
+with --head-kb of inline script before the results and --pad-kb of filler
+after them to approximate the size of real pages.
+
+    python benchmarks/bench_bandwidth.py
+    python benchmarks/bench_bandwidth.py --from-html --head-kb 150 --pad-kb 300
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import tempfile
+
+from bench_e2e import BASELINE_FILE, DEFAULT_FIXTURES, DEFAULT_QUESTIONS, configure, load_questions
+from bench_utils import FIXTURES_DIR, add_src_to_path
+
+CONFIGURATIONS = (
+    ('before', 'false', 'false'),
+    ('compressed', 'true', 'false'),
+    ('after', 'true', 'true')
+)
+WORDS = ('related', 'searches', 'people', 'also', 'ask', 'capital', 'city', 'history', 'images', 'news',
+         'maps', 'results', 'about', 'wikipedia', 'travel', 'guide', 'population', 'weather', 'facts', 'more')
+
+
+def filler(kb, rng, script):
+    """Markup of about kb kilobytes that compresses roughly as well as a real result page."""
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        ident = f"{rng.getrandbits(48):012x}"
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))
+        if script:
+            part = f'<script nonce="{ident}">window.{ident[:6]}=["{words}",{rng.randint(0, 99999)}];</script>\n'
+        else:
+            part = f'<div class="g" data-hveid="{ident}"><a href="/url?q={ident}">{words}</a></div>\n'
+        parts.append(part)
+        size += len(part)
+    return ''.join(parts)
+
+
+def build_from_html(directory, questions, head_kb, pad_kb):
+    """Record the fixture result pages as every question's Google and DuckDuckGo responses."""
+    from services.http_recorder import fixture_key
+    from services.search_service import SearchService
+
+    rng = random.Random(0)
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'html', '*.html'))):
+        kind = 'google' if os.path.basename(path).startswith('google') else 'duckduckgo'
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        html = html.replace('</head>', filler(head_kb, rng, script=True) + '</head>')
+        html = html.replace('</body>', filler(pad_kb, rng, script=False) + '</body>')
+        pages.setdefault(kind, html.encode('utf-8'))
+
+    service = SearchService()
+    for question in questions:
+        for kind, url in (('google', service._google_request(question)),
+                          ('duckduckgo', service._duckduckgo_request(question))):
+            key = fixture_key('GET', url)
+            meta = {"method": "GET", "url": url, "final_url": url, "status": 200, "reason": "OK",
+                    "encoding": "utf-8", "headers": {"Content-Type": "text/html; charset=UTF-8"}, "latency": 0.0}
+            with open(os.path.join(directory, key + '.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            with open(os.path.join(directory, key + '.body'), 'wb') as f:
+                f.write(pages[kind])
+    service.close()
+
+
+def run(name, compression, stop_at_answer, questions):
+    """Ask every backend every question; return (per-question numbers, answers)."""
+    from services.metrics import metrics
+    from services.search_service import SearchService
+
+    os.environ['SEARCH_COMPRESSION'] = compression
+    os.environ['SEARCH_STOP_AT_ANSWER'] = stop_at_answer
+    service = SearchService()
+    metrics.reset()
+    answers = {}
+    for question in questions:
+        for backend, search in service._backends():
+            try:
+                answers[(backend, question)] = search(question)
+            except Exception as e:
+                answers[(backend, question)] = None
+                print(f"  {name}: {backend} failed for {question!r}: {e}")
+
+    backends = service.get_backend_stats()["backends"]
+    misses = service.get_backend_stats()["http"]["misses"]
+    service.close()
+    parse = sum(values["avg"] * values["count"] for stage, values in metrics.summary().items()
+                if stage.startswith('search.parse'))
+    count = len(questions)
+    return {
+        "bytes": sum(stats["bytes"] for stats in backends.values()) / count,
+        "backends": {backend: stats["bytes"] / count for backend, stats in backends.items()},
+        "parse": parse / count,
+        "misses": misses
+    }, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', default=DEFAULT_QUESTIONS, help='Question corpus, one per line')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='Recorded response directory')
+    parser.add_argument('--from-html', action='store_true', help='Replay the HTML fixtures instead of a recording')
+    parser.add_argument('--head-kb', type=int, default=150, help='Inline script before the results (--from-html)')
+    parser.add_argument('--pad-kb', type=int, default=300, help='Filler after the results (--from-html)')
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    temporary = None
+    if args.from_html:
+        temporary = tempfile.TemporaryDirectory()
+        args.fixtures = temporary.name
+        os.environ.pop('SERP_API_KEY', None)
+    else:
+        baseline_path = os.path.join(args.fixtures, BASELINE_FILE)
+        if not os.path.exists(baseline_path):
+            raise SystemExit(f"No recording in {args.fixtures}; run bench_e2e.py --record or use --from-html")
+        with open(baseline_path, encoding='utf-8') as f:
+            if 'serp_api' in json.load(f)["backends"]:
+                # Replayed requests are matched without headers, so any key will do
+                os.environ.setdefault('SERP_API_KEY', 'replay')
+            else:
+                os.environ.pop('SERP_API_KEY', None)
+
+    configure(args.fixtures, 'replay', 0.0, 0.0, 'sequential')
+    add_src_to_path()
+    from loguru import logger
+    logger.remove()
+    if args.from_html:
+        build_from_html(args.fixtures, questions, args.head_kb, args.pad_kb)
+
+    print(f"{len(questions)} questions from {args.fixtures}")
+    reference = None
+    for name, compression, stop_at_answer in CONFIGURATIONS:
+        result, answers = run(name, compression, stop_at_answer, questions)
+        if reference is None:
+            reference = answers
+        agree = sum(1 for key, answer in answers.items() if answer == reference.get(key))
+        backends = ', '.join(f"{backend} {size / 1024:.1f}KB" for backend, size in result["backends"].items())
+        print(f"{name:<11} {result['bytes'] / 1024:8.1f}KB/question ({backends}) | "
+              f"parse {result['parse'] * 1000:6.2f}ms/question | "
+              f"answers matching before {agree}/{len(answers)} | replay misses {result['misses']}")
+    if temporary is not None:
+        temporary.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Simulated skewed traffic with and without the popular-answer refresher.
+
+Questions are drawn from fixtures/questions.txt plus a long tail of
+one-off questions, with Zipf-distributed popularity, and asked in bursts
+separated by idle gaps. The answer cache TTL is shortened so answers
+expire during the run. Each configuration reports the share of requests
+that had to search, the searches made on the request path and by the
+refresher, the refresher's prefetch hit rate and request latency.
+
+    python benchmarks/bench_cache_refresh.py --bursts 20 --ttl 4 --budget 3600 7200
+"""
+import argparse
+import os
+import random
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile, stub_search_backends
+
+
+def load_questions(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def run(args, questions, weights, budget):
+    """Replay the same traffic against a fresh service with the given refresh budget."""
+    os.environ['CACHE_REFRESH_BUDGET'] = str(budget)
+    from services.search_service import BACKEND_NAMES, SearchService
+
+    service = SearchService()
+    service.start_refresher()
+    rng = random.Random(args.seed)
+    latencies = []
+    request_searches = 0
+    for _ in range(args.bursts):
+        for question in rng.choices(questions, weights=weights, k=args.burst_size):
+            result = service.resolve(question)
+            latencies.append(result.latency)
+            if result.source in BACKEND_NAMES:
+                request_searches += 1
+        time.sleep(args.gap)
+
+    refresh = service.refresher.stats() if service.refresher is not None else {}
+    service.close()
+    return {
+        "searched": request_searches / len(latencies),
+        "request_searches": request_searches,
+        "refresh_searches": refresh.get("refreshes", 0),
+        "prefetch_hit_rate": refresh.get("prefetch_hit_rate", 0.0),
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', default=os.path.join(FIXTURES_DIR, 'questions.txt'))
+    parser.add_argument('--tail', type=int, default=2000, help='One-off questions added to the corpus')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of question popularity')
+    parser.add_argument('--bursts', type=int, default=10)
+    parser.add_argument('--burst-size', type=int, default=100, help='Questions per burst')
+    parser.add_argument('--gap', type=float, default=1.0, help='Idle seconds between bursts')
+    parser.add_argument('--ttl', type=float, default=4.0, help='Answer cache TTL in seconds')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated backend latency')
+    parser.add_argument('--budget', type=float, nargs='+', default=[3600, 7200],
+                        help='Refresh budgets (searches/hour) to compare with no refresher')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.update({
+        'ANSWER_CACHE_TTL': str(args.ttl),
+        'CACHE_REFRESH_INTERVAL': '0.2',
+        'CACHE_REFRESH_IDLE': str(args.gap / 4),
+        'SEMANTIC_CACHE_SIZE': '0',
+        'SEARCH_COALESCE': 'false'
+    })
+    for name in ('ANSWER_CACHE_PATH', 'KNOWLEDGE_BASE_PATH', 'POPULARITY_STATE_PATH'):
+        os.environ.pop(name, None)
+    add_src_to_path()
+    from loguru import logger
+
+    logger.remove()
+    stub_search_backends(latency=args.latency, jitter=0.2)
+    questions = load_questions(args.questions) + [f"one-off question {i}" for i in range(args.tail)]
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(questions))]
+
+    print(f"{len(questions)} questions, {args.bursts} bursts of {args.burst_size}, TTL {args.ttl:g}s")
+    for budget in [0] + args.budget:
+        result = run(args, questions, weights, budget)
+        label = f"budget {budget:g}/h" if budget else "no refresher"
+        print(f"  {label:<16} searched {result['searched'] * 100:5.1f}% | searches: request path "
+              f"{result['request_searches']:<5} refresher {result['refresh_searches']:<5} | "
+              f"prefetch hit rate {result['prefetch_hit_rate'] * 100:5.1f}% | "
+              f"p50 {result['p50'] * 1000:6.1f}ms p99 {result['p99'] * 1000:6.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
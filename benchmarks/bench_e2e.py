@@ -0,0 +1,261 @@
+"""End-to-end benchmark over recorded search responses.
+
+Record the backends' raw HTTP responses for a question corpus once, with
+network access:
+
+    python benchmarks/bench_e2e.py --record
+
+That stores every backend's response (Search API JSON when SERP_API_KEY is
+set, Google and DuckDuckGo HTML) under benchmarks/fixtures/http, plus the
+answers given at record time as the baseline. Later runs replay those
+responses, optionally with injected latency, through three layers:
+
+* search: SearchService.search_for_answer,
+* bot: TriviaBot.get_answer,
+* ask: the Flask /ask route behind a threaded WSGI server,
+
+and report throughput, latency percentiles, CPU time per question and per
+pipeline stage, and how many answers still agree with the baseline. The
+answer cache is off, so every question goes through the backends.
+
+    python benchmarks/bench_e2e.py --latency 0.2 --jitter 0.3 --concurrency 8
+    python benchmarks/bench_e2e.py --json run.json --compare previous.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile, summarize_latencies
+
+DEFAULT_QUESTIONS = os.path.join(FIXTURES_DIR, 'questions.txt')
+DEFAULT_FIXTURES = os.path.join(FIXTURES_DIR, 'http')
+BASELINE_FILE = 'baseline.json'
+TARGETS = ('search', 'bot', 'ask')
+
+
+def load_questions(path):
+    """Read one question per line, skipping blank lines and # comments."""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def configure(fixtures, mode, latency, jitter, search_mode):
+    """Point the services at the fixtures before any of them is created."""
+    os.environ['SEARCH_HTTP_MODE'] = mode
+    os.environ['SEARCH_HTTP_FIXTURES'] = fixtures
+    os.environ['SEARCH_HTTP_REPLAY_LATENCY'] = 'recorded' if latency is None else str(latency)
+    os.environ['SEARCH_HTTP_REPLAY_JITTER'] = str(jitter)
+    os.environ['SEARCH_BACKEND'] = 'sync'
+    os.environ['SEARCH_MODE'] = search_mode
+    os.environ['METRICS_CPU'] = 'true'
+    os.environ['SPEAK_ANSWERS'] = 'false'
+    # Measure the backends, not the caches in front of them
+    os.environ['ANSWER_CACHE_SIZE'] = '0'
+    for name in ('ANSWER_CACHE_PATH', 'KNOWLEDGE_BASE_PATH', 'RATE_LIMIT_STATE_PATH'):
+        os.environ.pop(name, None)
+
+
+def record(args, questions):
+    """Call every backend live for each question and save the responses and baseline."""
+    configure(args.fixtures, 'record', None, 0.0, args.search_mode)
+    add_src_to_path()
+    from loguru import logger
+    from services.search_service import SearchService
+
+    logger.remove()
+    service = SearchService()
+    backends = [name for name, _ in service._backends()]
+    for index, question in enumerate(questions, 1):
+        for name, backend in service._backends():
+            try:
+                backend(question)
+            except Exception as e:
+                print(f"  {name} failed for {question!r}: {e}")
+        print(f"[{index}/{len(questions)}] recorded {question}")
+        time.sleep(args.pause)
+
+    # The baseline is what the current code answers from exactly these responses
+    configure(args.fixtures, 'replay', 0.0, 0.0, args.search_mode)
+    service = SearchService()
+    baseline = {question: service.search_for_answer(question) for question in questions}
+    with open(os.path.join(args.fixtures, BASELINE_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"backends": backends, "recorded_at": time.time(), "answers": baseline}, f, indent=2)
+    answered = sum(1 for answer in baseline.values() if answer)
+    print(f"Recorded {len(questions)} questions from {', '.join(backends)}; {answered} answered")
+
+
+def make_target(name):
+    """Return (ask(question) -> answer, stats(), close()) for one layer of the stack."""
+    if name == 'search':
+        from services.search_service import SearchService
+
+        service = SearchService()
+        return service.search_for_answer, service.get_backend_stats, service.close
+
+    if name == 'bot':
+        from trivia_bot import TriviaBot
+
+        bot = TriviaBot()
+        return bot.get_answer, lambda: bot.search_service.get_backend_stats(), bot.cleanup
+
+    import requests
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import app as web_app
+
+    server = make_server('127.0.0.1', 0, web_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/ask"
+    local = threading.local()
+
+    def ask(question):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = session.post(url, json={"question": question}, timeout=120).json()
+        return body.get("answer") if body.get("success") else None
+
+    return ask, lambda: web_app.bot.search_service.get_backend_stats(), server.shutdown
+
+
+def run_target(name, questions, baseline, args):
+    """Answer the corpus through one layer; return the run's results."""
+    from services.metrics import metrics
+
+    ask, stats, close = make_target(name)
+    metrics.reset()
+    latencies = []
+    agree = 0
+    lock = threading.Lock()
+
+    def answer(question):
+        nonlocal agree
+        start = time.perf_counter()
+        result = ask(question)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if (result or None) == baseline.get(question):
+                agree += 1
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(answer, questions * args.passes))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    http = stats().get("http", {})
+    close()
+
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "cpu_per_request": cpu / len(latencies) if latencies else 0.0,
+        "agreement": agree / len(latencies) if latencies else 0.0,
+        "replay_misses": http.get("misses", 0),
+        "stages": {
+            stage: {"count": values["count"], "avg": values["avg"], "cpu": values.get("cpu")}
+            for stage, values in metrics.summary().items()
+        },
+        "latencies": latencies
+    }
+
+
+def print_result(name, result):
+    """Print the headline numbers and per-stage timings of one run."""
+    print(summarize_latencies(name, result["latencies"], result["elapsed"]))
+    print(f"  cpu {result['cpu_per_request'] * 1000:.2f}ms/question | "
+          f"agreement with baseline {result['agreement'] * 100:.1f}% | "
+          f"replay misses {result['replay_misses']}")
+    for stage, values in result["stages"].items():
+        cpu = f"cpu {values['cpu'] * 1000:7.2f}ms" if values["cpu"] is not None else ""
+        print(f"    {stage:<28} n={values['count']:<6} wall {values['avg'] * 1000:8.2f}ms {cpu}")
+
+
+def print_comparison(results, previous):
+    """Print how each target moved against a previous --json run."""
+    print(f"\nCompared with {previous['path']}:")
+    for name, result in results.items():
+        before = previous["targets"].get(name)
+        if not before:
+            continue
+        changes = []
+        for key, label in (("throughput", "req/s"), ("p50", "p50"), ("p99", "p99"),
+                           ("cpu_per_request", "cpu"), ("agreement", "agreement")):
+            if before[key]:
+                changes.append(f"{label} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"  {name:<6} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', default=DEFAULT_QUESTIONS, help='Question corpus, one per line')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='Recorded response directory')
+    parser.add_argument('--record', action='store_true', help='Record live responses instead of benchmarking')
+    parser.add_argument('--pause', type=float, default=1.0, help='Seconds between questions while recording')
+    parser.add_argument('--target', choices=TARGETS, action='append', help='Layer to drive (default: all)')
+    parser.add_argument('--search-mode', default='sequential', help='SEARCH_MODE for the run')
+    parser.add_argument('--latency', type=float, default=None,
+                        help='Replay delay per response in seconds (default: as recorded)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Fractional +/- jitter on the replay delay')
+    parser.add_argument('--concurrency', type=int, default=8, help='Questions answered at once')
+    parser.add_argument('--passes', type=int, default=1, help='Times the corpus is asked')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--compare', help='A previous --json file to compare against')
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    if args.record:
+        record(args, questions)
+        return
+
+    baseline_path = os.path.join(args.fixtures, BASELINE_FILE)
+    if not os.path.exists(baseline_path):
+        raise SystemExit(f"No recording in {args.fixtures}; run with --record first")
+    with open(baseline_path, encoding='utf-8') as f:
+        recording = json.load(f)
+    if 'serp_api' in recording["backends"]:
+        # Replayed requests are matched without headers, so any key will do
+        os.environ.setdefault('SERP_API_KEY', 'replay')
+    else:
+        os.environ.pop('SERP_API_KEY', None)
+
+    configure(args.fixtures, 'replay', args.latency, args.jitter, args.search_mode)
+    add_src_to_path()
+    from loguru import logger
+    logger.remove()
+
+    results = {}
+    for name in args.target or TARGETS:
+        results[name] = run_target(name, questions, recording["answers"], args)
+        print_result(name, results[name])
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        previous['path'] = args.compare
+        print_comparison(results, previous)
+
+    if args.json:
+        settings = {key: getattr(args, key) for key in ('search_mode', 'latency', 'jitter', 'concurrency', 'passes')}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "settings": settings,
+                "targets": {
+                    name: {key: value for key, value in result.items() if key != "latencies"}
+                    for name, result in results.items()
+                }
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
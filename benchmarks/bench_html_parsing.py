@@ -0,0 +1,102 @@
+"""Benchmark for Google/DuckDuckGo result page parsing.
+
+Runs the original one-soup.select-pass-per-selector approach and each
+available ResultPageParser backend over recorded result pages and reports
+pages per second. Pages are named ``google_*.html`` or
+``duckduckgo_*.html``; --pad-kb appends filler markup so small fixtures
+approximate the size of real result pages.
+
+    python benchmarks/bench_html_parsing.py --rounds 50 --pad-kb 300
+"""
+import argparse
+import glob
+import os
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path
+
+FILLER = (
+    '<div class="filler"><span class="x">Related searches</span>'
+    '<a href="/search?q=related">related query</a>'
+    '<script>var z=[1,2,3].map(function(v){return v*2});</script></div>\n'
+)
+
+
+def load_pages(directory, pad_kb):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        name = os.path.basename(path)
+        kind = 'google' if name.startswith('google') else 'duckduckgo'
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        if pad_kb:
+            filler = FILLER * (pad_kb * 1024 // len(FILLER))
+            html = html.replace('</body>', filler + '</body>')
+        pages.append((name, kind, html))
+    return pages
+
+
+def legacy_find_texts(html, selectors, min_length):
+    """The original parsing loop: one soup.select pass per selector."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for selector in selectors:
+        texts = [text for text in (element.get_text().strip() for element in soup.select(selector))
+                 if len(text) > min_length]
+        if texts:
+            return texts
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=os.path.join(FIXTURES_DIR, 'html'))
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--pad-kb', type=int, default=0, help='Filler markup appended to each page')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from services.html_parser import PARSER_BACKENDS, ResultPageParser, available_backends
+    from services.search_service import DUCKDUCKGO_SELECTORS, GOOGLE_SELECTORS
+
+    pages = load_pages(args.fixtures, args.pad_kb)
+    if not pages:
+        raise SystemExit(f"No *.html fixtures found in {args.fixtures}")
+    total_kb = sum(len(html) for _, _, html in pages) / 1024
+    print(f"{len(pages)} pages ({total_kb:.0f} KB total), {args.rounds} rounds")
+
+    config = {
+        'google': (GOOGLE_SELECTORS, 1),
+        'duckduckgo': (DUCKDUCKGO_SELECTORS, 15)
+    }
+
+    def report(name, parse):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for _, kind, html in pages:
+                parse(kind, html)
+        elapsed = time.perf_counter() - start
+        rate = len(pages) * args.rounds / elapsed
+        print(f"{name:<22} {rate:>9.1f} pages/s  {elapsed / (len(pages) * args.rounds) * 1000:>7.2f} ms/page")
+        return elapsed
+
+    baseline = report('legacy bs4 select', lambda kind, html: legacy_find_texts(html, *config[kind]))
+    for backend in PARSER_BACKENDS:
+        if backend not in available_backends():
+            print(f"{backend:<22} not installed")
+            continue
+        parsers = {
+            kind: ResultPageParser(selectors, min_length=min_length, backend=backend)
+            for kind, (selectors, min_length) in config.items()
+        }
+        elapsed = report(backend, lambda kind, html: parsers[kind].find_texts(html))
+        print(f"{'':<22} {baseline / elapsed:.2f}x vs legacy")
+        for name, kind, html in pages:
+            legacy = legacy_find_texts(html, *config[kind])[:parsers[kind].max_matches]
+            _, texts = parsers[kind].find_texts(html)
+            if [' '.join(t.split()) for t in legacy] != [' '.join(t.split()) for t in texts]:
+                print(f"{'':<22} differs from legacy on {name}")
+
+
+if __name__ == '__main__':
+    main()
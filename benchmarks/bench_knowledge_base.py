@@ -0,0 +1,78 @@
+"""Lookup benchmark for the local knowledge base.
+
+Builds a knowledge base from the bundled capitals plus synthetic entity
+facts, memory-maps it and reports build time, image size and lookup
+latency for hits and misses.
+
+    python benchmarks/bench_knowledge_base.py --facts 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from itertools import chain
+
+from bench_utils import REPO_ROOT, add_src_to_path, percentile
+
+RELATIONS = ['population', 'founder', 'height', 'author', 'inventor', 'currency', 'area', 'language']
+
+
+def synthetic_facts(count, seed=7):
+    rng = random.Random(seed)
+    syllables = ['ka', 'lo', 'mi', 'ra', 'to', 'ne', 'su', 'vi', 'de', 'po', 'an', 'el']
+    for i in range(count):
+        entity = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) + str(i)
+        yield f"{rng.choice(RELATIONS)} of {entity}", f"value {i}"
+
+
+def time_lookups(kb, questions, rounds):
+    latencies = []
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            kb.lookup(question)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--facts', type=int, default=100000, help='Synthetic facts added to the capitals')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from services.knowledge_base import KnowledgeBase, build_index, read_entries
+
+    capitals = os.path.join(REPO_ROOT, 'data', 'capitals.jsonl')
+    start = time.perf_counter()
+    image = build_index(chain(read_entries(capitals), synthetic_facts(args.facts)))
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.tkb')
+        with open(path, 'wb') as f:
+            f.write(image)
+        start = time.perf_counter()
+        kb = KnowledgeBase(path)
+        open_time = time.perf_counter() - start
+        print(f"{kb.doc_count} entries, {kb.term_count} terms, {len(image) / 1024 / 1024:.1f} MB | "
+              f"build {build_time:.2f}s, mmap open {open_time * 1e6:.0f}us")
+
+        hits = ['What is the capital of France?', "what's japan's capital", 'capital of new zealand',
+                'What is the capital of Peru', 'capital of south korea']
+        misses = ['who won the world cup in 1998', 'how tall is mount everest',
+                  'what is the largest ocean', 'who painted the mona lisa']
+        for name, questions in (('hit', hits), ('miss', misses)):
+            latencies = time_lookups(kb, questions, args.rounds)
+            print(f"{name:<5} p50 {percentile(latencies, 50) * 1e6:7.1f}us  "
+                  f"p99 {percentile(latencies, 99) * 1e6:7.1f}us  "
+                  f"({len(latencies) / sum(latencies):,.0f} lookups/s)")
+        for question in hits[:2] + misses[:1]:
+            print(f"  {question!r} -> {kb.lookup(question)!r}")
+        kb.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Coverage and latency benchmark for the local solvers.
+
+Runs a question log (fixtures/question_log.jsonl) through the solver
+registry that SearchService tries before any search. Each line has the
+question and what a solver should answer: an exact answer, true for
+questions whose answer depends on today's date, or null for questions that
+must go to the web. Reports the share of the log answered locally, wrong
+and missing local answers, trivia questions a solver wrongly claimed, and
+the solver latency for answered and passed-on questions.
+
+    python benchmarks/bench_local_solvers.py --rounds 20
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--log', default=os.path.join(FIXTURES_DIR, 'question_log.jsonl'))
+    parser.add_argument('--rounds', type=int, default=20, help='Timed passes over the log')
+    parser.add_argument('--verbose', action='store_true', help='List every wrong or missed question')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from loguru import logger
+    from services.local_solvers import LocalSolvers
+
+    logger.remove()
+    with open(args.log, encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    solvers = LocalSolvers()
+    sources = Counter()
+    wrong, missed, claimed = [], [], []
+    for row in rows:
+        solved = solvers.solve(row["question"])
+        expect = row["expect"]
+        if solved is None:
+            if expect is not None:
+                missed.append(row["question"])
+            continue
+        source, answer = solved
+        sources[source] += 1
+        if expect is None:
+            claimed.append((row["question"], answer))
+        elif expect is not True and answer != expect:
+            wrong.append((row["question"], answer, expect))
+
+    answered, passed = [], []
+    for _ in range(args.rounds):
+        for row in rows:
+            start = time.perf_counter()
+            solved = solvers.solve(row["question"])
+            elapsed = time.perf_counter() - start
+            (answered if solved is not None else passed).append(elapsed)
+
+    local = sum(sources.values())
+    expected_local = sum(1 for row in rows if row["expect"] is not None)
+    print(f"{len(rows)} questions: {local} answered locally ({local / len(rows) * 100:.1f}%), "
+          f"{expected_local} expected | by solver: {dict(sources)}")
+    print(f"wrong answers {len(wrong)} | missed {len(missed)} | trivia wrongly claimed {len(claimed)}")
+    print(f"answered p50 {percentile(answered, 50) * 1e6:.0f}us p99 {percentile(answered, 99) * 1e6:.0f}us | "
+          f"passed to search p50 {percentile(passed, 50) * 1e6:.0f}us p99 {percentile(passed, 99) * 1e6:.0f}us")
+    if args.verbose:
+        for question, answer, expect in wrong:
+            print(f"  wrong: {question!r} -> {answer!r}, expected {expect!r}")
+        for question in missed:
+            print(f"  missed: {question!r}")
+        for question, answer in claimed:
+            print(f"  claimed: {question!r} -> {answer!r}")
+
+
+if __name__ == '__main__':
+    main()
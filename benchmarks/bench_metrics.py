@@ -0,0 +1,75 @@
+"""Overhead benchmark for the stage timing spans.
+
+Times an empty ``with metrics.span(...)`` block with instrumentation
+enabled and disabled, single-threaded and from several threads at once,
+and parses a result page with and without spans to put the cost in
+context.
+
+    python benchmarks/bench_metrics.py --iterations 200000 --threads 8
+"""
+import argparse
+import os
+import threading
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path
+
+
+def time_spans(registry, iterations, threads):
+    """Return nanoseconds per span when run from the given number of threads."""
+    def work():
+        span = registry.span
+        for _ in range(iterations):
+            with span('bench.stage', 'google'):
+                pass
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (iterations * threads) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000, help='Spans per thread')
+    parser.add_argument('--threads', type=int, default=8, help='Threads for the contended run')
+    parser.add_argument('--rounds', type=int, default=200, help='Page parses per configuration')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from loguru import logger
+    from services.metrics import MetricsRegistry
+
+    logger.remove()
+    enabled = MetricsRegistry(enabled=True)
+    disabled = MetricsRegistry(enabled=False)
+
+    for threads in (1, args.threads):
+        iterations = args.iterations // threads
+        print(f"{threads} thread(s): enabled {time_spans(enabled, iterations, threads):7.0f} ns/span | "
+              f"disabled {time_spans(disabled, iterations, threads):7.0f} ns/span")
+
+    # End-to-end: parse a real result page with the search service's spans on and off
+    import services.search_service as search_module
+    from services.answer_cache import AnswerCache
+    from services.search_service import SearchService
+
+    with open(os.path.join(FIXTURES_DIR, 'html', 'google_capital_australia.html'), encoding='utf-8') as f:
+        html = f.read()
+    service = SearchService(cache=AnswerCache(), knowledge_base=None)
+    for _ in range(args.rounds // 4):
+        service._parse_google_html(html)
+    for name, registry in (('enabled', enabled), ('disabled', disabled)):
+        search_module.metrics = registry
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            service._parse_google_html(html)
+        per_parse = (time.perf_counter() - start) / args.rounds * 1e6
+        print(f"google page parse with spans {name}: {per_parse:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
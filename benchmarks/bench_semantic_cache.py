@@ -0,0 +1,123 @@
+"""Precision and latency benchmark for near-duplicate question matching.
+
+Uses the labeled paraphrase set in fixtures/paraphrases.jsonl, where
+questions in one group share an answer and neighbouring groups differ by a
+word or two (capital vs largest city, Celsius vs Fahrenheit). For each
+threshold it reports:
+
+* recall: paraphrases matched to their own group's stored question,
+* wrong: paraphrases matched to a different group,
+* held out: paraphrases matched to anything while their own group is not
+  stored, i.e. the question was never answered and a match is always wrong.
+
+Then it fills the index with synthetic questions and times match().
+
+    python benchmarks/bench_semantic_cache.py --thresholds 0.65 0.7 0.75 0.8 --entries 2048
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import defaultdict
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile
+
+SUBJECTS = ['river', 'mountain', 'painting', 'novel', 'city', 'island', 'element', 'battle', 'album', 'bridge']
+ASKS = ['Who discovered the {}', 'Where is the {}', 'When was the {} built', 'What is the name of the {}',
+        'How tall is the {}', 'Who wrote about the {}']
+
+
+def load_groups(path):
+    """Return {group: [questions]}; the first question of a group is the one stored."""
+    groups = defaultdict(list)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                groups[row["group"]].append(row["question"])
+    return groups
+
+
+def evaluate(groups, threshold, dim):
+    """Return (matched, wrong, missed, held-out matches, held-out total) for one threshold."""
+    from services.semantic_cache import SemanticCache
+
+    cache = SemanticCache(max_entries=len(groups), threshold=threshold, dim=dim)
+    for group, questions in groups.items():
+        cache.add(questions[0], group)
+
+    matched = wrong = missed = 0
+    for group, questions in groups.items():
+        for question in questions[1:]:
+            match = cache.match(question)
+            if match is None:
+                missed += 1
+            elif match[0] == group:
+                matched += 1
+            else:
+                wrong += 1
+
+    held_out = held_out_total = 0
+    for group, questions in groups.items():
+        cache.discard(group)
+        for question in questions[1:]:
+            held_out_total += 1
+            if cache.match(question) is not None:
+                held_out += 1
+        cache.add(questions[0], group)
+    return matched, wrong, missed, held_out, held_out_total
+
+
+def synthetic_questions(count, seed=7):
+    rng = random.Random(seed)
+    syllables = ['ka', 'lo', 'mi', 'ra', 'to', 'ne', 'su', 'vi', 'de', 'po', 'an', 'el']
+    for i in range(count):
+        name = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        subject = f"{name} {rng.choice(SUBJECTS)}"
+        yield rng.choice(ASKS).format(subject) + '?'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paraphrases', default=os.path.join(FIXTURES_DIR, 'paraphrases.jsonl'))
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.65, 0.7, 0.75, 0.8])
+    parser.add_argument('--entries', type=int, default=2048, help='Index size for the latency run')
+    parser.add_argument('--dim', type=int, default=2048, help='Hashed feature dimensions')
+    parser.add_argument('--lookups', type=int, default=2000, help='Timed lookups')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from loguru import logger
+    from services.semantic_cache import SemanticCache
+
+    logger.remove()
+    groups = load_groups(args.paraphrases)
+    queries = sum(len(questions) - 1 for questions in groups.values())
+    print(f"{len(groups)} groups, {queries} paraphrase queries")
+    for threshold in args.thresholds:
+        matched, wrong, missed, held_out, held_out_total = evaluate(groups, threshold, args.dim)
+        answered = matched + wrong
+        precision = matched / answered if answered else 1.0
+        print(f"threshold {threshold:.2f}: recall {matched / queries * 100:5.1f}% | "
+              f"precision {precision * 100:5.1f}% ({wrong} wrong) | "
+              f"held out matched {held_out}/{held_out_total}")
+
+    cache = SemanticCache(max_entries=args.entries, dim=args.dim)
+    start = time.perf_counter()
+    for i, question in enumerate(synthetic_questions(args.entries)):
+        cache.add(question, f"synthetic {i}")
+    build = time.perf_counter() - start
+    probes = [question for questions in groups.values() for question in questions]
+    latencies = []
+    for i in range(args.lookups):
+        question = probes[i % len(probes)]
+        start = time.perf_counter()
+        cache.match(question)
+        latencies.append(time.perf_counter() - start)
+    print(f"{len(cache)} entries indexed in {build:.2f}s | lookup "
+          f"p50 {percentile(latencies, 50) * 1e6:.0f}us p99 {percentile(latencies, 99) * 1e6:.0f}us")
+
+
+if __name__ == '__main__':
+    main()
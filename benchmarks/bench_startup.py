@@ -0,0 +1,110 @@
+"""Startup benchmark for the web and CLI entry points.
+
+Each round starts a fresh interpreter and measures, for src/app.py and
+src/main.py:
+
+* import: time to import the entry point module,
+* ready: time until the services it warms up have started.
+
+The slowest imports (cumulative, from ``python -X importtime``) are listed
+so a newly eager heavy dependency stands out. Use --max-import-ms to fail
+when an entry point imports slower than a budget.
+
+    python benchmarks/bench_startup.py --rounds 5
+    python benchmarks/bench_startup.py --max-import-ms 400
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from bench_utils import SRC_DIR, percentile
+
+# The CLI builds its bot in main(), which then waits for the keyboard, so do the same steps here
+ENTRY_POINTS = {
+    'app': (
+        "import app as entry\n"
+        "bot = entry.bot\n"
+    ),
+    'main': (
+        "import main as entry\n"
+        "bot = entry.TriviaBot()\n"
+        "bot.warm_up(('search', 'speech', 'tts'))\n"
+    )
+}
+
+CHILD = (
+    "import json, time\n"
+    "start = time.perf_counter()\n"
+    "{setup}"
+    "imported = time.perf_counter() - start\n"
+    "bot.wait_ready()\n"
+    "ready = time.perf_counter() - start\n"
+    "print(json.dumps({{'import': imported, 'ready': ready}}))\n"
+)
+
+
+def run_once(name):
+    """Start an interpreter for one entry point; return (timings, slowest imports)."""
+    code = CHILD.format(setup=ENTRY_POINTS[name])
+    env = dict(os.environ, LOGURU_LEVEL='ERROR')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, timeout=300
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"{name} failed to start:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def parse_importtime(output):
+    """Return {module: cumulative seconds} for modules up to two levels below the entry point."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level under the module that pulled them in
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth in (1, 2):
+            modules[module.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5, help='Fresh interpreters per entry point')
+    parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), action='append',
+                        help='Entry point to measure (default: all)')
+    parser.add_argument('--top', type=int, default=8, help='Slowest imports to list')
+    parser.add_argument('--max-import-ms', type=float, help='Fail if the median import exceeds this')
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.entry or sorted(ENTRY_POINTS):
+        imports, readies, slowest = [], [], {}
+        for _ in range(args.rounds):
+            timings, modules = run_once(name)
+            imports.append(timings['import'])
+            readies.append(timings['ready'])
+            for module, seconds in modules.items():
+                slowest[module] = max(seconds, slowest.get(module, 0.0))
+
+        median_import = percentile(imports, 50) * 1000
+        print(f"{name:<5} import p50 {median_import:7.1f}ms max {max(imports) * 1000:7.1f}ms | "
+              f"ready p50 {percentile(readies, 50) * 1000:7.1f}ms max {max(readies) * 1000:7.1f}ms")
+        ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print("      slowest imports: " + ", ".join(f"{module} {seconds * 1000:.0f}ms"
+                                               for module, seconds in ranked))
+        if args.max_import_ms is not None and median_import > args.max_import_ms:
+            print(f"      import time is over the {args.max_import_ms:.0f}ms budget")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
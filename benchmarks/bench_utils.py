@@ -0,0 +1,114 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks are run from the repository root, e.g.::
+
+    python benchmarks/load_ask.py --requests 200 --concurrency 32
+"""
+import os
+import random
+import sys
+import time
+from typing import List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def add_src_to_path():
+    """Make the application modules importable the same way src/*.py does."""
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(name: str, latencies: List[float], elapsed: float) -> str:
+    """Format count, throughput and latency percentiles for a run."""
+    count = len(latencies)
+    throughput = count / elapsed if elapsed > 0 else 0.0
+    return (
+        f"{name}: {count} requests in {elapsed:.2f}s "
+        f"({throughput:.1f} req/s) | "
+        f"p50 {percentile(latencies, 50) * 1000:.1f}ms "
+        f"p90 {percentile(latencies, 90) * 1000:.1f}ms "
+        f"p99 {percentile(latencies, 99) * 1000:.1f}ms "
+        f"max {max(latencies, default=0) * 1000:.1f}ms"
+    )
+
+
+def stub_search_backends(latency: float = 0.2, jitter: float = 0.5,
+                         answer: Optional[str] = None, cpu: float = 0.0):
+    """Replace the network search backends with sleeping stubs.
+
+    Args:
+        latency (float): Mean simulated backend latency in seconds
+        jitter (float): Fractional +/- jitter applied to each call
+        answer (str): Fixed answer to return, defaults to echoing the question
+        cpu (float): Seconds of CPU time burned per call, holding the GIL
+            the way page parsing does
+    """
+    add_src_to_path()
+    from services.search_service import SearchService
+
+    def make_stub(name):
+        def stub(self, question):
+            time.sleep(max(0.0, latency * (1 + random.uniform(-jitter, jitter))))
+            if cpu > 0:
+                deadline = time.thread_time() + cpu
+                while time.thread_time() < deadline:
+                    pass
+            return answer or f"{name} answer for {question}"
+        return stub
+
+    SearchService._serp_api_search = make_stub('serp_api')
+    SearchService._google_search = make_stub('google')
+    SearchService._duckduckgo_search = make_stub('duckduckgo')
+
+
+def load_clip(sr, path):
+    """Return (16-bit samples, sample rate) of a fixture as the microphone would deliver it."""
+    import numpy as np
+
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    raw = audio.get_raw_data(convert_width=2)
+    return np.frombuffer(raw, dtype='<i2').astype(np.float64), audio.sample_rate
+
+
+def make_source(sr, samples, rate, chunk=1024):
+    """An AudioSource that reads 16-bit samples as fast as asked and remembers how far it got."""
+    import numpy as np
+
+    pcm = np.clip(samples, -32768, 32767).astype('<i2').tobytes()
+
+    class _Stream:
+        def __init__(self):
+            self.position = 0
+
+        def read(self, size):
+            data = pcm[self.position:self.position + size * 2]
+            self.position += len(data)
+            return data
+
+    class SimulatedMicrophone(sr.AudioSource):
+        SAMPLE_RATE = rate
+        SAMPLE_WIDTH = 2
+        CHUNK = chunk
+
+        def __init__(self):
+            self.stream = _Stream()
+
+        def seconds_read(self):
+            return self.stream.position / 2 / rate
+
+    return SimulatedMicrophone()
@@ -0,0 +1,126 @@
+"""Endpointing delay benchmark for the speech capture.
+
+Plays every WAV fixture through a simulated microphone with background
+noise mixed in: a second of noise before the question and enough after it
+for the capture to reach its phrase time limit. Two endpointers capture
+each question:
+
+* legacy: Recognizer.listen with the fixed energy threshold of 1000, no
+  dynamic adjustment, a 5s timeout and a 10s phrase limit (the original
+  implementation),
+* vad: SpeechRecognitionService.capture_phrase with the frame-level voice
+  activity detector and its ambient calibration.
+
+The endpointing delay is the audio time from the end of the speech (the
+last 10ms window of the clean clip louder than --speech-floor) to the point
+where the capture stopped reading. A capture that stops before the speech
+ends counts as truncated. The simulated source is read as fast as possible,
+so the run takes a fraction of the audio time.
+
+    python benchmarks/bench_vad.py --noise 0 200 800 1500
+    python benchmarks/bench_vad.py --trailing-silence 0.3 --noise-kind white
+"""
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, load_clip, make_source, percentile
+
+AUDIO_DIR = os.path.join(FIXTURES_DIR, 'audio')
+
+
+def speech_end(samples, rate, floor):
+    """Seconds into the clip at which the last window louder than floor ends."""
+    window = max(1, rate // 100)
+    count = len(samples) // window
+    energies = np.sqrt(np.mean(samples[:count * window].reshape(count, window) ** 2, axis=1))
+    loud = np.nonzero(energies > floor)[0]
+    return (loud[-1] + 1) * window / rate if len(loud) else len(samples) / rate
+
+
+def make_noise(kind, level, length, rng):
+    """Noise with the given RMS level; 'hum' is low-pass filtered like a fan or air conditioner."""
+    if level <= 0:
+        return np.zeros(length)
+    noise = rng.standard_normal(length)
+    if kind == 'hum':
+        # A leaky integrator keeps the low frequencies, which cross zero as rarely as voiced speech
+        kernel = 0.98 ** np.arange(200)
+        noise = np.convolve(noise, kernel)[:length]
+    return noise * (level / np.sqrt(np.mean(noise ** 2)))
+
+
+def legacy_capture(sr, source):
+    recognizer = sr.Recognizer()
+    recognizer.dynamic_energy_threshold = False
+    recognizer.energy_threshold = 1000
+    recognizer.listen(source, timeout=5, phrase_time_limit=10)
+
+
+def vad_capture(service, source):
+    service.capture_phrase(source, lambda chunk: None,
+                           timeout=service.listen_timeout, phrase_time_limit=service.phrase_time_limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='WAV files (defaults to benchmarks/fixtures/audio)')
+    parser.add_argument('--noise', type=float, nargs='+', default=[0, 200, 800, 1500],
+                        help='Background noise RMS levels on the 16-bit scale')
+    parser.add_argument('--noise-kind', choices=('hum', 'white'), default='hum')
+    parser.add_argument('--lead', type=float, default=1.0, help='Seconds of noise before each question')
+    parser.add_argument('--speech-floor', type=float, default=200,
+                        help='RMS a 10ms window of the clean clip needs to count as speech')
+    parser.add_argument('--trailing-silence', type=float, help='Overrides VAD_TRAILING_SILENCE')
+    args = parser.parse_args()
+
+    paths = args.fixtures or sorted(glob.glob(os.path.join(AUDIO_DIR, '*.wav')))
+    if not paths:
+        parser.error(f"no WAV fixtures in {AUDIO_DIR}; run bench_whisper.py --generate first")
+    if args.trailing_silence is not None:
+        os.environ['VAD_TRAILING_SILENCE'] = str(args.trailing_silence)
+
+    add_src_to_path()
+    import speech_recognition as sr
+    from loguru import logger
+    from services.speech_recognition_service import SpeechRecognitionService
+
+    logger.remove()
+    service = SpeechRecognitionService(engine='google')
+    clips = [load_clip(sr, path) for path in paths]
+    rng = np.random.default_rng(0)
+
+    print(f"{len(clips)} clips, {args.noise_kind} noise, trailing silence {service.trailing_silence}s")
+    for level in args.noise:
+        results = {'legacy': [], 'vad': []}
+        truncated = {'legacy': 0, 'vad': 0}
+        for samples, rate in clips:
+            lead = int(args.lead * rate)
+            tail = int((service.phrase_time_limit + 2) * rate)
+            end = args.lead + speech_end(samples, rate, args.speech_floor)
+            signal = np.concatenate((np.zeros(lead), samples, np.zeros(tail)))
+            signal = signal + make_noise(args.noise_kind, level, len(signal), rng)
+            for name, capture in (('legacy', lambda source: legacy_capture(sr, source)),
+                                  ('vad', lambda source: vad_capture(service, source))):
+                source = make_source(sr, signal, rate)
+                try:
+                    capture(source)
+                except sr.WaitTimeoutError:
+                    truncated[name] += 1
+                    continue
+                delay = source.seconds_read() - end
+                if delay < 0:
+                    truncated[name] += 1
+                results[name].append(max(0.0, delay))
+
+        for name, delays in results.items():
+            print(f"noise {level:>6.0f} {name:<7} endpoint delay "
+                  f"p50 {percentile(delays, 50) * 1000:7.0f}ms "
+                  f"p90 {percentile(delays, 90) * 1000:7.0f}ms "
+                  f"max {max(delays, default=0) * 1000:7.0f}ms | truncated or missed {truncated[name]}/{len(clips)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Idle CPU and false-accept benchmark for the hands-free wake word.
+
+Plays recorded audio through a simulated microphone into
+SpeechRecognitionService.wait_for_wake_word, as fast as it will read:
+
+* background: every clip without the wake phrase (the question fixtures
+  in benchmarks/fixtures/audio by default), joined with --gap seconds of
+  silence and played --rounds times. Every detection is a false accept.
+  The CPU time spent per second of audio is what the always-on stage
+  costs while nobody addresses the bot. The same audio is also captured
+  phrase by phrase as the old listen loop did, to show how much of it
+  would otherwise have been sent to the full recognizer.
+* wake: clips that start with the wake phrase followed by a question
+  (benchmarks/fixtures/wake_word/positive). Each must be accepted, and the
+  question audio captured after the phrase is reported.
+
+Templates are read from benchmarks/fixtures/wake_word/templates. --generate
+speaks the templates and wake clips with pyttsx3. Recordings of real voices
+made with src/record_wake_word.py give more realistic numbers.
+
+    python benchmarks/bench_wake_word.py --rounds 5
+    python benchmarks/bench_wake_word.py --threshold 0.25
+    python benchmarks/bench_wake_word.py --generate --phrase "hey trivia"
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, load_clip, make_source, percentile
+
+AUDIO_DIR = os.path.join(FIXTURES_DIR, 'audio')
+WAKE_DIR = os.path.join(FIXTURES_DIR, 'wake_word')
+
+QUESTIONS = [
+    "what is the capital of Australia",
+    "who wrote Pride and Prejudice",
+    "how many planets are in the solar system"
+]
+
+
+def generate_fixtures(directory, phrase):
+    """Speak the wake phrase, alone and before each question, into WAV files with pyttsx3."""
+    import pyttsx3
+
+    templates = os.path.join(directory, 'templates')
+    positive = os.path.join(directory, 'positive')
+    os.makedirs(templates, exist_ok=True)
+    os.makedirs(positive, exist_ok=True)
+    engine = pyttsx3.init()
+    for index, rate in enumerate((150, 175, 200)):
+        engine.setProperty('rate', rate)
+        engine.save_to_file(phrase, os.path.join(templates, f"wake_{index:02d}.wav"))
+        engine.runAndWait()
+    engine.setProperty('rate', 175)
+    for index, question in enumerate(QUESTIONS):
+        engine.save_to_file(f"{phrase}, {question}?", os.path.join(positive, f"wake_question_{index:02d}.wav"))
+    engine.runAndWait()
+    print(f"Wrote 3 templates and {len(QUESTIONS)} wake clips to {directory}")
+
+
+def join(clips, gap):
+    """Concatenate clips of one sample rate with silence between them."""
+    rate = clips[0][1]
+    silence = np.zeros(int(gap * rate))
+    return np.concatenate([part for samples, _ in clips for part in (silence, samples)] + [silence]), rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--templates', default=os.path.join(WAKE_DIR, 'templates'))
+    parser.add_argument('--positive', nargs='*', help='Clips starting with the wake phrase')
+    parser.add_argument('--negative', nargs='*', help='Clips without it (defaults to benchmarks/fixtures/audio)')
+    parser.add_argument('--threshold', type=float, help='Overrides WAKE_WORD_THRESHOLD')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the background clips')
+    parser.add_argument('--gap', type=float, default=1.0, help='Seconds of silence between clips')
+    parser.add_argument('--generate', action='store_true', help='Create spoken fixtures with pyttsx3 and exit')
+    parser.add_argument('--phrase', default='hey trivia', help='Wake phrase for --generate')
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_fixtures(WAKE_DIR, args.phrase)
+        return
+
+    positive = args.positive
+    if positive is None:
+        positive = sorted(glob.glob(os.path.join(WAKE_DIR, 'positive', '*.wav')))
+    negative = args.negative
+    if negative is None:
+        negative = sorted(glob.glob(os.path.join(AUDIO_DIR, '*.wav')))
+    if not negative:
+        parser.error(f"no background clips in {AUDIO_DIR}; run bench_whisper.py --generate first")
+
+    add_src_to_path()
+    import speech_recognition as sr
+    from loguru import logger
+    from services.speech_recognition_service import SpeechRecognitionService
+    from services.wake_word import WakeWordSpotter
+
+    logger.remove()
+    service = SpeechRecognitionService(engine='google')
+    service.wake_word = WakeWordSpotter.from_directory(args.templates, threshold=args.threshold)
+    print(f"{len(service.wake_word.templates)} templates, threshold {service.wake_word.threshold}")
+
+    background, rate = join([load_clip(sr, path) for path in negative] * args.rounds, args.gap)
+    seconds = len(background) / rate
+
+    source = make_source(sr, background, rate)
+    accepts = 0
+    start = time.process_time()
+    while True:
+        lead = service.wait_for_wake_word(source)
+        if lead is None:
+            break
+        accepts += 1
+        # The bot would now capture the rest of the phrase as a question
+        service.capture_phrase(source, lambda chunk: None, lead=lead, phrase_time_limit=service.phrase_time_limit)
+    spotter_cpu = time.process_time() - start
+
+    source = make_source(sr, background, rate)
+    phrases, phrase_seconds = 0, 0.0
+    start = time.process_time()
+    while True:
+        raw = service.capture_phrase(source, lambda chunk: None, phrase_time_limit=service.phrase_time_limit)
+        if not raw:
+            break
+        phrases += 1
+        phrase_seconds += len(raw) / 2 / rate
+    capture_cpu = time.process_time() - start
+
+    print(f"background: {seconds:.0f}s of audio, {len(negative) * args.rounds} phrases")
+    print(f"  wake word stage: {spotter_cpu / seconds * 100:.2f}% of one core at real time | "
+          f"false accepts {accepts} ({accepts / seconds * 3600:.1f}/hour, "
+          f"{accepts / max(1, phrases) * 100:.1f}% of phrases)")
+    print(f"  without it:      {capture_cpu / seconds * 100:.2f}% of one core to capture, plus "
+          f"{phrases} phrases ({phrase_seconds:.0f}s of audio) sent to the recognizer")
+
+    if positive:
+        accepted, questions = 0, []
+        for path in positive:
+            samples, clip_rate = load_clip(sr, path)
+            signal, _ = join([(samples, clip_rate)], args.gap)
+            source = make_source(sr, signal, clip_rate)
+            lead = service.wait_for_wake_word(source)
+            if lead is None:
+                continue
+            accepted += 1
+            raw = service.capture_phrase(source, lambda chunk: None, lead=lead,
+                                         phrase_time_limit=service.phrase_time_limit)
+            questions.append(len(raw) / 2 / clip_rate)
+        print(f"wake clips: accepted {accepted}/{len(positive)} | question audio after the wake phrase "
+              f"p50 {percentile(questions, 50):.2f}s min {min(questions, default=0):.2f}s")
+
+
+if __name__ == '__main__':
+    main()
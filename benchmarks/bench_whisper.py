@@ -0,0 +1,164 @@
+"""Transcription latency benchmark for the Whisper speech path.
+
+Runs every WAV fixture through three paths with the same loaded model:
+
+* legacy: write the clip to a temporary WAV file and let Whisper read it
+  back with ffmpeg (the original implementation),
+* in-memory: PCM from AudioData straight into the persistent worker,
+* streaming: chunks fed at real-time pace with partial transcripts; the
+  reported latency is from the end of the audio to the final transcript.
+
+It also reports how long the model takes to load, which the worker now
+does in the background. Fixtures are spoken questions in
+benchmarks/fixtures/audio; record your own or create them, with matching .txt
+transcripts, using --generate (needs a pyttsx3 voice such as eSpeak).
+
+    python benchmarks/bench_whisper.py --model base --rounds 3
+    python benchmarks/bench_whisper.py --generate
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile
+
+AUDIO_DIR = os.path.join(FIXTURES_DIR, 'audio')
+
+QUESTIONS = [
+    "What is the capital of Australia?",
+    "Who wrote Pride and Prejudice?",
+    "How many planets are in the solar system?",
+    "What is the tallest mountain in Africa?",
+    "Who painted the Mona Lisa?"
+]
+
+
+def generate_fixtures(directory):
+    """Speak the sample questions into WAV files with pyttsx3."""
+    import pyttsx3
+
+    os.makedirs(directory, exist_ok=True)
+    engine = pyttsx3.init()
+    for index, question in enumerate(QUESTIONS):
+        base = os.path.join(directory, f"question_{index:02d}")
+        engine.save_to_file(question, base + '.wav')
+        # Transcripts let replay_voice.py run without a Whisper model
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(question + '\n')
+    engine.runAndWait()
+    print(f"Wrote {len(QUESTIONS)} fixtures to {directory}")
+
+
+def legacy_transcribe(model, audio):
+    """The original path: temp WAV file on disk, decoded again by Whisper."""
+    path = os.path.join(tempfile.gettempdir(), 'temp_audio.wav')
+    with open(path, 'wb') as f:
+        f.write(audio.get_wav_data())
+    try:
+        return model.transcribe(path)['text'].strip()
+    finally:
+        os.remove(path)
+
+
+def stream_transcribe(worker, path, realtime):
+    """Feed a clip chunk by chunk; return (first partial delay, final delay after the audio ended)."""
+    import speech_recognition as sr
+    from services.whisper_worker import StreamingTranscription, pcm_to_float32
+
+    partials = []
+    with sr.AudioFile(path) as source:
+        start = time.perf_counter()
+        stream = StreamingTranscription(
+            worker, lambda text: partials.append(time.perf_counter() - start),
+            sample_rate=source.SAMPLE_RATE
+        )
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        while True:
+            chunk = source.stream.read(source.CHUNK)
+            if not chunk:
+                break
+            stream.feed(pcm_to_float32(chunk, source.SAMPLE_WIDTH))
+            if realtime:
+                time.sleep(seconds_per_chunk)
+        audio_end = time.perf_counter()
+        stream.finish()
+        final = time.perf_counter() - audio_end
+    return (partials[0] if partials else None), final
+
+
+def report(name, latencies):
+    print(f"{name:<12} p50 {percentile(latencies, 50) * 1000:8.1f}ms "
+          f"p90 {percentile(latencies, 90) * 1000:8.1f}ms "
+          f"max {max(latencies, default=0) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='WAV files (defaults to benchmarks/fixtures/audio)')
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL', 'base'), help='Whisper model size')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the fixtures')
+    parser.add_argument('--no-realtime', action='store_true',
+                        help='Feed streaming chunks as fast as possible instead of at speaking pace')
+    parser.add_argument('--generate', action='store_true', help='Create spoken fixtures with pyttsx3 and exit')
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_fixtures(AUDIO_DIR)
+        return
+
+    paths = args.fixtures or sorted(glob.glob(os.path.join(AUDIO_DIR, '*.wav')))
+    if not paths:
+        parser.error(f"no WAV fixtures in {AUDIO_DIR}; record some or run with --generate")
+
+    add_src_to_path()
+    import speech_recognition as sr
+    from loguru import logger
+    from services.whisper_worker import WhisperWorker, audio_to_array
+
+    logger.remove()
+    clips = []
+    for path in paths:
+        with sr.AudioFile(path) as source:
+            clips.append((path, sr.Recognizer().record(source)))
+
+    start = time.perf_counter()
+    worker = WhisperWorker(args.model, preload=True)
+    constructed = time.perf_counter() - start
+    if not worker.wait_ready():
+        raise SystemExit(f"could not load Whisper model '{args.model}'")
+    loaded = time.perf_counter() - start
+    print(f"model '{args.model}': worker ready for use after {constructed * 1000:.1f}ms, "
+          f"model loaded in the background after {loaded:.2f}s")
+
+    # Warm up so the first timed clip does not pay for lazy initialisation
+    worker.transcribe(audio_to_array(clips[0][1]))
+
+    legacy, in_memory, first_partials, stream_final = [], [], [], []
+    for _ in range(args.rounds):
+        for path, audio in clips:
+            start = time.perf_counter()
+            legacy_transcribe(worker._model, audio)
+            legacy.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            worker.transcribe(audio_to_array(audio))
+            in_memory.append(time.perf_counter() - start)
+
+            first, final = stream_transcribe(worker, path, not args.no_realtime)
+            if first is not None:
+                first_partials.append(first)
+            stream_final.append(final)
+
+    print(f"{len(clips)} clips x {args.rounds} rounds")
+    report('legacy', legacy)
+    report('in-memory', in_memory)
+    report('streaming', stream_final)
+    if first_partials:
+        report('1st partial', first_partials)
+    worker.stop()
+
+
+if __name__ == '__main__':
+    main()
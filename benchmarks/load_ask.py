@@ -0,0 +1,121 @@
+"""Load benchmark for the /ask route.
+
+Fires N concurrent /ask requests at the Flask app served by a real
+threaded WSGI server, with the search backends replaced by sleeping
+stubs, and reports latency percentiles and throughput. With --stream the
+questions go to /ask/stream instead and the time to the first answer event
+is reported alongside the time to the final answer.
+
+    python benchmarks/load_ask.py --requests 200 --concurrency 32 --latency 0.2
+    python benchmarks/load_ask.py --stream
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import add_src_to_path, stub_search_backends, summarize_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='Total /ask calls')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--latency', type=float, default=0.2, help='Stub backend latency (s)')
+    parser.add_argument('--workers', type=int, default=None, help='ANSWER_WORKERS override')
+    parser.add_argument('--max-pending', type=int, default=None, help='ANSWER_MAX_PENDING override')
+    parser.add_argument('--stream', action='store_true', help='Use the /ask/stream Server-Sent Events route')
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ['ANSWER_WORKERS'] = str(args.workers)
+    if args.max_pending:
+        os.environ['ANSWER_MAX_PENDING'] = str(args.max_pending)
+
+    add_src_to_path()
+    stub_search_backends(latency=args.latency)
+
+    import requests
+    from loguru import logger
+    from werkzeug.serving import make_server
+
+    logger.remove()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import app as web_app
+    web_app.bot.tts_service.speak = lambda *a, **k: None
+
+    server = make_server('127.0.0.1', 0, web_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/ask"
+
+    latencies = []
+    first_answers = []
+    statuses = Counter()
+    mismatched = 0
+    lock = threading.Lock()
+
+    def ask(i):
+        nonlocal mismatched
+        question = f"question number {i}"
+        start = time.perf_counter()
+        if args.stream:
+            response, body, first = stream_answer(url, question)
+        else:
+            response = requests.post(url, json={"question": question}, timeout=60)
+            body = response.json()
+            first = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            if first is not None:
+                first_answers.append(first - start)
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                if body.get("question") != question:
+                    mismatched += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(ask, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    print(summarize_latencies('/ask/stream' if args.stream else '/ask', latencies, elapsed))
+    if args.stream:
+        print(summarize_latencies('first answer', first_answers, elapsed))
+    print(f"status codes: {dict(statuses)} | answers returned to wrong caller: {mismatched}")
+    print(f"dispatcher: {web_app.dispatcher.stats()}")
+
+
+def stream_answer(url, question):
+    """Read /ask/stream until the final answer.
+
+    Returns:
+        tuple: (response, final answer event data, perf_counter time of the first answer)
+    """
+    import requests
+
+    response = requests.get(f"{url}/stream", params={"question": question}, stream=True, timeout=60)
+    if response.status_code != 200:
+        return response, {}, None
+    first = None
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: '):
+            data = json.loads(line[len('data: '):])
+            if first is None and data.get('answer') and event in ('hit', 'candidate', 'answer'):
+                first = time.perf_counter()
+            if event == 'answer':
+                response.close()
+                return response, data, first
+    return response, {}, first
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Worker scaling benchmark for the multi-process server (src/serve.py).
+
+Starts the pre-fork server with 1, 2, 4, ... worker processes, with the
+search backends replaced by stubs that sleep and then burn CPU the way page
+parsing does, and fires concurrent /ask requests at it. Each run asks every
+question twice: the first pass measures throughput, and the repeat pass
+shows answers cached by one worker being served by the others from the
+shared SQLite cache.
+
+    python benchmarks/load_serve.py --workers 1 2 4 --requests 400 --cpu 0.01
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import add_src_to_path, stub_search_backends, summarize_latencies
+
+
+def make_app_factory(args):
+    """Build the app factory each worker runs after the fork."""
+    def factory():
+        stub_search_backends(latency=args.latency, jitter=0.0, cpu=args.cpu)
+        from loguru import logger
+        logger.remove()
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        import app as web_app
+        return web_app.app
+    return factory
+
+
+def wait_until_ready(url, workers, timeout=60):
+    """Poll /status until every worker has answered that it is ready."""
+    import requests
+
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while len(ready) < workers and time.monotonic() < deadline:
+        try:
+            status = requests.get(f"{url}/status", timeout=5).json()
+            if status.get("ready"):
+                ready.add(status["worker"])
+        except requests.RequestException:
+            pass
+        time.sleep(0.02)
+
+
+def run_pass(url, questions, concurrency):
+    """Ask every question once; return (latencies, elapsed, status codes)."""
+    import requests
+
+    local = threading.local()
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def ask(question):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        response = session.post(f"{url}/ask", json={"question": question}, timeout=60)
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(ask, questions))
+    return latencies, time.perf_counter() - start, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--requests', type=int, default=400, help='Distinct questions per run')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub backend latency (s)')
+    parser.add_argument('--cpu', type=float, default=0.01, help='Stub CPU time per backend call (s)')
+    args = parser.parse_args()
+
+    add_src_to_path()
+    from loguru import logger
+    from serve import PreforkServer, shared_state_defaults
+
+    logger.remove()
+    # Plenty of threads per worker, so the worker count is what limits throughput
+    os.environ.setdefault('ANSWER_WORKERS', str(args.concurrency))
+    os.environ.setdefault('ANSWER_MAX_PENDING', str(args.concurrency * 2))
+    print(f"{os.cpu_count()} CPUs available")
+
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as state_dir:
+            # A fresh shared cache per run, so the first pass always searches
+            for name in ('ANSWER_CACHE_PATH', 'RATE_LIMIT_STATE_PATH'):
+                os.environ.pop(name, None)
+            shared_state_defaults(state_dir)
+            server = PreforkServer('127.0.0.1', 0, workers, app_factory=make_app_factory(args))
+            server.start()
+            url = f"http://127.0.0.1:{server.port}"
+            try:
+                wait_until_ready(url, workers)
+                questions = [f"workers {workers} question {i}" for i in range(args.requests)]
+                latencies, elapsed, statuses = run_pass(url, questions, args.concurrency)
+                cached, cached_elapsed, _ = run_pass(url, questions, args.concurrency)
+            finally:
+                server.stop()
+
+        throughput = len(latencies) / elapsed if elapsed else 0.0
+        baseline = baseline or throughput
+        print(summarize_latencies(f"{workers} worker(s)", latencies, elapsed)
+              + f" | x{throughput / baseline:.2f} | status codes: {dict(statuses)}")
+        print(summarize_latencies("  repeat (shared cache)", cached, cached_elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""Replay harness for the voice loop.
+
+Plays recorded questions into TriviaBot as if they came from the
+microphone, at speaking pace, with the search backends replaced by
+sleeping stubs. Each run reports the latency from the end of a question
+(the last sample of its recording, so the time the voice activity detector
+takes to notice the question is over is included) to the start of its
+spoken answer. It runs the
+serial listen -> recognize -> search -> speak loop and the pipelined loop
+with speculative search on partial transcripts.
+
+Fixtures are WAV files in benchmarks/fixtures/audio with the spoken text in
+a matching .txt file (bench_whisper.py --generate creates both). The real
+Whisper model is used unless --simulated-asr is given. In that mode the
+recognizer returns the part of the .txt transcript that has been heard so far
+and charges --asr-cost seconds of compute per second of audio.
+
+    python benchmarks/replay_voice.py --latency 0.8
+    python benchmarks/replay_voice.py --simulated-asr --asr-cost 0.15
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+import types
+import wave
+
+import numpy as np
+
+from bench_utils import FIXTURES_DIR, add_src_to_path, percentile, stub_search_backends
+
+AUDIO_DIR = os.path.join(FIXTURES_DIR, 'audio')
+
+
+class Clip:
+    def __init__(self, path, threshold=1000, chunk=4096):
+        import speech_recognition as sr
+
+        self.path = path
+        with wave.open(path, 'rb') as f:
+            rate = f.getframerate()
+            width = f.getsampwidth()
+            frames = f.readframes(f.getnframes())
+        # Mono PCM as the microphone would deliver it
+        with sr.AudioFile(path) as source:
+            self.sample_rate = source.SAMPLE_RATE
+            self.sample_width = source.SAMPLE_WIDTH
+            self.pcm = sr.Recognizer().record(source).get_raw_data()
+        dtype = {1: np.int8, 2: '<i2', 4: '<i4'}[width]
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float64)
+        self.duration = len(samples) / rate
+        # Length of the loud part, which the simulated recognizer spreads the words over
+        loud = [
+            index for index in range(0, len(samples), chunk)
+            if np.sqrt(np.mean(samples[index:index + chunk] ** 2)) > threshold
+        ]
+        self.speech_duration = (loud[-1] - loud[0] + chunk) / rate if loud else self.duration
+        transcript = os.path.splitext(path)[0] + '.txt'
+        self.text = ''
+        if os.path.exists(transcript):
+            with open(transcript, encoding='utf-8') as f:
+                self.text = f.read().strip()
+
+
+def make_replay_microphone(sr, clips, on_question_end, on_exhausted, gap=1.0):
+    """Build a Microphone replacement that plays the clips as one continuous recording.
+
+    The speech service keeps its microphone open between questions, so the
+    clips are joined with, and preceded by, gap seconds of silence and read at speaking pace.
+    Nothing is read while the bot is busy answering, as with a device that
+    drops audio nobody listens to, so each question starts where the last
+    capture stopped. on_question_end is called when the last chunk of a
+    clip has been read.
+    """
+    queue = list(clips)
+
+    class _ReplayStream:
+        def __init__(self, clips, sample_rate, sample_width):
+            self.seconds_per_byte = 1.0 / (sample_rate * sample_width)
+            silence = b'\0' * (int(gap * sample_rate) * sample_width)
+            # Nobody speaks the instant the microphone opens
+            self.data = silence
+            self.ends = []
+            for clip in clips:
+                self.ends.append((len(self.data), len(self.data) + len(clip.pcm), clip))
+                self.data += clip.pcm + silence
+            self.position = 0
+
+        def read(self, size):
+            data = self.data[self.position:self.position + size]
+            if not data:
+                return data
+            self.position += len(data)
+            time.sleep(len(data) * self.seconds_per_byte)
+            for start, end, clip in self.ends:
+                if start < self.position:
+                    ReplayMicrophone.current = clip
+                if end <= self.position:
+                    on_question_end(clip)
+            return data
+
+    class ReplayMicrophone(sr.AudioSource):
+        def __init__(self, device_index=None, sample_rate=None, chunk_size=1024):
+            self.clips, queue[:] = list(queue), []
+            self.CHUNK = chunk_size
+            self.stream = None
+
+        def __enter__(self):
+            if not self.clips:
+                on_exhausted()
+                raise sr.WaitTimeoutError("no more recorded questions")
+            self.SAMPLE_RATE = self.clips[0].sample_rate
+            self.SAMPLE_WIDTH = self.clips[0].sample_width
+            self.stream = _ReplayStream(self.clips, self.SAMPLE_RATE, self.SAMPLE_WIDTH)
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            self.stream = None
+
+    ReplayMicrophone.current = None
+    return ReplayMicrophone
+
+
+def install_simulated_whisper(microphone, cost):
+    """Register a stand-in whisper module that reads back the clip transcripts."""
+    class SimulatedModel:
+        device = types.SimpleNamespace(type='cpu')
+
+        def transcribe(self, audio, **options):
+            clip = microphone.current
+            seconds = len(audio) / 16000
+            time.sleep(seconds * cost)
+            if clip is None or not clip.text:
+                return {'text': ''}
+            words = clip.text.split()
+            # Words are assumed to be spread evenly over the loud part of the clip
+            heard = min(len(words), int(len(words) * seconds / clip.speech_duration))
+            return {'text': ' '.join(words[:heard])}
+
+    module = types.ModuleType('whisper')
+    module.load_model = lambda name: SimulatedModel()
+    sys.modules['whisper'] = module
+
+
+def run(mode, clips, args):
+    """Replay every clip through a fresh bot; return (latencies, wall time, speculation reuse)."""
+    import speech_recognition as sr
+    from trivia_bot import TriviaBot
+
+    ended = {}
+    spoken = []
+    done = threading.Event()
+    bot = None
+
+    def on_question_end(clip):
+        ended.setdefault(clip.path, time.perf_counter())
+
+    def on_exhausted():
+        bot.is_listening = False
+
+    microphone = make_replay_microphone(sr, clips, on_question_end, on_exhausted, gap=args.gap)
+    sr.Microphone = microphone
+    if args.simulated_asr:
+        install_simulated_whisper(microphone, args.asr_cost)
+
+    bot = TriviaBot()
+    bot.voice_pipeline = mode == 'pipelined'
+    reused = []
+    if bot.voice_pipeline:
+        import trivia_bot
+        original = trivia_bot.SpeculativeSearch.answer
+
+        def tracking_answer(self, question):
+            future = original(self, question)
+            reused.append(self.reused)
+            return future
+        trivia_bot.SpeculativeSearch.answer = tracking_answer
+
+    def speak(text, async_mode=True):
+        spoken.append(time.perf_counter())
+        if len(spoken) == len(clips):
+            done.set()
+        # Speaking takes time too, which the serial loop has to wait for
+        time.sleep(args.speak_time)
+    bot.tts_service.speak = speak
+    bot.speech_service.whisper_worker.wait_ready()
+
+    start = time.perf_counter()
+    bot.is_listening = True
+    bot.listen_loop()
+    done.wait(timeout=60)
+    wall = time.perf_counter() - start
+
+    if bot.voice_pipeline:
+        import trivia_bot
+        trivia_bot.SpeculativeSearch.answer = original
+    question_ends = [ended[clip.path] for clip in clips if clip.path in ended]
+    latencies = [answer - end for end, answer in zip(question_ends, spoken)]
+    return latencies, wall, reused
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='WAV files (defaults to benchmarks/fixtures/audio)')
+    parser.add_argument('--mode', choices=('serial', 'pipelined', 'both'), default='both')
+    parser.add_argument('--latency', type=float, default=0.8, help='Stub search backend latency (s)')
+    parser.add_argument('--speak-time', type=float, default=1.0, help='Seconds spent speaking each answer')
+    parser.add_argument('--gap', type=float, default=1.0, help='Seconds of silence after each question')
+    parser.add_argument('--simulated-asr', action='store_true',
+                        help='Use the .txt transcripts instead of a real Whisper model')
+    parser.add_argument('--asr-cost', type=float, default=0.1,
+                        help='Simulated transcription seconds per second of audio')
+    args = parser.parse_args()
+
+    paths = args.fixtures or sorted(glob.glob(os.path.join(AUDIO_DIR, '*.wav')))
+    if not paths:
+        parser.error(f"no WAV fixtures in {AUDIO_DIR}; run bench_whisper.py --generate first")
+    clips = [Clip(path) for path in paths]
+    if len({(clip.sample_rate, clip.sample_width) for clip in clips}) > 1:
+        parser.error("every WAV fixture must have the same sample rate and width")
+    if args.simulated_asr and not all(clip.text for clip in clips):
+        parser.error("--simulated-asr needs a .txt transcript next to every WAV fixture")
+
+    os.environ['SPEECH_ENGINE'] = 'whisper'
+    # Answer every question through the (stubbed) backends
+    os.environ.pop('ANSWER_CACHE_PATH', None)
+    os.environ.pop('KNOWLEDGE_BASE_PATH', None)
+    add_src_to_path()
+    stub_search_backends(latency=args.latency, jitter=0.0)
+    from loguru import logger
+    logger.remove()
+
+    modes = ['serial', 'pipelined'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        latencies, wall, reused = run(mode, clips, args)
+        line = (f"{mode:<10} {len(latencies)} questions in {wall:.2f}s | question end -> answer start "
+                f"p50 {percentile(latencies, 50) * 1000:.0f}ms "
+                f"p90 {percentile(latencies, 90) * 1000:.0f}ms "
+                f"max {max(latencies, default=0) * 1000:.0f}ms")
+        if mode == 'pipelined':
+            line += f" | speculative search reused for {sum(reused)}/{len(reused)}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from trivia_bot import TriviaBot
+from services.batch_runner import BatchRunner, parse_questions
+from services.metrics import metrics
+from services.question_dispatcher import QuestionDispatcher, DispatcherSaturated
 from loguru import logger
-import threading
-import queue
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
+import json
 import os
+import queue
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
@@ -18,45 +24,13 @@ else:
 
 app = Flask(__name__)
 bot = TriviaBot()
-question_queue = queue.Queue()
-answer_queue = queue.Queue()
-bot_thread = None
-is_listening = False
-
-def bot_worker():
-    """Background worker to process questions and get answers."""
-    global is_listening
-    while True:
-        try:
-            question = question_queue.get(timeout=1)  # Wait for questions
-            if question == "STOP":
-                break
-            
-            logger.info(f"Processing question: {question}")
-            answer = bot.get_answer(question)
-            
-            if answer:
-                answer_queue.put({
-                    "success": True,
-                    "answer": answer,
-                    "question": question
-                })
-            else:
-                answer_queue.put({
-                    "success": False,
-                    "answer": "I couldn't find an answer to that question.",
-                    "question": question
-                })
-                
-        except queue.Empty:
-            continue
-        except Exception as e:
-            logger.error(f"Error in bot worker: {e}")
-            answer_queue.put({
-                "success": False,
-                "answer": f"An error occurred: {str(e)}",
-                "question": "Error"
-            })
+# Start search (and the TTS engine answers are spoken with) in the background; /status reports readiness
+bot.warm_up(('search', 'tts') if bot.speak_answers else ('search',))
+dispatcher = QuestionDispatcher(bot.get_answer)
+answer_timeout = float(os.getenv('ANSWER_TIMEOUT', '30'))
+batch_max_questions = int(os.getenv('BATCH_MAX_QUESTIONS', '10000'))
+# Each running batch resolves BATCH_CONCURRENCY questions at once, so batches are capped like /ask
+batch_slots = threading.BoundedSemaphore(int(os.getenv('BATCH_MAX_RUNNING', '1')))
 
 @app.route('/')
 def home():
@@ -74,32 +48,207 @@ def ask_question():
             "error": "Please provide a question"
         }), 400
     
-    # Start bot thread if not running
-    global bot_thread
-    if bot_thread is None or not bot_thread.is_alive():
-        bot_thread = threading.Thread(target=bot_worker, daemon=True)
-        bot_thread.start()
-    
-    # Submit question
-    question_queue.put(question)
+    # Hand the question to the worker pool, rejecting it when saturated
+    try:
+        request_id, future = dispatcher.submit(question)
+    except DispatcherSaturated as e:
+        logger.warning(f"Rejecting question, dispatcher saturated: {e}")
+        response = jsonify({
+            "success": False,
+            "error": "Server is busy, please try again shortly"
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
-    # Wait for answer (with timeout)
+    # Wait for this request's own answer
     try:
-        result = answer_queue.get(timeout=30)
-        return jsonify(result)
-    except queue.Empty:
+        answer = future.result(timeout=answer_timeout)
+    except FutureTimeoutError:
+        logger.warning(f"[{request_id[:8]}] Timed out waiting for answer")
         return jsonify({
             "success": False,
-            "error": "Request timed out"
+            "error": "Request timed out",
+            "request_id": request_id
         }), 408
+    except Exception as e:
+        logger.error(f"[{request_id[:8]}] Error answering question: {e}")
+        return jsonify({
+            "success": False,
+            "answer": f"An error occurred: {str(e)}",
+            "question": question,
+            "request_id": request_id
+        })
+    
+    if answer:
+        body = {
+            "success": True,
+            "answer": answer,
+            "question": question,
+            "request_id": request_id
+        }
+        # Aggregated answers say how well the search results agreed on them
+        confidence = getattr(answer, 'confidence', None)
+        if confidence is not None:
+            body["confidence"] = confidence
+            body["sources"] = answer.sources
+        return jsonify(body)
+    return jsonify({
+        "success": False,
+        "answer": "I couldn't find an answer to that question.",
+        "question": question,
+        "request_id": request_id
+    })
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/ask/stream')
+def ask_stream():
+    """Answer a question, streaming search progress as Server-Sent Events.
+
+    Events: 'accepted', then 'hit' (math, knowledge base or cache), 'trying',
+    'candidate' and 'no_answer' per backend, 'skipped' for a backend whose
+    circuit breaker is open or that is over its rate limit, 'coalesced' when
+    the answer came from the same question already being searched, and a
+    final 'answer' (with confidence and sources when answers are aggregated)
+    or 'timeout'.
+    """
+    question = request.args.get('question', '').strip()
+    if not question:
+        return jsonify({
+            "success": False,
+            "error": "Please provide a question"
+        }), 400
+    
+    # Events arrive from worker threads; the response generator drains them
+    events = queue.Queue()
+    try:
+        request_id, future = dispatcher.submit(
+            question, on_event=lambda event, data: events.put((event, data))
+        )
+    except DispatcherSaturated as e:
+        logger.warning(f"Rejecting question, dispatcher saturated: {e}")
+        response = jsonify({
+            "success": False,
+            "error": "Server is busy, please try again shortly"
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    future.add_done_callback(lambda _: events.put((None, None)))
+    
+    def generate():
+        yield sse_event('accepted', {"question": question, "request_id": request_id})
+        deadline = time.monotonic() + answer_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"[{request_id[:8]}] Timed out streaming answer")
+                yield sse_event('timeout', {"error": "Request timed out", "request_id": request_id})
+                return
+            try:
+                event, data = events.get(timeout=min(remaining, 15))
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            
+            if event is None:
+                # The handler finished without a final search event
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    logger.error(f"[{request_id[:8]}] Error answering question: {e}")
+                    answer = None
+                event, data = 'answer', {"answer": answer, "source": None}
+            
+            if event == 'answer':
+                data = dict(data, success=bool(data.get("answer")), question=question, request_id=request_id)
+                if not data["success"]:
+                    data["answer"] = "I couldn't find an answer to that question."
+                yield sse_event(event, data)
+                return
+            yield sse_event(event, data)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    """Answer many questions, streaming NDJSON results as they complete."""
+    data = request.get_json(silent=True)
+    try:
+        if isinstance(data, dict):
+            questions = [str(q).strip() for q in data.get('questions', []) if str(q).strip()]
+        else:
+            # Raw JSONL, CSV or one question per line
+            questions = parse_questions(request.get_data(as_text=True), request.args.get('format'))
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Could not read questions: {e}"
+        }), 400
+    
+    if not questions:
+        return jsonify({
+            "success": False,
+            "error": "Please provide at least one question"
+        }), 400
+    if len(questions) > batch_max_questions:
+        return jsonify({
+            "success": False,
+            "error": f"Too many questions (limit is {batch_max_questions})"
+        }), 413
+    
+    if not batch_slots.acquire(blocking=False):
+        logger.warning("Rejecting batch, too many batches running")
+        response = jsonify({
+            "success": False,
+            "error": "Server is busy, please try again shortly"
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    runner = BatchRunner(bot.search_service)
+    
+    def generate():
+        for result in runner.run(questions):
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": runner.summary}) + "\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Runs once the stream ends or the client goes away, even if it never started
+    response.call_on_close(batch_slots.release)
+    return response
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose per-stage latency histograms in the Prometheus text format."""
+    if not metrics.enabled:
+        return Response("# metrics are disabled (METRICS_ENABLED=false)\n", status=404,
+                        mimetype='text/plain')
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/status')
 def get_status():
-    """Get bot status."""
-    return jsonify({
-        "status": "running",
-        "is_listening": is_listening
-    })
+    """Get bot status, including whether warm-up has finished."""
+    readiness = bot.readiness()
+    status = {
+        "status": "running" if readiness["ready"] else "starting",
+        "ready": readiness["ready"],
+        "services": readiness["services"],
+        "is_listening": bot.is_listening,
+        # Under serve.py each worker process answers with its own counters
+        "worker": os.getpid(),
+        "dispatcher": dispatcher.stats()
+    }
+    # Reading the stats must not wait for the search service to finish starting
+    if readiness["services"]["search"]:
+        status["search"] = bot.search_service.get_backend_stats()
+        status["cache"] = bot.search_service.get_cache_stats()
+    return jsonify(status)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=3000) 
\ No newline at end of file
@@ -0,0 +1,52 @@
+import argparse
+import json
+import sys
+from dotenv import load_dotenv
+from loguru import logger
+
+from services.batch_runner import BatchRunner, read_questions
+from services.search_service import create_search_service
+
+# Load environment variables from .env file
+load_dotenv()
+
+def main():
+    """Answer a file of questions and stream the results as JSONL."""
+    parser = argparse.ArgumentParser(description="Answer a list of trivia questions in bulk")
+    parser.add_argument('questions', help='JSONL or CSV with a "question" field, or text with one question per line')
+    parser.add_argument('--format', choices=('jsonl', 'csv', 'text'),
+                        help='Input format (guessed from the file when omitted)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Questions resolved in parallel (defaults to BATCH_CONCURRENCY or 8)')
+    parser.add_argument('--output', help='Write results here instead of stdout')
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    questions = read_questions(args.questions, args.format)
+    search_service = create_search_service()
+    runner = BatchRunner(search_service, concurrency=args.concurrency)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for result in runner.run(questions):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+        search_service.close()
+
+    summary = runner.summary
+    print(
+        f"Answered {summary['answered']}/{summary['unique']} unique questions "
+        f"({summary['questions']} total) in {summary['elapsed']}s | "
+        f"{summary['throughput']} questions/s | failed: {summary['failed']} | skipped: {summary['skipped']}",
+        file=sys.stderr
+    )
+    print(f"By source: {json.dumps(summary['sources'])}", file=sys.stderr)
+    print(f"Backend calls: {json.dumps(summary['backends'])}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import argparse
+import os
+import sys
+from itertools import chain
+
+from services.knowledge_base import KnowledgeBase, build_index, read_entries
+
+def main():
+    """Compile Q&A and entity-fact dumps into a memory-mappable knowledge base."""
+    parser = argparse.ArgumentParser(description="Build the local trivia knowledge base")
+    parser.add_argument('inputs', nargs='+', help='JSONL or CSV files of question/answer pairs or entity/relation/value facts')
+    parser.add_argument('-o', '--output', required=True, help='Output .tkb file')
+    args = parser.parse_args()
+
+    image = build_index(chain.from_iterable(read_entries(path) for path in args.inputs))
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(image)
+    # Replace atomically so running workers keep their existing mapping
+    os.replace(tmp_path, args.output)
+
+    kb = KnowledgeBase(args.output)
+    print(
+        f"Wrote {args.output}: {kb.doc_count} entries, {kb.term_count} terms, "
+        f"{len(image) / 1024:.1f} KB",
+        file=sys.stderr
+    )
+    kb.close()
+
+if __name__ == "__main__":
+    main()
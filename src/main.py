@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from loguru import logger
 import sys
 
+from services.metrics import metrics
 from trivia_bot import TriviaBot
 
 # Load environment variables from .env file
@@ -31,6 +32,10 @@ def main():
     try:
         # Create and start the bot
         bot = TriviaBot()
+        # Load the models and engines while the user gets ready to press Enter
+        bot.warm_up(('search', 'speech', 'tts'))
+        # Log where the time goes every METRICS_SUMMARY_INTERVAL seconds
+        metrics.start_reporter()
         logger.info("Starting Trivia Bot...")
         bot.start()
     except KeyboardInterrupt:
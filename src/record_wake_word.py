@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import wave
+from dotenv import load_dotenv
+from loguru import logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+def main():
+    """Record examples of the wake phrase for hands-free mode."""
+    parser = argparse.ArgumentParser(description="Record the wake phrase that starts a question in hands-free mode")
+    parser.add_argument('--directory', default=os.getenv('WAKE_WORD_TEMPLATES', os.path.join('data', 'wake_word')),
+                        help='Where to save the recordings (defaults to WAKE_WORD_TEMPLATES)')
+    parser.add_argument('--count', type=int, default=3, help='Number of recordings to make')
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    import speech_recognition as sr
+    from services.speech_recognition_service import SpeechRecognitionService
+
+    # The recordings themselves must not wait for a wake word
+    os.environ['HANDS_FREE'] = 'false'
+    service = SpeechRecognitionService(engine='google')
+    os.makedirs(args.directory, exist_ok=True)
+    existing = len([name for name in os.listdir(args.directory) if name.endswith('.wav')])
+
+    with sr.Microphone() as source:
+        for index in range(args.count):
+            input(f"Press Enter, then say the wake phrase ({index + 1}/{args.count})")
+            try:
+                raw = service.capture_phrase(source, lambda chunk: None, timeout=5, phrase_time_limit=3)
+            except sr.WaitTimeoutError:
+                print("Nothing heard, skipping", file=sys.stderr)
+                continue
+            path = os.path.join(args.directory, f"wake_{existing + index:02d}.wav")
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(source.SAMPLE_WIDTH)
+                f.setframerate(source.SAMPLE_RATE)
+                f.writeframes(raw)
+            print(f"Saved {path} ({len(raw) / source.SAMPLE_WIDTH / source.SAMPLE_RATE:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Multi-process web server for production use.
+
+The parent process binds the listening socket and forks the workers, each
+of which imports the Flask app and serves requests on its own threads; the
+kernel hands each new connection to one of them. Workers share the answer
+cache and the backend rate limits through SQLite files, and a worker that
+dies is replaced.
+
+    python src/serve.py --workers 4 --port 3000
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from loguru import logger
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def shared_state_defaults(data_dir: str = DATA_DIR):
+    """Point the answer cache and rate limits at files every worker can reach.
+
+    Explicit settings in the environment are kept.
+    """
+    os.environ.setdefault('ANSWER_CACHE_PATH', os.path.join(data_dir, 'answer_cache.sqlite3'))
+    os.environ.setdefault('RATE_LIMIT_STATE_PATH', os.path.join(data_dir, 'rate_limits.sqlite3'))
+    # N workers speaking every answer on one machine would talk over each other
+    os.environ.setdefault('SPEAK_ANSWERS', 'false')
+
+
+def load_app():
+    """Import the Flask app; called in each worker after the fork."""
+    import app as web_app
+    return web_app.app
+
+
+def bind(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    """Open the listening socket the workers share."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.create_server((host, port), family=family, backlog=backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, host: str, app_factory: Callable):
+    """Serve requests from the shared socket until terminated."""
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Everything stateful (bot, dispatcher, database connections) is created here, after the fork
+    app = app_factory()
+    server = make_server(host, sock.getsockname()[1], app, threaded=True, fd=sock.fileno())
+    logger.info(f"Worker {os.getpid()} serving")
+    server.serve_forever()
+
+
+class PreforkServer:
+    def __init__(self, host: str = '0.0.0.0', port: int = 3000, workers: Optional[int] = None,
+                 app_factory: Callable = load_app):
+        """Initialize the pre-fork server.
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 for any free port
+            workers (int): Worker processes, defaults to WEB_WORKERS or the CPU count
+            app_factory (callable): Returns the WSGI app; runs inside each worker
+        """
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("The multi-process server needs os.fork (Linux or macOS)")
+        self.host = host
+        self.workers = workers or int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 1)))
+        self.app_factory = app_factory
+        self.sock = bind(host, port)
+        self.port = self.sock.getsockname()[1]
+        # pid -> (start time, worker index)
+        self._children: Dict[int, Tuple[float, int]] = {}
+        self._stopping = False
+
+    def start(self):
+        """Fork the workers and return."""
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def serve_forever(self):
+        """Fork the workers and supervise them until SIGINT or SIGTERM."""
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        self.start()
+        logger.info(f"Serving on {self.host}:{self.port} with {self.workers} workers")
+        while not self._stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            child = self._children.pop(pid, None)
+            if child is None or self._stopping:
+                continue
+            started, index = child
+            logger.warning(f"Worker {pid} exited with status {status}, starting a replacement")
+            # Do not spin if workers die straight away, e.g. on an import error
+            if time.monotonic() - started < 1:
+                time.sleep(1)
+            self._spawn(index)
+
+    def stop(self, timeout: float = 10):
+        """Terminate the workers and wait for them to exit."""
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._children.pop(pid, None)
+        deadline = time.monotonic() + timeout
+        while self._children and time.monotonic() < deadline:
+            for pid in list(self._children):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self._children.pop(pid, None)
+            time.sleep(0.05)
+        for pid in list(self._children):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self._children.clear()
+        self.sock.close()
+
+    def _spawn(self, index: int):
+        """Fork worker number index."""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            # Lets per-worker state, such as question popularity, survive the worker being replaced
+            os.environ['WEB_WORKER_INDEX'] = str(index)
+            try:
+                run_worker(self.sock, self.host, self.app_factory)
+            except SystemExit as e:
+                code = e.code or 0
+            except BaseException as e:
+                logger.error(f"Worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                # Never return into the parent's code path
+                os._exit(code)
+        self._children[pid] = (time.monotonic(), index)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the Trivia Bot web server with several worker processes.")
+    parser.add_argument('--host', default=os.getenv('WEB_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('WEB_PORT', '3000')))
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: WEB_WORKERS or the CPU count)')
+    args = parser.parse_args()
+
+    shared_state_defaults()
+    PreforkServer(args.host, args.port, args.workers).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from loguru import logger
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from services.answer_extractor import AnswerExtractor
+from services.knowledge_base import tokenize
+
+# Vote weight of each Search API field; a field's own text is a stronger
+# signal than a result snippet that merely mentions the answer
+SERP_FIELD_WEIGHTS = {
+    'answer_box': {'answer': 3.0, 'result': 3.0, 'snippet': 2.5, 'title': 1.5},
+    'knowledge_graph': {'answer': 2.5, 'description': 2.0, 'snippet': 2.0, 'title': 1.0},
+    'organic_results': {'snippet': 1.0, 'title': 0.5}
+}
+# Snippets from a result page's featured answer box count double
+FEATURED_WEIGHT = 2.0
+# Each lower-ranked snippet counts for less
+RANK_DECAY = 0.8
+# Score points lost per sentence a snippet gets through before reaching a sentence
+POSITION_PENALTY = 0.25
+# Score points a sentence gains when every candidate agrees with it, on the
+# AnswerExtractor.score_sentence scale (a digit is worth 3, an answer verb 2)
+VOTE_POINTS = 4.0
+# Weight of an imaginary dissenting source, so one lone snippet is never certain
+CONFIDENCE_PRIOR = 1.0
+
+_ENDING = re.compile(r'(?<=[a-z]{4})(?:ing|ed|es|s)$')
+
+
+@dataclass
+class Candidate:
+    """One answer-bearing text from a backend response."""
+    text: str
+    backend: str
+    # Where in the response it came from, e.g. 'answer_box' or 'snippet'
+    field: str
+    weight: float = 1.0
+
+    @property
+    def source(self) -> str:
+        return f"{self.backend}:{self.field}"
+
+
+class VotedAnswer(str):
+    """An answer sentence that remembers how well the candidates agreed on it.
+
+    It is a str, so it travels through the cache, events and handlers like
+    any other answer; confidence and sources are read with getattr.
+    """
+
+    def __new__(cls, text: str, confidence: float, sources: List[str], backend: str,
+                candidates: Sequence[Candidate]):
+        answer = super().__new__(cls, text)
+        answer.confidence = confidence
+        answer.sources = sources
+        answer.backend = backend
+        answer.candidates = tuple(candidates)
+        return answer
+
+
+@lru_cache(maxsize=8192)
+def _term(token: str) -> str:
+    """Strip plural and verb endings so "painted" and "painting" vote together."""
+    return _ENDING.sub('', token)
+
+
+class AnswerAggregator:
+    def __init__(self, extractor: Optional[AnswerExtractor] = None, max_candidates: Optional[int] = None):
+        """Initialize the answer aggregator.
+
+        Every answer field and the top snippets of a response are split into
+        sentences. Each sentence votes, with its candidate's weight, for the
+        words it contains that are not in the question; a sentence is then
+        ranked by the share of candidate weight behind its best-supported
+        word plus its AnswerExtractor score. Sentences are the rows of one
+        term matrix, so the voting for a response is a few NumPy products.
+
+        Args:
+            extractor (AnswerExtractor): Splits and scores sentences
+            max_candidates (int): Texts taken per response, defaults to
+                AGGREGATION_MAX_CANDIDATES or 8
+        """
+        self.extractor = extractor or AnswerExtractor()
+        self.max_candidates = (max_candidates if max_candidates is not None
+                               else int(os.getenv('AGGREGATION_MAX_CANDIDATES', '8')))
+
+    def serp_candidates(self, data: dict) -> List[Candidate]:
+        """Collect every answer field and organic result of a Search API response."""
+        candidates = []
+        for section, fields in SERP_FIELD_WEIGHTS.items():
+            entries = data.get(section)
+            if isinstance(entries, dict):
+                entries = [entries]
+            if not isinstance(entries, list):
+                continue
+            field_name = 'organic' if section == 'organic_results' else section
+            for rank, entry in enumerate(entries[:self.max_candidates]):
+                if not isinstance(entry, dict):
+                    continue
+                for field, weight in fields.items():
+                    text = entry.get(field)
+                    if text and isinstance(text, str):
+                        candidates.append(Candidate(text, 'serp_api', field_name, weight * RANK_DECAY ** rank))
+        return candidates[:self.max_candidates]
+
+    def page_candidates(self, backend: str, texts: Iterable[str], featured: bool = False) -> List[Candidate]:
+        """Turn the snippets ResultPageParser found on a result page into candidates."""
+        weight = FEATURED_WEIGHT if featured else 1.0
+        field = 'featured' if featured else 'snippet'
+        return [
+            Candidate(text, backend, field, weight * RANK_DECAY ** rank)
+            for rank, text in enumerate(texts)
+            if rank < self.max_candidates and text
+        ]
+
+    def aggregate(self, question: str, candidates: Sequence[Candidate]) -> Optional[VotedAnswer]:
+        """Pick the answer sentence the candidates agree on most.
+
+        Args:
+            question (str): The question, whose own words cast no votes
+            candidates (list): Texts from one or more backend responses
+
+        Returns:
+            VotedAnswer: The best sentence with its confidence (0-1) and the
+                sources that support it, or None if no candidate had text
+        """
+        try:
+            return self._aggregate(question, candidates)
+        except Exception as e:
+            logger.error(f"Answer aggregation failed: {e}")
+            fallback = self.extractor.extract(candidate.text for candidate in candidates)
+            if fallback is None:
+                return None
+            return VotedAnswer(fallback, 0.0, [], candidates[0].backend, candidates)
+
+    def merge(self, question: str, answers: Sequence[str]) -> Optional[VotedAnswer]:
+        """Vote again over the candidates behind several backends' answers."""
+        candidates = [candidate for answer in answers for candidate in getattr(answer, 'candidates', ())]
+        return self.aggregate(question, candidates) if candidates else None
+
+    def _aggregate(self, question: str, candidates: Sequence[Candidate]) -> Optional[VotedAnswer]:
+        question_terms = {_term(token) for token in tokenize(question)}
+        sentences: List[str] = []
+        owners: List[int] = []
+        positions: List[int] = []
+        scores: List[int] = []
+        rows: List[List[int]] = []
+        vocabulary = {}
+        for index, candidate in enumerate(candidates):
+            text = self.extractor.strip_boilerplate(candidate.text)
+            parts = self.extractor.split_sentences(text) or [text.strip()]
+            for position, sentence in enumerate(parts):
+                if not sentence:
+                    continue
+                score = self.extractor.score_sentence(sentence)
+                if score is None:
+                    continue
+                terms = {_term(token) for token in tokenize(sentence)} - question_terms
+                rows.append([vocabulary.setdefault(term, len(vocabulary)) for term in terms])
+                sentences.append(sentence)
+                owners.append(index)
+                positions.append(position)
+                scores.append(score)
+        if not sentences:
+            return None
+
+        # Sentence x term incidence, and which candidate each sentence came from
+        terms = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+        for row, columns in enumerate(rows):
+            terms[row, columns] = 1.0
+        owner = np.zeros((len(candidates), len(sentences)), dtype=np.float32)
+        owner[owners, np.arange(len(sentences))] = 1.0
+        weights = np.array([candidate.weight for candidate in candidates], dtype=np.float32)
+
+        # A candidate votes once for each term any of its sentences contains
+        mentions = (owner @ terms) > 0
+        total = float(weights.sum()) + CONFIDENCE_PRIOR
+        term_share = (weights @ mentions) / total
+
+        # Each sentence stands on its best-supported term
+        support = terms * term_share
+        key_terms = support.argmax(axis=1)
+        agreement = support.max(axis=1)
+        ranking = (np.array(scores, dtype=np.float32) + VOTE_POINTS * agreement
+                   - POSITION_PENALTY * np.array(positions, dtype=np.float32))
+        lengths = np.array([len(sentence) for sentence in sentences])
+        # Best ranking first; ties go to the shorter sentence, then the earlier one
+        best = int(np.lexsort((np.arange(len(sentences)), lengths, -ranking))[0])
+
+        supporters = np.flatnonzero(mentions[:, key_terms[best]]) if agreement[best] > 0 else np.array([owners[best]])
+        supporters = supporters[np.argsort(-weights[supporters], kind='stable')]
+        sources = list(dict.fromkeys(candidates[index].source for index in supporters))
+        confidence = float(agreement[best]) if agreement[best] > 0 else float(weights[owners[best]]) / total
+        return VotedAnswer(sentences[best], round(confidence, 3), sources,
+                           candidates[owners[best]].backend, candidates)
+
+
+def create_answer_aggregator(extractor: AnswerExtractor) -> Optional[AnswerAggregator]:
+    """Create the aggregator when ANSWER_AGGREGATION is on, otherwise None."""
+    if os.getenv('ANSWER_AGGREGATION', 'false').lower() not in ('1', 'true', 'yes', 'on'):
+        return None
+    logger.info("Answer aggregation on, voting across all answer fields and snippets")
+    return AnswerAggregator(extractor)
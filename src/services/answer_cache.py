@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from loguru import logger
+from typing import Optional, Tuple
+
+
+class SQLiteAnswerStore:
+    def __init__(self, path: str):
+        """Initialize the persistent answer store.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS answers ('
+            'key TEXT PRIMARY KEY, answer TEXT, expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], float]]:
+        """Return (answer, expires_at) for a key, or None if absent."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT answer, expires_at FROM answers WHERE key = ?', (key,)
+            ).fetchone()
+        return row
+
+    def put(self, key: str, answer: Optional[str], expires_at: float):
+        """Insert or replace an entry."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO answers (key, answer, expires_at) VALUES (?, ?, ?)',
+                (key, answer, expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove an entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM answers WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM answers WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class AnswerCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None, path: Optional[str] = None):
+        """Initialize the tiered answer cache.
+
+        Answers are kept in a bounded in-memory LRU and, when a path is
+        given, in a SQLite store that survives restarts. Questions without
+        an answer are cached too, with a shorter TTL.
+
+        Args:
+            max_entries (int): Maximum entries in the in-memory tier (0 disables it)
+            ttl (float): Seconds an answer stays valid
+            negative_ttl (float): Seconds a missing answer stays cached
+            path (str): SQLite file for the persistent tier, None to disable it
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('ANSWER_CACHE_SIZE', '1024'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('ANSWER_CACHE_TTL', '86400'))
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(os.getenv('ANSWER_CACHE_NEGATIVE_TTL', '300'))
+        path = path if path is not None else os.getenv('ANSWER_CACHE_PATH')
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._store = None
+        if path:
+            try:
+                self._store = SQLiteAnswerStore(path)
+                logger.info(f"Persistent answer cache at {path}")
+            except Exception as e:
+                logger.error(f"Could not open persistent answer cache {path}: {e}")
+
+        self._counters = {
+            "hits": 0,
+            "negative_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stores": 0
+        }
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Look up a cached answer.
+
+        Args:
+            key (str): Normalized question
+
+        Returns:
+            tuple: (found, answer); answer is None for cached negative results
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                answer, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count_hit(answer)
+                    return True, answer
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+        if self._store is not None:
+            try:
+                row = self._store.get(key)
+            except Exception as e:
+                logger.error(f"Error reading persistent answer cache: {e}")
+                row = None
+            if row is not None:
+                answer, expires_at = row
+                if expires_at > now:
+                    with self._lock:
+                        self._insert(key, answer, expires_at)
+                        self._counters["persistent_hits"] += 1
+                        self._count_hit(answer)
+                    return True, answer
+                with self._lock:
+                    self._counters["expirations"] += 1
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return False, None
+
+    def peek(self, key: str) -> Optional[Tuple[Optional[str], float]]:
+        """Return (answer, expires_at) of a live entry without counting a hit or miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self._store is not None:
+            try:
+                entry = self._store.get(key)
+            except Exception as e:
+                logger.error(f"Error reading persistent answer cache: {e}")
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0], entry[1]
+
+    def store(self, key: str, answer: Optional[str], ttl: Optional[float] = None):
+        """Cache an answer, or the absence of one when answer is None.
+
+        Args:
+            key (str): Normalized question
+            answer (str): The answer, or None for a negative result
+            ttl (float): Override for the entry lifetime in seconds
+        """
+        if ttl is None:
+            ttl = self.ttl if answer else self.negative_ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._insert(key, answer, expires_at)
+            self._counters["stores"] += 1
+
+        if self._store is not None:
+            try:
+                self._store.put(key, answer, expires_at)
+            except Exception as e:
+                logger.error(f"Error writing persistent answer cache: {e}")
+
+    def invalidate(self, key: str):
+        """Drop a key from every tier."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self._store is not None:
+            try:
+                self._store.delete(key)
+            except Exception as e:
+                logger.error(f"Error deleting from persistent answer cache: {e}")
+
+    def stats(self) -> dict:
+        """Return cache counters and sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["persistent"] = self._store.path if self._store is not None else None
+        return stats
+
+    def close(self):
+        """Close the persistent tier."""
+        if self._store is not None:
+            self._store.close()
+
+    def _count_hit(self, answer: Optional[str]):
+        """Increment hit counters. Caller holds the lock."""
+        self._counters["hits"] += 1
+        if answer is None:
+            self._counters["negative_hits"] += 1
+
+    def _insert(self, key: str, answer: Optional[str], expires_at: float):
+        """Insert into the in-memory tier, evicting the LRU entry. Caller holds the lock."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (answer, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
@@ -0,0 +1,168 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+
+# Boilerplate that result pages put in front of the actual answer
+PREFIXES = [
+    'Search Results',
+    'Featured snippet from the web',
+    'Web results',
+    'People also ask',
+    'Description',
+    'Overview',
+    'Quick Answer',
+    'Top answer:',
+    'Advertisement',
+    'According to',
+    'Below, we\'ve compiled',
+    'Here are',
+    'In this article'
+]
+
+# Sentences containing these are navigation or marketing text, not answers
+STOP_PHRASES = ['click here', 'read more', 'learn more', 'find out', 'subscribe']
+
+_WHITESPACE = re.compile(r'\s+')
+_CITATION = re.compile(r'\[\d+\]')
+_URL = re.compile(r'http\S+')
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+_PREFIX = re.compile(
+    '|'.join(re.escape(prefix.lower()) for prefix in sorted(PREFIXES, key=len, reverse=True))
+)
+_STOP_PHRASE = re.compile('|'.join(re.escape(phrase) for phrase in STOP_PHRASES))
+_DIGIT = re.compile(r'\d')
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+_MONEY = re.compile(r'\$\s*\d+(?:\.\d+)?')
+_ANSWER_VERB = re.compile(r'\b(?:is|are|was|were|has|have|had)\b')
+_REASONING = re.compile(r'\b(?:because|therefore|thus|hence|since|due to)\b')
+_PROPER_NOUN = re.compile(r'[A-Z][a-z]')
+
+
+class AnswerExtractor:
+    def __init__(self, max_snippets: int = 3):
+        """Initialize the answer extractor.
+
+        Args:
+            max_snippets (int): Maximum snippets considered by extract()
+        """
+        self.max_snippets = max_snippets
+
+    def clean(self, text: str) -> Optional[str]:
+        """Return the best answer sentence from a single snippet."""
+        return self.extract([text])
+
+    def extract(self, texts: Iterable[str]) -> Optional[str]:
+        """Return the best answer sentence across several snippets.
+
+        All sentences from all snippets are scored in one pass and the
+        global best is returned. Ties go to the shorter sentence, then to
+        the earlier snippet.
+
+        Args:
+            texts (iterable): Snippet texts in result order
+
+        Returns:
+            str: The best sentence, or None if no snippet had any text
+        """
+        candidates: List[str] = []
+        fallback = None
+        for index, text in enumerate(texts):
+            if index >= self.max_snippets:
+                break
+            if not text:
+                continue
+            text = self.strip_boilerplate(text)
+            sentences = self.split_sentences(text)
+            if not sentences:
+                if fallback is None and text.strip():
+                    fallback = text.strip()
+                continue
+            if fallback is None:
+                fallback = sentences[0]
+            candidates.extend(sentences)
+
+        best = self.best_sentence(candidates)
+        if best is not None:
+            return best
+        return fallback
+
+    def strip_boilerplate(self, text: str) -> str:
+        """Collapse whitespace, drop leading boilerplate, citations and URLs."""
+        text = _WHITESPACE.sub(' ', text)
+
+        # One lowercase pass; offsets line up unless lowering changed the length
+        lower = text.lower()
+        if len(lower) == len(text):
+            pos = 0
+            match = _PREFIX.match(lower, pos)
+            while match:
+                pos = match.end()
+                while pos < len(text) and text[pos] == ' ':
+                    pos += 1
+                match = _PREFIX.match(lower, pos)
+            text = text[pos:]
+
+        if '[' in text:
+            text = _CITATION.sub('', text)
+        if 'http' in text:
+            text = _URL.sub('', text)
+        return text
+
+    def split_sentences(self, text: str) -> List[str]:
+        """Split text into stripped, non-empty sentences."""
+        return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+
+    def best_sentence(self, sentences: List[str]) -> Optional[str]:
+        """Return the highest scoring sentence, skipping meta-text."""
+        best: Optional[Tuple[int, int]] = None
+        best_sentence = None
+        for sentence in sentences:
+            score = self.score_sentence(sentence)
+            if score is None:
+                continue
+            key = (-score, len(sentence))
+            if best is None or key < best:
+                best = key
+                best_sentence = sentence
+        return best_sentence
+
+    def score_sentence(self, sentence: str) -> Optional[int]:
+        """Score a sentence on information density and relevance.
+
+        Returns:
+            int: The score, or None for navigation and marketing text
+        """
+        lower = sentence.lower()
+        if _STOP_PHRASE.search(lower):
+            return None
+
+        score = 0
+        # Prefer sentences with specific facts
+        if _DIGIT.search(sentence):
+            score += 3
+            if _YEAR.search(sentence):
+                score += 2
+            if '$' in sentence and _MONEY.search(sentence):
+                score += 2
+
+        # Prefer sentences that directly answer questions
+        if _ANSWER_VERB.search(lower):
+            score += 2
+
+        # Prefer sentences with key information indicators
+        if _REASONING.search(lower):
+            score += 2
+
+        # Prefer sentences with proper nouns
+        if _PROPER_NOUN.search(sentence):
+            score += 1
+
+        # Prefer sentences of reasonable length
+        words = len(sentence.split())
+        if 6 <= words <= 20:
+            score += 2
+        elif words < 6:
+            score -= 1
+        else:
+            score -= words // 20
+
+        return score
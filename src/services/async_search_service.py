@@ -0,0 +1,382 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import replace
+from loguru import logger
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from services.backend_health import ANSWERED, EMPTY, ERROR, BackendError
+from services.html_parser import AnswerRegion
+from services.metrics import metrics
+from services.search_service import (
+    DUCKDUCKGO_ANSWER_SELECTORS, GOOGLE_FEATURED_SELECTORS, EventCallback, SearchResult, SearchService,
+    check_google_captcha
+)
+from services.single_flight import AsyncSingleFlight
+from services.text_normalization import normalize_question
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+AsyncBackend = Callable[[str], Awaitable[Optional[str]]]
+
+
+class AsyncSearchService(SearchService):
+    def __init__(self, *args, connection_limit: Optional[int] = None,
+                 per_host_limit: Optional[int] = None,
+                 dns_cache_ttl: Optional[int] = None, **kwargs):
+        """Initialize the asyncio search service.
+
+        Lookups run as coroutines on a pooled aiohttp client with keep-alive,
+        per-host connection limits and DNS caching. Answer extraction, the
+        answer cache and backend statistics are shared with SearchService.
+        The synchronous resolve, and the inherited search_for_answer built
+        on it, run the coroutine on a background event loop so existing
+        callers keep working.
+
+        Args:
+            connection_limit (int): Maximum open connections in total
+            per_host_limit (int): Maximum open connections per host
+            dns_cache_ttl (int): Seconds resolved addresses are cached
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async search backend")
+        super().__init__(*args, **kwargs)
+
+        self.connection_limit = connection_limit or int(os.getenv('SEARCH_HTTP_CONNECTIONS', '200'))
+        self.per_host_limit = per_host_limit or int(os.getenv('SEARCH_HTTP_PER_HOST', '20'))
+        self.dns_cache_ttl = dns_cache_ttl or int(os.getenv('SEARCH_DNS_CACHE_TTL', '300'))
+
+        # Coalescing happens on the event loop, where every lookup runs
+        self.inflight = AsyncSingleFlight()
+        self._http = None
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+    def resolve(self, question: str, on_event: Optional[EventCallback] = None,
+                speculative: Optional[threading.Event] = None) -> SearchResult:
+        """Answer a question, blocking until the coroutine finishes.
+
+        Must not be called from the service's own event loop thread; use
+        resolve_async there instead.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.resolve_async(question, on_event, speculative), self._get_loop()
+        )
+        return future.result()
+
+    async def search_for_answer_async(self, question: str,
+                                      on_event: Optional[EventCallback] = None) -> Optional[str]:
+        """Search for an answer to the given question."""
+        return (await self.resolve_async(question, on_event)).answer
+
+    async def resolve_async(self, question: str, on_event: Optional[EventCallback] = None,
+                            speculative: Optional[threading.Event] = None) -> SearchResult:
+        """Answer a question and report which source answered it.
+
+        Emits the same events as SearchService.resolve, from the event loop
+        thread, and treats speculative searches the same way. The local
+        lookups (solvers, knowledge base, SQLite cache and similar-question
+        match), caching the outcome and parsing responses run on worker
+        threads, so they never hold up the other lookups on the loop.
+        """
+        start = time.perf_counter()
+        self.last_request = time.monotonic()
+        emit = self._event_emitter(on_event, start)
+        try:
+            result = await asyncio.to_thread(self._local_answer, question)
+            if result is not None:
+                emit('hit', source=result.source, answer=result.answer)
+            elif speculative is not None:
+                result = await self._search_backends_async(question, emit, speculative)
+            elif not self.coalesce:
+                result = await self._search_backends_async(question, emit)
+            else:
+                result, shared = await self.inflight.do(
+                    normalize_question(question), lambda: self._search_backends_async(question, emit)
+                )
+                if shared:
+                    result = replace(result, question=question)
+                    metrics.observe('search.coalesced_wait', time.perf_counter() - start)
+                    emit('coalesced', source=result.source, answer=result.answer)
+
+        except Exception as e:
+            logger.error(f"Unexpected error during search: {e}")
+            result = SearchResult(question, None)
+        result.latency = time.perf_counter() - start
+        metrics.observe('search.resolve', result.latency)
+        if speculative is None:
+            self._track_request(question, result)
+        self._emit_answer(emit, result)
+        return result
+
+    def refresh(self, question: str) -> Optional[SearchResult]:
+        """Search the backends again on the event loop; see SearchService.refresh."""
+        if self._answers_locally(question):
+            return None
+        future = asyncio.run_coroutine_threadsafe(self._refresh_async(question), self._get_loop())
+        return future.result()
+
+    async def _refresh_async(self, question: str) -> SearchResult:
+        emit = self._event_emitter(None, time.perf_counter())
+        result, _ = await self.inflight.do(
+            normalize_question(question), lambda: self._search_backends_async(question, emit)
+        )
+        return result
+
+    async def _search_backends_async(self, question: str, emit: Callable[..., None],
+                                     speculative: Optional[threading.Event] = None) -> SearchResult:
+        """Search the backends with the configured mode and cache the outcome unless speculative."""
+        if self.search_mode == 'sequential':
+            source, answer = await self._search_sequential_async(question, emit, speculative)
+        else:
+            delay = 0.0 if self.search_mode == 'race' else self.hedge_delay
+            source, answer = await self._search_concurrent_async(question, delay, emit, speculative)
+        return await asyncio.to_thread(self._finish_search, question, source, answer, speculative is None)
+
+    async def _parse_async(self, name: str, parse: Callable[..., Optional[str]], *args) -> Optional[str]:
+        """Run a response parser on a worker thread, timed as the backend's search.parse stage."""
+        def run():
+            with metrics.span('search.parse', name):
+                return parse(*args)
+
+        return await asyncio.to_thread(run)
+
+    async def _serp_api_search_async(self, question: str) -> Optional[str]:
+        """Search using Search API; errors propagate to _run_backend_async."""
+        url, headers, params = self._serp_api_request(question)
+        http = await self._get_http()
+        timeout = aiohttp.ClientTimeout(total=30)
+        with metrics.span('search.network', 'serp_api'):
+            async with http.get(url, headers=headers, params=params, timeout=timeout) as response:
+                body = await self._read_body_async('serp_api', response, limit=False)
+                if response.status != 200:
+                    raise BackendError(f"Search API error: {response.status}")
+        return await self._parse_async(
+            'serp_api', lambda: self._parse_serp_api_response(json.loads(body), question)
+        )
+
+    async def _google_search_async(self, question: str) -> Optional[str]:
+        """Perform Google search; errors propagate to _run_backend_async."""
+        url = self._google_request(question)
+        http = await self._get_http()
+        with metrics.span('search.network', 'google'):
+            async with http.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                check_google_captcha(response.url)
+                html = await self._read_body_async(
+                    'google', response, self.google_parser.answer_region(GOOGLE_FEATURED_SELECTORS)
+                )
+        return await self._parse_async('google', self._parse_google_html, html, question)
+
+    async def _duckduckgo_search_async(self, question: str) -> Optional[str]:
+        """Perform DuckDuckGo search as fallback; errors propagate to _run_backend_async."""
+        url = self._duckduckgo_request(question)
+        http = await self._get_http()
+        with metrics.span('search.network', 'duckduckgo'):
+            async with http.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                html = await self._read_body_async(
+                    'duckduckgo', response, self.duckduckgo_parser.answer_region(DUCKDUCKGO_ANSWER_SELECTORS)
+                )
+        return await self._parse_async('duckduckgo', self._parse_duckduckgo_html, html, question)
+
+    async def _read_body_async(self, name: str, response: "aiohttp.ClientResponse",
+                               region: Optional[AnswerRegion] = None, limit: bool = True) -> str:
+        """Read a response body and record the bytes it took; see SearchService._read_body."""
+        if not self.stop_at_answer:
+            region = None
+        max_body_bytes = self.max_body_bytes if limit else 0
+        decoder = None
+        chunks = []
+        size = 0
+        try:
+            decoder = self._content_decoder(response.headers.get('Content-Encoding'))
+            async for chunk in response.content.iter_chunked(16384):
+                chunk = decoder.decode(chunk)
+                chunks.append(chunk)
+                size += len(chunk)
+                if 0 < max_body_bytes <= size:
+                    break
+                if region is not None and region.feed(chunk):
+                    break
+            else:
+                chunks.append(decoder.flush())
+        finally:
+            if decoder is not None:
+                self.backend_stats.record_bytes(name, decoder.wire_bytes)
+            if not response.content.at_eof():
+                # The rest of the body is not wanted, so the connection cannot be reused
+                response.close()
+        body = b''.join(chunks)
+        if region is not None and region.end is not None:
+            body = body[:region.end]
+        if max_body_bytes > 0:
+            body = body[:max_body_bytes]
+        text = body.decode(response.charset or 'utf-8', errors='replace')
+        self._log_response(name, response.status, response.headers, text)
+        return text
+
+    def _async_backends(self) -> List[Tuple[str, AsyncBackend]]:
+        """Return the async search backends in priority order."""
+        backends = []
+        if self.api_key:
+            backends.append(('serp_api', self._serp_api_search_async))
+        backends.append(('google', self._google_search_async))
+        backends.append(('duckduckgo', self._duckduckgo_search_async))
+        return backends
+
+    async def _run_backend_async(self, name: str, backend: AsyncBackend, question: str,
+                                 emit: Callable[..., None], wait: float = 0.0) -> Optional[str]:
+        """Await a backend admitted by _admit_backend and record its latency and health."""
+        if wait > 0:
+            metrics.observe('search.throttle_wait', wait, name)
+            await asyncio.sleep(wait)
+        emit('trying', backend=name)
+        start = time.perf_counter()
+        answer = None
+        error = None
+        try:
+            answer = await backend(question)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.error(f"Error during {name} search: {error}")
+        latency = time.perf_counter() - start
+        self.backend_stats.record_call(name, latency, bool(answer))
+        self.health.record(name, latency, ERROR if error else ANSWERED if answer else EMPTY, error)
+        if answer:
+            emit('candidate', backend=name, answer=answer)
+        else:
+            emit('no_answer', backend=name, error=error)
+        return answer
+
+    async def _search_sequential_async(self, question: str, emit: Callable[..., None],
+                                       speculative: Optional[threading.Event] = None
+                                       ) -> Tuple[Optional[str], Optional[str]]:
+        """Try each healthy backend, best ranked first, until one answers; see SearchService._search_sequential."""
+        backends = self.health.order(self._async_backends())
+        tried = 0
+        answers = []
+        for index, (name, backend) in enumerate(backends):
+            if speculative is not None and speculative.is_set():
+                break
+            wait = self._admit_backend(name, emit, last=index == len(backends) - 1)
+            if wait is None:
+                continue
+            if tried > 0:
+                logger.info(f"Falling back to {name} search")
+            tried += 1
+            answer = await self._run_backend_async(name, backend, question, emit, wait)
+            if answer:
+                answers.append((name, answer))
+                if self._confident(answer):
+                    break
+        return self._pick_answer(question, answers)
+
+    async def _search_concurrent_async(self, question: str, hedge_delay: float, emit: Callable[..., None],
+                                       speculative: Optional[threading.Event] = None
+                                       ) -> Tuple[Optional[str], Optional[str]]:
+        """Run backends concurrently and return the first (backend name, answer).
+
+        Same policy as SearchService._search_concurrent, except that losing
+        backends are cancelled outright rather than left to finish.
+        """
+        backends = self.health.order(self._async_backends())
+        loop = asyncio.get_running_loop()
+        running = {}
+        results = {}
+        launched = 0
+        next_launch = loop.time()
+
+        def launch():
+            nonlocal launched, next_launch
+            name, backend = backends[launched]
+            launched += 1
+            wait = self._admit_backend(name, emit, last=launched == len(backends))
+            if wait is None:
+                return
+            task = asyncio.ensure_future(self._run_backend_async(name, backend, question, emit, wait))
+            running[task] = launched - 1
+            next_launch = loop.time() + hedge_delay
+
+        try:
+            while True:
+                if speculative is not None and speculative.is_set():
+                    launched = len(backends)
+                while launched < len(backends) and (not running or loop.time() >= next_launch):
+                    launch()
+                if not running:
+                    return self._pick_answer(question, self._answered(backends, results))
+
+                timeout = None
+                if launched < len(backends):
+                    timeout = max(0.0, next_launch - loop.time())
+                done, _ = await asyncio.wait(list(running), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    index = running.pop(task)
+                    try:
+                        results[index] = task.result()
+                    except Exception as e:
+                        logger.error(f"Error in {backends[index][0]} search: {e}")
+                        results[index] = None
+
+                answered = self._answered(backends, results)
+                if answered and any(self._confident(answer) for _, answer in answered):
+                    return self._pick_answer(question, answered)
+        finally:
+            for task, index in running.items():
+                task.cancel()
+                self.backend_stats.record_cancel(backends[index][0])
+                # A cancelled half-open probe did not test the backend
+                self.health.release(backends[index][0])
+
+    async def _get_http(self) -> "aiohttp.ClientSession":
+        """Return the pooled HTTP client, creating it on the running loop."""
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=30
+            )
+            # Bodies are decompressed by _read_body_async, which counts the compressed bytes
+            self._http = aiohttp.ClientSession(connector=connector, headers=self.headers, auto_decompress=False)
+        return self._http
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background event loop used by the sync wrapper."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='async-search-loop',
+                    daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+
+    def close(self):
+        """Close the HTTP client and stop the background event loop."""
+        super().close()
+        with self._loop_lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._loop_thread is not None:
+            self._loop_thread.join(timeout=5)
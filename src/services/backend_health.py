@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from collections import deque
+from loguru import logger
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes of a backend call
+ANSWERED = 'answered'
+EMPTY = 'empty'
+ERROR = 'error'
+
+T = TypeVar('T')
+
+
+class BackendError(Exception):
+    """Raised by a search backend that could not be queried (as opposed to finding no answer)."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown: float, max_cooldown: float):
+        """Initialize a circuit breaker for one backend.
+
+        The breaker opens after failure_threshold consecutive failures. Once
+        the cooldown has passed it lets a single probe call through
+        (half-open); a successful probe closes it, a failed one opens it
+        again with the cooldown doubled, up to max_cooldown.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            cooldown (float): Seconds the breaker stays open the first time
+            max_cooldown (float): Upper bound for the backed-off cooldown
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.probing = False
+
+    def allow(self, now: float) -> bool:
+        """Return True if a call may go ahead, claiming the probe when half-open."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record(self, success: bool, now: float) -> Optional[str]:
+        """Record a finished call; return the new state if it changed."""
+        previous = self.state
+        if previous == HALF_OPEN:
+            self.probing = False
+        if success:
+            self.failures = 0
+            if previous != CLOSED:
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+        else:
+            self.failures += 1
+            if previous == HALF_OPEN:
+                # The backend is still broken, so wait longer before the next probe
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._open(now)
+            elif previous == CLOSED and self.failures >= self.failure_threshold:
+                self._open(now)
+        return self.state if self.state != previous else None
+
+    def release(self):
+        """Give back a probe that was claimed but never made."""
+        self.probing = False
+
+    def probe_due(self, now: float) -> bool:
+        """True if the breaker would let a probe through now."""
+        if self.state == OPEN:
+            return now - self.opened_at >= self.cooldown
+        return self.state == HALF_OPEN and not self.probing
+
+    def retry_in(self, now: float) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - now)
+
+    def _open(self, now: float):
+        """Open the breaker, starting the cooldown."""
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+
+
+class BackendHealth:
+    def __init__(self, failure_threshold: Optional[int] = None, cooldown: Optional[float] = None,
+                 max_cooldown: Optional[float] = None, window: Optional[int] = None,
+                 reorder: Optional[bool] = None, min_samples: int = 10, alpha: float = 0.2):
+        """Initialize health tracking for the search backends.
+
+        Tracks each backend's success rate, useful-answer rate and latency,
+        guards it with a CircuitBreaker, and ranks the fallback chain by the
+        expected time to a useful answer (latency divided by answer rate).
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a breaker,
+                defaults to BACKEND_FAILURE_THRESHOLD or 3
+            cooldown (float): Seconds a breaker first stays open, defaults to
+                BACKEND_COOLDOWN or 30
+            max_cooldown (float): Longest backed-off cooldown, defaults to
+                BACKEND_MAX_COOLDOWN or 600
+            window (int): Recent calls the rates are computed over, defaults
+                to BACKEND_HEALTH_WINDOW or 50
+            reorder (bool): Rank backends by observed performance instead of
+                the fixed priority, defaults to BACKEND_REORDER or True
+            min_samples (int): Calls needed before a backend is re-ranked
+            alpha (float): Weight of the newest call in the latency average
+        """
+        self.failure_threshold = failure_threshold or int(os.getenv('BACKEND_FAILURE_THRESHOLD', '3'))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv('BACKEND_COOLDOWN', '30'))
+        self.max_cooldown = max_cooldown if max_cooldown is not None else float(os.getenv('BACKEND_MAX_COOLDOWN', '600'))
+        self.window = window or int(os.getenv('BACKEND_HEALTH_WINDOW', '50'))
+        if reorder is None:
+            reorder = os.getenv('BACKEND_REORDER', 'true').lower() not in ('0', 'false', 'no', 'off')
+        self.reorder = reorder
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._backends: Dict[str, dict] = {}
+
+    def _entry(self, name: str) -> dict:
+        """Return the state for a backend, creating it on first use. Caller holds the lock."""
+        entry = self._backends.get(name)
+        if entry is None:
+            entry = {
+                "breaker": CircuitBreaker(self.failure_threshold, self.cooldown, self.max_cooldown),
+                "outcomes": deque(maxlen=self.window),
+                "latency": None,
+                "last_error": None
+            }
+            self._backends[name] = entry
+        return entry
+
+    def allow(self, name: str) -> bool:
+        """Return True if the backend may be called now.
+
+        A True answer for a half-open backend claims its single probe, which
+        the caller must settle with record() or release().
+        """
+        with self._lock:
+            return self._entry(name)["breaker"].allow(time.monotonic())
+
+    def record(self, name: str, latency: float, outcome: str, error: Optional[str] = None):
+        """Record a finished backend call.
+
+        Args:
+            name (str): Backend name
+            latency (float): Seconds the call took
+            outcome (str): ANSWERED, EMPTY (responded without an answer) or ERROR
+            error (str): Description of the failure for ERROR outcomes
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["outcomes"].append(outcome)
+            previous = entry["latency"]
+            entry["latency"] = latency if previous is None else previous + self.alpha * (latency - previous)
+            if outcome == ERROR:
+                entry["last_error"] = error
+            breaker = entry["breaker"]
+            changed = breaker.record(outcome != ERROR, time.monotonic())
+            if changed == CLOSED:
+                # Rank the recovered backend afresh rather than by its failures
+                entry["outcomes"].clear()
+                entry["latency"] = None
+        if changed == OPEN:
+            logger.warning(f"Circuit for {name} opened after {breaker.failures} failure(s), "
+                           f"retrying in {breaker.cooldown:.0f}s: {error}")
+        elif changed == CLOSED:
+            logger.info(f"Circuit for {name} closed, backend recovered")
+
+    def release(self, name: str):
+        """Give back a half-open probe whose call was cancelled before it ran."""
+        with self._lock:
+            self._entry(name)["breaker"].release()
+
+    def order(self, backends: Sequence[Tuple[str, T]]) -> List[Tuple[str, T]]:
+        """Rank (name, backend) pairs for the fallback chain.
+
+        Backends with at least min_samples recent calls are sorted by
+        expected seconds to a useful answer and share the positions they
+        already held; the rest keep their configured place. A backend due
+        for a half-open probe also keeps its place, so a recovered backend
+        is noticed even when a lower-ranked one keeps answering.
+        """
+        backends = list(backends)
+        if not self.reorder:
+            return backends
+        now = time.monotonic()
+        with self._lock:
+            scores = {
+                name: None if self._entry(name)["breaker"].probe_due(now) else self._score(name)
+                for name, _ in backends
+            }
+        positions = [index for index, (name, _) in enumerate(backends) if scores[name] is not None]
+        ranked = sorted((backends[index] for index in positions), key=lambda item: scores[item[0]])
+        for index, item in zip(positions, ranked):
+            backends[index] = item
+        return backends
+
+    def degraded(self) -> bool:
+        """True if any backend is failing, so a missing answer may not be genuine."""
+        with self._lock:
+            for entry in self._backends.values():
+                if entry["breaker"].state != CLOSED:
+                    return True
+                if entry["outcomes"] and entry["outcomes"][-1] == ERROR:
+                    return True
+            return False
+
+    def snapshot(self, names: Optional[Sequence[str]] = None) -> Dict[str, dict]:
+        """Return each backend's breaker state, rates and ranking score."""
+        now = time.monotonic()
+        with self._lock:
+            result = {}
+            for name in names or list(self._backends):
+                entry = self._entry(name)
+                breaker = entry["breaker"]
+                outcomes = entry["outcomes"]
+                calls = len(outcomes)
+                score = self._score(name)
+                result[name] = {
+                    "state": breaker.state,
+                    "consecutive_failures": breaker.failures,
+                    "times_opened": breaker.times_opened,
+                    "cooldown": breaker.cooldown,
+                    "retry_in": round(breaker.retry_in(now), 3),
+                    "recent_calls": calls,
+                    "success_rate": sum(1 for o in outcomes if o != ERROR) / calls if calls else None,
+                    "useful_rate": sum(1 for o in outcomes if o == ANSWERED) / calls if calls else None,
+                    "latency_ewma": entry["latency"],
+                    "score": round(score, 4) if score is not None else None,
+                    "last_error": entry["last_error"]
+                }
+            return result
+
+    def _score(self, name: str) -> Optional[float]:
+        """Expected seconds to a useful answer, or None without enough data. Caller holds the lock."""
+        entry = self._entry(name)
+        outcomes = entry["outcomes"]
+        if len(outcomes) < self.min_samples:
+            return None
+        useful = sum(1 for outcome in outcomes if outcome == ANSWERED) / len(outcomes)
+        # A backend that never answers still ranks below the others rather than dividing by zero
+        return entry["latency"] / max(useful, 0.05)
@@ -0,0 +1,120 @@
+import threading
+from collections import deque
+from typing import Dict
+
+
+class BackendStats:
+    def __init__(self, window: int = 500):
+        """Initialize per-backend latency and win-rate counters.
+
+        Args:
+            window (int): Number of recent latencies kept per backend for percentiles
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._backends: Dict[str, dict] = {}
+        self._first_answers = deque(maxlen=window)
+        self._first_answer_count = 0
+
+    def _entry(self, name: str) -> dict:
+        """Return the counters for a backend, creating them on first use."""
+        entry = self._backends.get(name)
+        if entry is None:
+            entry = {
+                "calls": 0,
+                "answered": 0,
+                "wins": 0,
+                "cancelled": 0,
+                "responses": 0,
+                "bytes": 0,
+                "total_latency": 0.0,
+                "latencies": deque(maxlen=self.window)
+            }
+            self._backends[name] = entry
+        return entry
+
+    def record_call(self, name: str, latency: float, answered: bool):
+        """Record a finished backend call.
+
+        Args:
+            name (str): Backend name
+            latency (float): Wall-clock seconds the call took
+            answered (bool): Whether the backend produced an answer
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["total_latency"] += latency
+            entry["latencies"].append(latency)
+            if answered:
+                entry["answered"] += 1
+
+    def record_bytes(self, name: str, count: int):
+        """Record the bytes a backend response took on the network.
+
+        Args:
+            name (str): Backend name
+            count (int): Bytes read, before decompression
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["responses"] += 1
+            entry["bytes"] += count
+
+    def record_win(self, name: str):
+        """Record that a backend's answer was the one returned."""
+        with self._lock:
+            self._entry(name)["wins"] += 1
+
+    def record_cancel(self, name: str):
+        """Record that a backend call was cancelled before it finished."""
+        with self._lock:
+            self._entry(name)["cancelled"] += 1
+
+    def record_first_answer(self, latency: float):
+        """Record the seconds from receiving a question to its first usable answer."""
+        with self._lock:
+            self._first_answer_count += 1
+            self._first_answers.append(latency)
+
+    def first_answer_snapshot(self) -> dict:
+        """Return time-to-first-answer percentiles over the recent window."""
+        with self._lock:
+            latencies = sorted(self._first_answers)
+            return {
+                "count": self._first_answer_count,
+                "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95)
+            }
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return a copy of the counters with derived rates and percentiles."""
+        with self._lock:
+            total_wins = sum(entry["wins"] for entry in self._backends.values())
+            result = {}
+            for name, entry in self._backends.items():
+                latencies = sorted(entry["latencies"])
+                calls = entry["calls"]
+                result[name] = {
+                    "calls": calls,
+                    "answered": entry["answered"],
+                    "wins": entry["wins"],
+                    "cancelled": entry["cancelled"],
+                    "bytes": entry["bytes"],
+                    "avg_bytes": entry["bytes"] / entry["responses"] if entry["responses"] else 0.0,
+                    "answer_rate": entry["answered"] / calls if calls else 0.0,
+                    "win_rate": entry["wins"] / total_wins if total_wins else 0.0,
+                    "avg_latency": entry["total_latency"] / calls if calls else 0.0,
+                    "p50_latency": _percentile(latencies, 0.50),
+                    "p95_latency": _percentile(latencies, 0.95)
+                }
+            return result
+
+
+def _percentile(ordered, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from services.search_service import SearchService
+from services.text_normalization import normalize_question
+
+
+def parse_questions(text: str, fmt: Optional[str] = None) -> List[str]:
+    """Parse questions from JSONL, CSV or plain text (one per line).
+
+    Args:
+        text (str): The raw question list
+        fmt (str): 'jsonl', 'csv' or 'text'; guessed from the content when omitted
+
+    Returns:
+        list: Non-empty questions in input order
+    """
+    stripped = text.lstrip()
+    if fmt is None:
+        if stripped.startswith('{'):
+            fmt = 'jsonl'
+        elif stripped.lower().startswith('question,') or stripped.lower().startswith('"question"'):
+            fmt = 'csv'
+        else:
+            fmt = 'text'
+
+    questions = []
+    if fmt == 'jsonl':
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                questions.append(json.loads(line).get('question', ''))
+    elif fmt == 'csv':
+        for row in csv.DictReader(io.StringIO(text)):
+            questions.append(row.get('question') or '')
+    else:
+        questions = [line for line in text.splitlines() if not line.strip().startswith('#')]
+    return [question.strip() for question in questions if question and question.strip()]
+
+
+def read_questions(path: str, fmt: Optional[str] = None) -> List[str]:
+    """Read questions from a JSONL, CSV or text file."""
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = {'.jsonl': 'jsonl', '.csv': 'csv', '.txt': 'text'}.get(extension)
+    with open(path, encoding='utf-8') as f:
+        return parse_questions(f.read(), fmt)
+
+
+class BatchRunner:
+    def __init__(self, search_service: SearchService, concurrency: Optional[int] = None):
+        """Initialize a batch runner.
+
+        Args:
+            search_service (SearchService): Service used to answer questions
+            concurrency (int): Questions resolved in parallel
+        """
+        self.search_service = search_service
+        self.concurrency = concurrency or int(os.getenv('BATCH_CONCURRENCY', '8'))
+        self.summary: Dict = {}
+
+    def run(self, questions: Iterable[str]) -> Iterator[dict]:
+        """Answer questions concurrently, yielding results as they complete.
+
+        Questions that normalize to the same text are resolved once; the
+        result reports how many duplicates it covered. Once the generator
+        is exhausted or closed, self.summary holds throughput, per-source
+        hit counts, failures, questions skipped because the consumer
+        stopped early, and the backend calls made while the batch ran
+        (including those of any other requests served meanwhile).
+
+        Yields:
+            dict: question, answer, success, source, latency and duplicates
+        """
+        by_key: Dict[str, str] = {}
+        counts: Counter = Counter()
+        total = 0
+        for question in questions:
+            key = normalize_question(question)
+            if not key:
+                continue
+            total += 1
+            counts[key] += 1
+            by_key.setdefault(key, question)
+
+        sources: Counter = Counter()
+        failures = 0
+        errors = 0
+        # Backend counters are process-wide, so the batch reports the change over its run
+        backends_before = self.search_service.get_backend_stats()["backends"]
+        start = time.perf_counter()
+        stop = threading.Event()
+
+        def resolve(question):
+            # Skip work that is still queued when the consumer goes away
+            if stop.is_set():
+                return None
+            return self.search_service.resolve(question)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix='batch')
+        try:
+            futures = {executor.submit(resolve, question): key for key, question in by_key.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                question = by_key[key]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error answering batch question '{question}': {e}")
+                    errors += 1
+                    result = None
+
+                if result is not None and result.answer:
+                    sources[result.source] += 1
+                else:
+                    failures += 1
+                yield {
+                    "question": question,
+                    "answer": result.answer if result is not None else None,
+                    "success": bool(result is not None and result.answer),
+                    "source": result.source if result is not None else None,
+                    "latency": round(result.latency, 4) if result is not None else None,
+                    "duplicates": counts[key] - 1
+                }
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            elapsed = time.perf_counter() - start
+            unique = len(by_key)
+            answered = sum(sources.values())
+            completed = answered + failures
+            backends = {}
+            for name, stats in self.search_service.get_backend_stats()["backends"].items():
+                before = backends_before.get(name, {})
+                calls = stats["calls"] - before.get("calls", 0)
+                if calls:
+                    backends[name] = {"calls": calls, "answered": stats["answered"] - before.get("answered", 0)}
+            self.summary = {
+                "questions": total,
+                "unique": unique,
+                "answered": answered,
+                "failed": failures,
+                "skipped": unique - completed,
+                "errors": errors,
+                "elapsed": round(elapsed, 3),
+                "throughput": round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+                "sources": dict(sources),
+                "backends": backends
+            }
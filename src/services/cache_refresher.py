@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from loguru import logger
+from typing import Dict, Optional
+
+from services.question_popularity import QuestionPopularity
+from services.rate_limiter import SharedTokenBucket, TokenBucket
+
+
+class CacheRefresher:
+    def __init__(self, service, popularity: QuestionPopularity, budget: Optional[float] = None,
+                 interval: Optional[float] = None, refresh_ahead: Optional[float] = None,
+                 idle: Optional[float] = None, min_count: Optional[int] = None):
+        """Initialize the background answer refresher.
+
+        Keeps the answers to the most popular questions in the answer cache.
+        The first pass prefetches the popular questions saved by the previous
+        run; later passes, whenever no question has arrived for idle seconds,
+        search again for popular answers that are missing or due to expire
+        within refresh_ahead seconds. Searches are paid from a budget, so
+        refreshing never makes more than budget searches an hour. With
+        RATE_LIMIT_STATE_PATH set, as serve.py does, the budget is shared
+        by every worker process instead of granted to each.
+
+        Args:
+            service (SearchService): Searches and caches the answers
+            popularity (QuestionPopularity): Says which questions are popular
+            budget (float): Searches per hour, defaults to CACHE_REFRESH_BUDGET or 0
+            interval (float): Seconds between passes, defaults to
+                CACHE_REFRESH_INTERVAL or 30
+            refresh_ahead (float): Seconds before expiry an answer is due,
+                defaults to CACHE_REFRESH_AHEAD or a tenth of the cache TTL
+            idle (float): Seconds without questions before a pass may search,
+                defaults to CACHE_REFRESH_IDLE or 2
+            min_count (int): Times a question must have been asked to be
+                refreshed, defaults to CACHE_REFRESH_MIN_COUNT or 2
+        """
+        self.service = service
+        self.popularity = popularity
+        self.budget = budget if budget is not None else float(os.getenv('CACHE_REFRESH_BUDGET', '0'))
+        self.interval = interval if interval is not None else float(os.getenv('CACHE_REFRESH_INTERVAL', '30'))
+        if refresh_ahead is None:
+            refresh_ahead = float(os.getenv('CACHE_REFRESH_AHEAD', str(service.cache.ttl / 10)))
+        self.refresh_ahead = refresh_ahead
+        self.idle = idle if idle is not None else float(os.getenv('CACHE_REFRESH_IDLE', '2'))
+        self.min_count = min_count if min_count is not None else int(os.getenv('CACHE_REFRESH_MIN_COUNT', '2'))
+        # Up to five minutes of budget can be spent at once, e.g. on the startup prefetch
+        rate, burst = self.budget / 3600, max(1.0, self.budget / 12)
+        shared_path = os.getenv('RATE_LIMIT_STATE_PATH')
+        if shared_path:
+            self._bucket = SharedTokenBucket(shared_path, 'cache_refresh', rate, burst)
+        else:
+            self._bucket = TokenBucket(rate, burst)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # Questions whose cached answer was last written by a refresh, and when
+        self._fetched: Dict[str, float] = {}
+        # Popular questions a local solver or the knowledge base answers
+        self._local: Dict[str, bool] = {}
+        self._counters = {
+            "passes": 0,
+            "refreshes": 0,
+            "answered": 0,
+            "budget_exhausted": 0,
+            "requests": 0,
+            "prefetch_hits": 0
+        }
+
+    def start(self):
+        """Start refreshing on a background thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='cache-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Refreshing popular answers, budget {self.budget:g} searches/hour")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread, waiting for a search in progress up to timeout."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record(self, key: str, source: Optional[str]):
+        """Note how a request for a normalized question was answered."""
+        with self._lock:
+            self._counters["requests"] += 1
+            if source == 'cache' and key in self._fetched:
+                self._counters["prefetch_hits"] += 1
+            elif source != 'cache':
+                # The cached answer, if any, now comes from this request's own search
+                self._fetched.pop(key, None)
+
+    def run_pass(self) -> int:
+        """Refresh due popular answers until the budget runs out or a question arrives.
+
+        Returns:
+            int: Searches made
+        """
+        searches = 0
+        now = time.time()
+        popular = self.popularity.top()
+        for key, count in popular:
+            if count < self.min_count or self._stop.is_set() or not self._idle():
+                break
+            if self._local.get(key) or not self._due(key, now):
+                continue
+            if self._reserve() is None:
+                with self._lock:
+                    self._counters["budget_exhausted"] += 1
+                break
+            result = self.service.refresh(key)
+            if result is None:
+                self._local[key] = True
+                continue
+            searches += 1
+            with self._lock:
+                self._counters["refreshes"] += 1
+                if result.answer:
+                    self._counters["answered"] += 1
+                    self._fetched[key] = time.time()
+            if not result.answer and self.service.health.degraded():
+                # Backends are failing; try again next pass rather than spend the budget now
+                break
+
+        # Forget questions that have dropped out of the popular list
+        keep = {key for key, _ in popular}
+        with self._lock:
+            self._fetched = {key: at for key, at in self._fetched.items() if key in keep}
+            self._local = {key: local for key, local in self._local.items() if key in keep}
+            self._counters["passes"] += 1
+        self.popularity.save()
+        return searches
+
+    def stats(self) -> dict:
+        """Return refresh counters and the share of requests answered by a refreshed entry."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["refreshed_entries"] = len(self._fetched)
+        stats["prefetch_hit_rate"] = stats["prefetch_hits"] / stats["requests"] if stats["requests"] else 0.0
+        stats["budget_per_hour"] = self.budget
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pass()
+            except Exception as e:
+                logger.error(f"Cache refresh pass failed: {e}")
+            self._stop.wait(self.interval)
+
+    def _reserve(self) -> Optional[float]:
+        """Take a search from the budget, or return None if it is spent."""
+        try:
+            return self._bucket.reserve(max_wait=0)
+        except Exception as e:
+            # Unlike a search, a refresh can wait for the shared store to recover
+            logger.error(f"Error reserving cache refresh budget: {e}")
+            return None
+
+    def _idle(self) -> bool:
+        """True if no question has arrived for the last idle seconds."""
+        return time.monotonic() - self.service.last_request >= self.idle
+
+    def _due(self, key: str, now: float) -> bool:
+        """True if a question's answer is missing or about to expire."""
+        entry = self.service.cache.peek(key)
+        if entry is None:
+            return True
+        answer, expires_at = entry
+        # A cached "no answer" is left to expire on its own
+        return answer is not None and expires_at - now < self.refresh_ahead
+
+
+def create_cache_refresher(service, popularity: QuestionPopularity) -> Optional[CacheRefresher]:
+    """Create the refresher, or None when CACHE_REFRESH_BUDGET is 0 or nothing is tracked."""
+    refresher = CacheRefresher(service, popularity)
+    if refresher.budget <= 0 or popularity.top_k <= 0:
+        return None
+    cache = service.cache.stats()
+    if cache["max_entries"] <= 0 and not cache["persistent"]:
+        logger.warning("CACHE_REFRESH_BUDGET is set but the answer cache is off, not refreshing")
+        return None
+    return refresher
@@ -0,0 +1,96 @@
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+def accept_encoding() -> str:
+    """Return the Accept-Encoding header for backend requests.
+
+    Brotli is only offered when a decoder is installed. SEARCH_COMPRESSION
+    set to false asks for uncompressed responses.
+    """
+    if os.getenv('SEARCH_COMPRESSION', 'true').lower() in ('0', 'false', 'no', 'off'):
+        return 'identity'
+    return 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+
+class _Deflate:
+    """Deflate decoder accepting zlib-wrapped and raw streams, as servers send both."""
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj()
+        self._started = False
+
+    def decompress(self, data: bytes) -> bytes:
+        if not self._started:
+            self._started = True
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decoder.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        if hasattr(self._decoder, 'process'):
+            return self._decoder.process(data)
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        return b''
+
+
+def _decoder_for(name: str):
+    if name in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if name == 'deflate':
+        return _Deflate()
+    if name == 'br' and brotli is not None:
+        return _Brotli()
+    raise ValueError(f"Unsupported content encoding: {name}")
+
+
+class ContentDecoder:
+    def __init__(self, encoding: Optional[str]):
+        """Decompress a response body chunk by chunk as it is read.
+
+        Bodies are read undecoded so the bytes that crossed the network can
+        be counted, and so reading can stop part way through a compressed
+        page.
+
+        Args:
+            encoding (str): The Content-Encoding header, None for none
+        """
+        names = [name.strip().lower() for name in (encoding or '').split(',')]
+        # Encodings are listed in the order they were applied
+        self._decoders = [_decoder_for(name) for name in reversed(names) if name and name != 'identity']
+        self.wire_bytes = 0
+
+    def decode(self, chunk: bytes) -> bytes:
+        """Return the decoded bytes of the next chunk read from the connection."""
+        self.wire_bytes += len(chunk)
+        for decoder in self._decoders:
+            chunk = decoder.decompress(chunk)
+        return chunk
+
+    def flush(self) -> bytes:
+        """Return any decoded bytes still buffered once the body has been read."""
+        data = b''
+        for decoder in self._decoders:
+            data = decoder.decompress(data) + decoder.flush() if data else decoder.flush()
+        return data
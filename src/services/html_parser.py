@@ -0,0 +1,295 @@
+import os
+import re
+from loguru import logger
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+    except ImportError:
+        SelectolaxHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - optional dependency
+    lxml = None
+
+PARSER_BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+# tag, tag.class, tag[attr="value"] and tag[attr*="value"]
+_SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[a-z0-9]+)'
+    r'(?:\.(?P<cls>[\w-]+)'
+    r'|\[(?P<attr>[\w-]+)(?:(?P<op>\*?=)"(?P<value>[^"]*)")?\])?$'
+)
+
+# Bytes of raw HTML an answer element and its text take up after the start tag
+ANSWER_REGION_SLACK = 16384
+# Start tags are matched again across chunk boundaries up to this length
+_MARKER_OVERLAP = 512
+
+
+class SelectorSet:
+    def __init__(self, selectors: Sequence[str]):
+        """Compile simple CSS selectors for matching in a single traversal.
+
+        Only the forms used by the result page parsers are supported:
+        ``tag``, ``tag.class``, ``tag[attr]``, ``tag[attr="v"]`` and
+        ``tag[attr*="v"]``.
+
+        Args:
+            selectors (list): Selectors in priority order, highest first
+        """
+        self.selectors = list(selectors)
+        self._by_tag: Dict[str, List[Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]]] = {}
+        for priority, selector in enumerate(self.selectors):
+            match = _SIMPLE_SELECTOR.match(selector)
+            if not match:
+                raise ValueError(f"Unsupported selector: {selector}")
+            self._by_tag.setdefault(match.group('tag'), []).append((
+                priority,
+                match.group('cls'),
+                match.group('attr'),
+                match.group('op'),
+                match.group('value')
+            ))
+
+    def match(self, tag: str, attrs) -> Optional[int]:
+        """Return the priority of the best selector matching an element.
+
+        Args:
+            tag (str): Lowercase tag name
+            attrs (dict): Element attributes; class may be a string or a list
+
+        Returns:
+            int: Selector index, or None if nothing matches
+        """
+        candidates = self._by_tag.get(tag)
+        if not candidates:
+            return None
+        for priority, cls, attr, op, value in candidates:
+            if cls is not None:
+                classes = attrs.get('class')
+                if not classes:
+                    continue
+                if isinstance(classes, str):
+                    classes = classes.split()
+                if cls in classes:
+                    return priority
+                continue
+            if attr is not None:
+                actual = attrs.get(attr)
+                if actual is None:
+                    continue
+                if isinstance(actual, list):
+                    actual = ' '.join(actual)
+                if op is None or (op == '=' and actual == value) or (op == '*=' and value in actual):
+                    return priority
+                continue
+            return priority
+        return None
+
+    def marker_pattern(self, count: int) -> "re.Pattern":
+        """Compile a bytes pattern for start tags of the first count selectors.
+
+        The pattern matches the attribute a selector tests, as it appears in
+        the raw page, so the answer region can be found before the page is
+        parsed. It may match elements of another tag, which only means the
+        region is taken to start a little early.
+
+        Args:
+            count (int): Number of top-priority selectors to cover
+
+        Returns:
+            re.Pattern: Alternation of the selectors' markers
+        """
+        markers = []
+        for selector in self.selectors[:count]:
+            match = _SIMPLE_SELECTOR.match(selector)
+            tag, cls, attr, op, value = match.group('tag', 'cls', 'attr', 'op', 'value')
+            if cls is not None:
+                marker = rb'class=["\']?[^"\'>]*?(?<![\w-])' + re.escape(cls.encode()) + rb'(?![\w-])'
+            elif attr is not None and op == '=':
+                marker = re.escape(attr.encode()) + rb'=["\']?' + re.escape(value.encode()) + rb'["\'\s>]'
+            elif attr is not None and op == '*=':
+                marker = re.escape(attr.encode()) + rb'=["\']?[^"\'>]*?' + re.escape(value.encode())
+            elif attr is not None:
+                marker = rb'\s' + re.escape(attr.encode()) + rb'[\s=>]'
+            else:
+                marker = rb'<' + re.escape(tag.encode()) + rb'[\s>]'
+            markers.append(b'(?:' + marker + b')')
+        return re.compile(b'|'.join(markers), re.IGNORECASE)
+
+
+class AnswerRegion:
+    def __init__(self, pattern: "re.Pattern", max_matches: int, slack: int = ANSWER_REGION_SLACK):
+        """Tell when a streamed result page has been read past its answers.
+
+        Chunks of the raw page are fed in as they arrive. Once an answer
+        element has started, the region ends where the element after the
+        last one the parser uses starts, or slack bytes after the last
+        element if no other follows, so the rest of the page can be left
+        unread and unparsed.
+
+        Args:
+            pattern (re.Pattern): From SelectorSet.marker_pattern
+            max_matches (int): Answer elements the parser uses at most
+            slack (int): Bytes allowed for an element's contents
+        """
+        self.pattern = pattern
+        self.max_matches = max_matches
+        self.slack = slack
+        self.matches = 0
+        self.size = 0
+        # Offset into the page where the region ends, once known
+        self.end: Optional[int] = None
+        self._tail = b''
+        self._last_end = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan the next chunk of the page.
+
+        Returns:
+            bool: True once the rest of the page is not needed; end then
+                holds how much of it is
+        """
+        if self.end is not None:
+            return True
+        data = self._tail + chunk
+        base = self.size - len(self._tail)
+        self.size += len(chunk)
+        for match in self.pattern.finditer(data):
+            start = base + match.start()
+            if self._last_end is not None:
+                # Markers in the carried-over tail were already counted
+                if start < self._last_end:
+                    continue
+                if start - self._last_end >= self.slack:
+                    self.end = self._last_end + self.slack
+                    return True
+            if self.matches == self.max_matches:
+                self.end = start
+                return True
+            self.matches += 1
+            self._last_end = base + match.end()
+        if self._last_end is not None and self.size - self._last_end >= self.slack:
+            self.end = self._last_end + self.slack
+            return True
+        self._tail = data[-_MARKER_OVERLAP:]
+        return False
+
+
+class ResultPageParser:
+    def __init__(self, selectors: Sequence[str], min_length: int = 1,
+                 max_matches: int = 3, backend: Optional[str] = None):
+        """Initialize a result page parser.
+
+        Args:
+            selectors (list): Answer selectors in priority order
+            min_length (int): Texts this short or shorter are not acceptable
+            max_matches (int): Maximum texts returned; traversal stops once the
+                top selector has produced this many
+            backend (str): 'selectolax', 'lxml', 'bs4' or 'auto' (fastest available)
+        """
+        self.selectors = SelectorSet(selectors)
+        self.min_length = min_length
+        self.max_matches = max_matches
+        self.backend = resolve_backend(backend or os.getenv('HTML_PARSER', 'auto'))
+        self._markers: Dict[int, "re.Pattern"] = {}
+
+    def answer_region(self, selectors: int = 1, slack: int = ANSWER_REGION_SLACK) -> AnswerRegion:
+        """Return a detector for the end of the answers of the top selectors.
+
+        Args:
+            selectors (int): Number of top-priority selectors whose elements
+                make up the answer region
+            slack (int): Bytes allowed for an element's contents
+        """
+        pattern = self._markers.get(selectors)
+        if pattern is None:
+            pattern = self._markers[selectors] = self.selectors.marker_pattern(selectors)
+        return AnswerRegion(pattern, self.max_matches, slack)
+
+    def find_texts(self, html: str) -> Tuple[Optional[int], List[str]]:
+        """Find the answer texts for the highest-priority selector that matched.
+
+        The document is traversed once; matches are bucketed by selector
+        priority and traversal stops early once the top selector has
+        produced max_matches acceptable texts.
+
+        Args:
+            html (str): The page, possibly truncated
+
+        Returns:
+            tuple: (selector index, texts in document order), or (None, [])
+        """
+        best = None
+        texts: List[str] = []
+        for tag, attrs, get_text in self._elements(html):
+            priority = self.selectors.match(tag, attrs)
+            if priority is None or (best is not None and priority > best):
+                continue
+            if priority == best and len(texts) >= self.max_matches:
+                continue
+            text = get_text().strip()
+            if len(text) <= self.min_length:
+                continue
+            if best is None or priority < best:
+                best = priority
+                texts = [text]
+            else:
+                texts.append(text)
+            if best == 0 and len(texts) >= self.max_matches:
+                break
+        return best, texts
+
+    def _elements(self, html: str) -> Iterator[Tuple[str, dict, callable]]:
+        """Yield (tag, attributes, text getter) for every element in document order."""
+        if self.backend == 'selectolax':
+            tree = SelectolaxHTMLParser(html)
+            root = tree.body or tree.root
+            if root is None:
+                return
+            for node in root.traverse(include_text=False):
+                yield node.tag, node.attributes, lambda node=node: node.text(deep=True)
+        elif self.backend == 'lxml':
+            try:
+                root = lxml.html.fromstring(html)
+            except Exception as e:
+                logger.debug(f"lxml could not parse page: {e}")
+                return
+            for element in root.iter():
+                if isinstance(element.tag, str):
+                    yield element.tag, element.attrib, element.text_content
+        else:
+            # Only the fallback backend needs BeautifulSoup, so it is imported on first use
+            from bs4 import BeautifulSoup, Tag
+            soup = BeautifulSoup(html, 'html.parser')
+            for element in soup.descendants:
+                if isinstance(element, Tag):
+                    yield element.name, element.attrs, element.get_text
+
+
+def available_backends() -> List[str]:
+    """Return the installed parser backends, fastest first."""
+    installed = {
+        'selectolax': SelectolaxHTMLParser is not None,
+        'lxml': lxml is not None,
+        'bs4': True
+    }
+    return [backend for backend in PARSER_BACKENDS if installed[backend]]
+
+
+def resolve_backend(name: str) -> str:
+    """Map a requested parser backend to one that is installed."""
+    name = (name or 'auto').lower()
+    available = available_backends()
+    if name in available:
+        return name
+    if name not in ('auto',) + PARSER_BACKENDS:
+        logger.warning(f"Unknown HTML parser '{name}', choosing automatically")
+    elif name != 'auto':
+        logger.warning(f"HTML parser '{name}' is not installed, choosing automatically")
+    return available[0]
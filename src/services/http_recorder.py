@@ -0,0 +1,274 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from loguru import logger
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Response headers that describe the original transfer rather than the body we store
+DROPPED_HEADERS = ('set-cookie', 'content-encoding', 'content-length', 'transfer-encoding', 'connection')
+# Typical of what the search backends' servers use
+GZIP_LEVEL = 6
+
+
+def fixture_key(method: str, url: str) -> str:
+    """Return the file name stem a request is recorded under.
+
+    Only the method and full URL (including the query) identify a request;
+    headers, and with them any API key, never reach the fixture files.
+    """
+    return hashlib.sha1(f"{method.upper()} {url}".encode('utf-8')).hexdigest()[:20]
+
+
+class FixtureStore:
+    def __init__(self, directory: str):
+        """Initialize a directory of recorded HTTP responses.
+
+        Each response is kept as <key>.json (URL, status, headers, latency)
+        next to <key>.body (the raw, decoded body), so recorded pages can be
+        opened and diffed directly.
+
+        Args:
+            directory (str): Directory holding the fixture files
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def save(self, method: str, url: str, response: requests.Response, latency: float):
+        """Store a response received for method and url."""
+        meta_path, body_path = self._paths(fixture_key(method, url))
+        meta = {
+            "method": method.upper(),
+            "url": url,
+            "final_url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "encoding": response.encoding,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in DROPPED_HEADERS
+            },
+            "latency": round(latency, 4),
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(body_path, 'wb') as f:
+                f.write(response.content)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+
+    def load(self, method: str, url: str) -> Optional[tuple]:
+        """Return (metadata, body) recorded for method and url, or None."""
+        meta_path, body_path = self._paths(fixture_key(method, url))
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                return meta, f.read()
+        except FileNotFoundError:
+            return None
+
+    def __len__(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.body'))
+
+
+def accepts_gzip(request: requests.PreparedRequest) -> bool:
+    """Whether a request's Accept-Encoding allows a gzip response."""
+    accepted = request.headers.get('Accept-Encoding', '')
+    return 'gzip' in [part.split(';')[0].strip().lower() for part in accepted.split(',')]
+
+
+def stream_body(response: requests.Response, body: bytes, compressed: Optional[bytes] = None):
+    """Give a response a fresh, unread stream over a stored body.
+
+    The stream is gzip-compressed when the request accepted it, the way a
+    live server would send it, so callers read it exactly as they read a
+    network response: streamed or not, decoded or counted as sent.
+
+    Args:
+        response (requests.Response): Response with its request set
+        body (bytes): The decoded body
+        compressed (bytes): body already gzip-compressed, if at hand
+    """
+    if accepts_gzip(response.request):
+        if compressed is None:
+            compressed = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        body = compressed
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.headers.pop('Content-Encoding', None)
+    response.headers['Content-Length'] = str(len(body))
+    response.headers.pop('Transfer-Encoding', None)
+    response.raw = HTTPResponse(
+        body=io.BytesIO(body),
+        headers=dict(response.headers),
+        status=response.status_code,
+        reason=response.reason,
+        preload_content=False,
+        decode_content=True
+    )
+    response._content = False
+    response._content_consumed = False
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, store: FixtureStore, **kwargs):
+        """Initialize a transport adapter that saves every response it receives.
+
+        Args:
+            store (FixtureStore): Where responses are recorded
+        """
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, stream=False, **kwargs):
+        start = time.perf_counter()
+        # Read the whole body so the fixture is complete even when the caller stops early
+        response = super().send(request, stream=False, **kwargs)
+        latency = time.perf_counter() - start
+        try:
+            self.store.save(request.method, request.url, response, latency)
+        except OSError as e:
+            logger.error(f"Error recording response for {request.url}: {e}")
+        # The body was read to save it, so serve it again as replay would
+        stream_body(response, response.content)
+        if not stream:
+            # Read the body now, as HTTPAdapter does for requests that are not streamed
+            response.content
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, store: FixtureStore, latency: Optional[float] = None, jitter: float = 0.0):
+        """Initialize a transport adapter that answers requests from recorded responses.
+
+        Args:
+            store (FixtureStore): Where responses were recorded
+            latency (float): Seconds to hold each response back, or None to
+                replay the latency measured when it was recorded
+            jitter (float): Fractional +/- jitter applied to the latency
+        """
+        super().__init__()
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.hits = 0
+        self.misses = 0
+        # Recorded bodies compressed once, by fixture URL
+        self._compressed = {}
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        recorded = self.store.load(request.method, request.url)
+        if recorded is None:
+            self.misses += 1
+            # Surfaces like a network failure, so the backend is recorded as failed
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}",
+                                           request=request)
+        self.hits += 1
+        meta, body = recorded
+
+        delay = meta.get("latency", 0.0) if self.latency is None else self.latency
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta.get("reason")
+        response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        response.encoding = meta.get("encoding")
+        response.url = meta.get("final_url") or request.url
+        response.request = request
+        compressed = self._compressed.get(request.url)
+        if compressed is None and accepts_gzip(request):
+            compressed = self._compressed[request.url] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        stream_body(response, body, compressed)
+        if not stream:
+            # Read the body now, as HTTPAdapter does for requests that are not streamed
+            response.content
+        return response
+
+    def close(self):
+        pass
+
+
+class HttpRecorder:
+    def __init__(self, mode: str, directory: str, latency: Optional[float] = None, jitter: float = 0.0):
+        """Initialize record/replay of the search backends' HTTP traffic.
+
+        Args:
+            mode (str): RECORD to save live responses, REPLAY to serve saved ones
+            directory (str): Fixture directory
+            latency (float): Replay delay in seconds, None for the recorded latency
+            jitter (float): Fractional +/- jitter applied to the replay delay
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown HTTP recorder mode: {mode}")
+        self.mode = mode
+        self.store = FixtureStore(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self._adapters = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["HttpRecorder"]:
+        """Build a recorder from SEARCH_HTTP_MODE, or None when it is off.
+
+        SEARCH_HTTP_FIXTURES names the fixture directory,
+        SEARCH_HTTP_REPLAY_LATENCY the replay delay ('recorded' or seconds)
+        and SEARCH_HTTP_REPLAY_JITTER its jitter.
+        """
+        mode = os.getenv('SEARCH_HTTP_MODE', 'off').lower()
+        if mode in ('', 'off', 'live'):
+            return None
+        directory = os.getenv('SEARCH_HTTP_FIXTURES', os.path.join('data', 'http_fixtures'))
+        latency = os.getenv('SEARCH_HTTP_REPLAY_LATENCY', 'recorded')
+        recorder = cls(
+            mode,
+            directory,
+            latency=None if latency == 'recorded' else float(latency),
+            jitter=float(os.getenv('SEARCH_HTTP_REPLAY_JITTER', '0'))
+        )
+        logger.info(f"HTTP {mode} mode, fixtures in {directory}")
+        return recorder
+
+    def mount(self, session: requests.Session):
+        """Route a session's http and https requests through the recorder."""
+        if self.mode == RECORD:
+            adapter = RecordingAdapter(self.store)
+        else:
+            adapter = ReplayAdapter(self.store, self.latency, self.jitter)
+        with self._lock:
+            self._adapters.append(adapter)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    def stats(self) -> dict:
+        """Return the mode, fixture count and, when replaying, hits and misses."""
+        result = {"mode": self.mode, "fixtures": len(self.store)}
+        if self.mode == REPLAY:
+            with self._lock:
+                result["hits"] = sum(adapter.hits for adapter in self._adapters)
+                result["misses"] = sum(adapter.misses for adapter in self._adapters)
+        return result
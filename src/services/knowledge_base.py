@@ -0,0 +1,345 @@
+import csv
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from bisect import bisect_left
+from loguru import logger
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.text_normalization import normalize_question
+
+MAGIC = b'TKB1'
+# magic, doc count, term count, then the byte offset of each section
+_HEADER = struct.Struct('<4sII7Q')
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Question words and fillers that say nothing about which fact is wanted
+STOPWORDS = frozenset("""
+a an the of in on at to for from by with and or is are was were be been
+what whats which who whom whose when where why how s do does did tell me
+please name can you i know about this that it its
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into index terms, dropping stopwords."""
+    return [token for token in _TOKEN.findall(normalize_question(text)) if token not in STOPWORDS]
+
+
+def read_entries(path: str) -> Iterator[Tuple[str, str]]:
+    """Read (question, answer) pairs from a JSONL or CSV dump.
+
+    Rows either hold a ``question`` and an ``answer``, or an entity fact
+    with ``entity``, ``relation`` and ``value`` which is indexed as the
+    question "<relation> of <entity>".
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            rows: Iterable[dict] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if row.get('question') and row.get('answer'):
+                yield row['question'], row['answer']
+            elif row.get('entity') and row.get('relation') and row.get('value'):
+                yield f"{row['relation']} of {row['entity']}", row['value']
+
+
+def build_index(entries: Iterable[Tuple[str, str]]) -> bytes:
+    """Build the compact on-disk knowledge base image.
+
+    Layout after the header: document offsets (uint64), document records
+    (question NUL answer, UTF-8), document norms (float32), term offsets
+    (uint32), sorted terms (UTF-8), posting offsets (uint32) and postings
+    (uint32 document ids). Every array is 8-byte aligned so it can be
+    used directly from a memory map.
+    """
+    docs: Dict[str, Tuple[str, str]] = {}
+    for question, answer in entries:
+        key = normalize_question(question)
+        if key and answer:
+            docs[key] = (question.strip(), answer.strip())
+
+    records = list(docs.values())
+    postings: Dict[bytes, List[int]] = {}
+    doc_terms: List[set] = []
+    for doc_id, (question, _) in enumerate(records):
+        terms = set(tokenize(question))
+        doc_terms.append(terms)
+        for term in terms:
+            postings.setdefault(term.encode('utf-8'), []).append(doc_id)
+
+    doc_count = len(records)
+    terms = sorted(postings)
+    idf = {term.decode('utf-8'): _idf(doc_count, len(ids)) for term, ids in postings.items()}
+    norms = [math.sqrt(sum(idf[t] ** 2 for t in terms_)) or 1.0 for terms_ in doc_terms]
+
+    doc_blob = bytearray()
+    doc_offsets = [0]
+    for question, answer in records:
+        doc_blob += question.encode('utf-8') + b'\x00' + answer.encode('utf-8')
+        doc_offsets.append(len(doc_blob))
+
+    term_blob = bytearray()
+    term_offsets = [0]
+    posting_offsets = [0]
+    posting_ids: List[int] = []
+    for term in terms:
+        term_blob += term
+        term_offsets.append(len(term_blob))
+        posting_ids.extend(postings[term])
+        posting_offsets.append(len(posting_ids))
+
+    sections = [
+        struct.pack(f'<{len(doc_offsets)}Q', *doc_offsets),
+        bytes(doc_blob),
+        struct.pack(f'<{doc_count}f', *norms),
+        struct.pack(f'<{len(term_offsets)}I', *term_offsets),
+        bytes(term_blob),
+        struct.pack(f'<{len(posting_offsets)}I', *posting_offsets),
+        struct.pack(f'<{len(posting_ids)}I', *posting_ids)
+    ]
+    image = bytearray(_HEADER.size)
+    offsets = []
+    for section in sections:
+        image += b'\x00' * (-len(image) % 8)
+        offsets.append(len(image))
+        image += section
+    _HEADER.pack_into(image, 0, MAGIC, doc_count, len(terms), *offsets)
+    return bytes(image)
+
+
+def _idf(doc_count: int, doc_freq: int) -> float:
+    """Inverse document frequency of a term."""
+    return math.log(1 + doc_count / doc_freq)
+
+
+class _TermIndex:
+    """Sequence view over the sorted term table, for bisect."""
+
+    def __init__(self, kb: "KnowledgeBase"):
+        self._kb = kb
+
+    def __len__(self):
+        return self._kb.term_count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._kb._term(index)
+
+
+class KnowledgeBase:
+    def __init__(self, path: Optional[str] = None, image: Optional[bytes] = None,
+                 min_score: Optional[float] = None, fuzzy: Optional[bool] = None,
+                 min_coverage: Optional[float] = None):
+        """Initialize the local knowledge base.
+
+        A compiled ``.tkb`` file is memory-mapped read-only so every worker
+        process shares one copy through the page cache. JSONL and CSV dumps
+        are compiled in memory on load.
+
+        Args:
+            path (str): A .tkb file, or a .jsonl/.csv dump to compile
+            image (bytes): A compiled image, instead of path
+            min_score (float): Minimum cosine similarity for an answer
+            fuzzy (bool): Match misspelled terms by character trigrams
+            min_coverage (float): Minimum share of both the question's and
+                the entry's terms that must match
+        """
+        self.min_score = min_score if min_score is not None else float(os.getenv('KNOWLEDGE_BASE_MIN_SCORE', '0.75'))
+        self.min_coverage = (min_coverage if min_coverage is not None
+                             else float(os.getenv('KNOWLEDGE_BASE_MIN_COVERAGE', '0.6')))
+        self.fuzzy = fuzzy if fuzzy is not None else os.getenv('KNOWLEDGE_BASE_FUZZY', '').lower() in ('1', 'true', 'yes')
+        self.path = path
+        self._file = None
+        self._mmap = None
+
+        if image is None:
+            if path is None:
+                raise ValueError("Either path or image is required")
+            if path.endswith(('.jsonl', '.csv')):
+                image = build_index(read_entries(path))
+            else:
+                self._file = open(path, 'rb')
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                image = self._mmap
+
+        self._buffer = memoryview(image)
+        magic, self.doc_count, self.term_count, *offsets = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a knowledge base image: {path}")
+        (doc_offsets, doc_blob, norms, term_offsets,
+         term_blob, posting_offsets, postings) = offsets
+
+        self._doc_offsets = self._buffer[doc_offsets:doc_offsets + 8 * (self.doc_count + 1)].cast('Q')
+        self._doc_blob = doc_blob
+        self._norms = self._buffer[norms:norms + 4 * self.doc_count].cast('f')
+        self._term_offsets = self._buffer[term_offsets:term_offsets + 4 * (self.term_count + 1)].cast('I')
+        self._term_blob = term_blob
+        self._posting_offsets = self._buffer[posting_offsets:posting_offsets + 4 * (self.term_count + 1)].cast('I')
+        posting_count = self._posting_offsets[self.term_count] if self.term_count else 0
+        self._postings = self._buffer[postings:postings + 4 * posting_count].cast('I')
+        self._terms = _TermIndex(self)
+        self._max_idf = _idf(self.doc_count, 1) if self.doc_count else 0.0
+        self._trigrams: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[str, str]], **kwargs) -> "KnowledgeBase":
+        """Build an in-memory knowledge base from (question, answer) pairs."""
+        return cls(image=build_index(entries), **kwargs)
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return the answer for a question, or None below min_score."""
+        match = self.best_match(question, self.min_score)
+        if match is None or match[2] < self.min_score:
+            return None
+        return match[1]
+
+    def best_match(self, question: str, min_score: float = 0.0) -> Optional[Tuple[str, str, float]]:
+        """Return (indexed question, answer, score) of the closest entry.
+
+        Terms are scored rarest first. Once the terms left to score could
+        not lift a new document to min_score on their own, common terms
+        only update documents already found instead of scanning their
+        whole posting list.
+
+        Only entries sharing at least min_coverage of the question's terms,
+        and of their own, are returned. A rare term carries most of the
+        score, so "australia" alone would otherwise match "capital of
+        australia".
+        """
+        terms = set(tokenize(question))
+        if not terms or not self.doc_count:
+            return None
+
+        matched = []
+        query_norm = 0.0
+        for term in terms:
+            index, weight = self._find_term(term)
+            if index is None:
+                query_norm += self._max_idf ** 2
+                continue
+            start, end = self._posting_offsets[index], self._posting_offsets[index + 1]
+            idf = _idf(self.doc_count, end - start)
+            query_norm += idf ** 2
+            matched.append((idf, weight, start, end))
+        if not matched:
+            return None
+        query_norm = math.sqrt(query_norm)
+        matched.sort(reverse=True)
+
+        # remaining[i]: best score a document could reach from terms i onwards
+        remaining = [0.0] * (len(matched) + 1)
+        for i in range(len(matched) - 1, -1, -1):
+            remaining[i] = math.sqrt(remaining[i + 1] ** 2 + matched[i][0] ** 2)
+        if remaining[0] / query_norm < min_score:
+            return None
+
+        scores: Dict[int, float] = {}
+        hits: Dict[int, int] = {}
+        for i, (idf, weight, start, end) in enumerate(matched):
+            contribution = weight * idf * idf
+            postings = self._postings[start:end]
+            if scores and remaining[i] / query_norm < min_score and len(scores) < end - start:
+                # Postings are sorted by document id, so probe for known candidates
+                for doc_id in scores:
+                    position = bisect_left(postings, doc_id)
+                    if position < len(postings) and postings[position] == doc_id:
+                        scores[doc_id] += contribution
+                        hits[doc_id] += 1
+                continue
+            for doc_id in postings:
+                scores[doc_id] = scores.get(doc_id, 0.0) + contribution
+                hits[doc_id] = hits.get(doc_id, 0) + 1
+
+        ranked = sorted(
+            ((score / (query_norm * self._norms[doc_id]), doc_id) for doc_id, score in scores.items()),
+            reverse=True
+        )
+        for score, doc_id in ranked:
+            if score < min_score:
+                break
+            if hits[doc_id] / len(terms) < self.min_coverage:
+                continue
+            indexed_question, answer = self._document(doc_id)
+            indexed_terms = len(set(tokenize(indexed_question)))
+            # Fuzzy matches can pair two query terms with one indexed term
+            if min(hits[doc_id], indexed_terms) / indexed_terms < self.min_coverage:
+                continue
+            return indexed_question, answer, score
+        return None
+
+    def close(self):
+        """Release the memory map."""
+        for view in (self._doc_offsets, self._norms, self._term_offsets,
+                     self._posting_offsets, self._postings, self._buffer):
+            view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+
+    def _find_term(self, term: str) -> Tuple[Optional[int], float]:
+        """Return (term index, match weight), falling back to fuzzy matching."""
+        encoded = term.encode('utf-8')
+        index = bisect_left(self._terms, encoded)
+        if index < self.term_count and self._terms[index] == encoded:
+            return index, 1.0
+        if self.fuzzy and len(term) >= 4:
+            return self._fuzzy_term(term)
+        return None, 0.0
+
+    def _fuzzy_term(self, term: str) -> Tuple[Optional[int], float]:
+        """Find the vocabulary term sharing the most character trigrams."""
+        if self._trigrams is None:
+            self._trigrams = {}
+            for index in range(self.term_count):
+                for gram in _trigrams(self._term(index).decode('utf-8')):
+                    self._trigrams.setdefault(gram, []).append(index)
+
+        grams = _trigrams(term)
+        overlap: Dict[int, int] = {}
+        for gram in grams:
+            for index in self._trigrams.get(gram, ()):
+                overlap[index] = overlap.get(index, 0) + 1
+
+        best, best_similarity = None, 0.0
+        for index, shared in overlap.items():
+            other = len(_trigrams(self._term(index).decode('utf-8')))
+            similarity = shared / (len(grams) + other - shared)
+            if similarity > best_similarity:
+                best, best_similarity = index, similarity
+        if best_similarity < 0.5:
+            return None, 0.0
+        return best, best_similarity
+
+    def _term(self, index: int) -> bytes:
+        start = self._term_blob + self._term_offsets[index]
+        end = self._term_blob + self._term_offsets[index + 1]
+        return bytes(self._buffer[start:end])
+
+    def _document(self, doc_id: int) -> Tuple[str, str]:
+        start = self._doc_blob + self._doc_offsets[doc_id]
+        end = self._doc_blob + self._doc_offsets[doc_id + 1]
+        question, _, answer = bytes(self._buffer[start:end]).decode('utf-8').partition('\x00')
+        return question, answer
+
+
+def _trigrams(term: str) -> set:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_knowledge_base() -> Optional[KnowledgeBase]:
+    """Open the knowledge base named by KNOWLEDGE_BASE_PATH, if any."""
+    path = os.getenv('KNOWLEDGE_BASE_PATH')
+    if not path:
+        return None
+    try:
+        kb = KnowledgeBase(path)
+        logger.info(f"Knowledge base loaded: {kb.doc_count} entries from {path}")
+        return kb
+    except Exception as e:
+        logger.error(f"Could not load knowledge base {path}: {e}")
+        return None
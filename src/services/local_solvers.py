@@ -0,0 +1,528 @@
+import ast
+import calendar
+import math
+import operator
+import re
+from datetime import date, timedelta
+from loguru import logger
+from typing import Callable, List, Optional, Tuple
+
+from services.metrics import metrics
+
+Solver = Callable[[str], Optional[str]]
+
+# Leading phrases that only say "please answer this"
+_PREFIX = re.compile(
+    r'^(?:hey\s+)?(?:what\s+is|what\'s|whats|what\s+are|calculate|compute|solve|evaluate|find|'
+    r'how\s+much\s+is|tell\s+me|can\s+you\s+tell\s+me|do\s+you\s+know)\s+'
+)
+_NUMBER = re.compile(r'^(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?$|^\.\d+$')
+
+
+def _clean(question: str) -> str:
+    """Lowercase a question and strip the polite prefix, question mark and 'equal'."""
+    text = question.lower().strip().rstrip('?.!').strip()
+    text = _PREFIX.sub('', text)
+    text = re.sub(r'\s+(?:equal|equals|equal to|is equal to)$', '', text)
+    return text.strip()
+
+
+def format_number(value: float) -> str:
+    """Format a result without float noise: 44.5, 5280, 0.333333."""
+    if isinstance(value, int) or (abs(value) < 1e15 and float(value).is_integer()):
+        return str(int(value))
+    if abs(value) >= 1e15 or abs(value) < 1e-6:
+        return f"{value:.6g}"
+    return f"{value:.6f}".rstrip('0').rstrip('.')
+
+
+# --- Spelled-out numbers -----------------------------------------------------
+
+_SMALL = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18,
+    'nineteen': 19, 'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60,
+    'seventy': 70, 'eighty': 80, 'ninety': 90
+}
+_SCALES = {'hundred': 100, 'thousand': 1000, 'million': 10 ** 6, 'billion': 10 ** 9, 'trillion': 10 ** 12}
+NUMBER_WORDS = frozenset(_SMALL) | frozenset(_SCALES) | {'point', 'and', 'a'}
+
+
+def words_to_number(words: List[str]) -> Optional[float]:
+    """Read a spelled-out number ("one hundred and twenty five", "three point five")."""
+    if not words or words[0] in ('and', 'point'):
+        return None
+    total = current = 0
+    seen = False
+    for index, word in enumerate(words):
+        if word == 'point':
+            digits = words[index + 1:]
+            if not digits or any(digit not in _SMALL or _SMALL[digit] > 9 for digit in digits):
+                return None
+            fraction = float('0.' + ''.join(str(_SMALL[digit]) for digit in digits))
+            return total + current + fraction if seen else None
+        if word == 'and':
+            continue
+        if word == 'a':
+            # "a hundred", "a thousand"
+            current += 1
+            continue
+        if word in _SMALL:
+            current += _SMALL[word]
+        elif word == 'hundred':
+            current = (current or 1) * 100
+        elif word in _SCALES:
+            total += (current or 1) * _SCALES[word]
+            current = 0
+        else:
+            return None
+        seen = True
+    return total + current if seen else None
+
+
+def _number_value(token: str) -> Optional[float]:
+    """Parse a numeral such as '1,000', '12.5' or '.5'."""
+    if not _NUMBER.match(token):
+        return None
+    value = float(token.replace(',', ''))
+    return int(value) if value.is_integer() and '.' not in token else value
+
+
+def _merge_number_words(tokens: List[str]) -> List[str]:
+    """Replace each run of number words in tokens with its numeral."""
+    result = []
+    index = 0
+    while index < len(tokens):
+        if tokens[index] in NUMBER_WORDS and tokens[index] not in ('and', 'point', 'a'):
+            end = index
+            while end < len(tokens) and tokens[end] in NUMBER_WORDS:
+                end += 1
+            # A trailing 'and' or 'a' belongs to the expression ("two and a half" is not supported)
+            while end > index and tokens[end - 1] in ('and', 'a', 'point'):
+                end -= 1
+            value = words_to_number(tokens[index:end])
+            if value is not None:
+                result.append(format_number(value))
+                index = end
+                continue
+        result.append(tokens[index])
+        index += 1
+    return result
+
+
+# --- Arithmetic ----------------------------------------------------------------
+
+_PHRASES = [
+    (r'\bmultiplied\s+by\b', ' * '), (r'\bdivided\s+by\b', ' / '),
+    (r'\bto\s+the\s+power\s+of\b', ' ^ '), (r'\braised\s+to(?:\s+the\s+power\s+of)?\b', ' ^ '),
+    (r'\bto\s+the\s+(\w+)\s+power\b', r' ^ \1 '), (r'\bsquare\s+root\s+of\b', ' sqrt '),
+    (r'\bcube\s+root\s+of\b', ' cbrt '), (r'\bpercent\s+of\b', ' % of '), (r'\bpercent\b', ' % '),
+    (r'\bper\s*cent\b', ' % '), (r'\bmodulo\b', ' mod ')
+]
+_WORD_OPERATORS = {
+    'plus': '+', 'add': '+', 'minus': '-', 'times': '*', 'x': '*', 'over': '/', 'mod': 'mod',
+    'squared': '^2', 'cubed': '^3', 'sqrt': 'sqrt', 'cbrt': 'cbrt', 'of': 'of',
+    '×': '*', '÷': '/', '−': '-'
+}
+_ORDINAL_POWERS = {'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5', 'sixth': '6', 'tenth': '10'}
+_EXPRESSION_TOKEN = re.compile(r'\d[\d,]*(?:\.\d+)?|\.\d+|\*\*|[a-z]+|[-+*/^%()×÷−]')
+
+_BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Mod: operator.mod, ast.Pow: operator.pow
+}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_FUNCTIONS = {'sqrt': math.sqrt, 'cbrt': lambda x: math.copysign(abs(x) ** (1 / 3), x)}
+
+
+def _evaluate(node: ast.AST) -> float:
+    """Evaluate a parsed arithmetic expression; anything but numbers and operators raises ValueError."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and (abs(right) > 100 or abs(left) > 1e6):
+            raise ValueError("Power too large")
+        return _BINARY[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        return _UNARY[type(node.op)](_evaluate(node.operand))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+            and len(node.args) == 1 and not node.keywords):
+        return _FUNCTIONS[node.func.id](_evaluate(node.args[0]))
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+def to_expression(question: str) -> Optional[str]:
+    """Rewrite a spoken arithmetic question as a Python expression, or None if it is not one."""
+    text = re.sub(r'^the\s+', '', _clean(question))
+    for pattern, replacement in _PHRASES:
+        text = re.sub(pattern, replacement, text)
+    tokens = _merge_number_words(_EXPRESSION_TOKEN.findall(text))
+    if len(tokens) > 1 and tokens[-1] in ('equal', 'equals'):
+        tokens.pop()
+
+    parts = []
+    operators = 0
+    pending_function = None
+    for index, token in enumerate(tokens):
+        previous = parts[-1] if parts else None
+        value = _number_value(token)
+        if value is not None:
+            numeral = format_number(value)
+            parts.append(f"{pending_function}({numeral})" if pending_function else numeral)
+            pending_function = None
+            continue
+        if token in _ORDINAL_POWERS and previous == '**':
+            parts.append(_ORDINAL_POWERS[token])
+            continue
+        symbol = _WORD_OPERATORS.get(token, token)
+        if symbol in ('sqrt', 'cbrt'):
+            operators += 1
+            if index + 1 < len(tokens) and tokens[index + 1] == '(':
+                parts.append(symbol)
+            else:
+                pending_function = symbol
+            continue
+        if symbol == 'of':
+            # "15 % of 80"
+            if previous != '/ 100':
+                return None
+            parts.append('*')
+        elif symbol == '%':
+            # A percent sign after a number is a percentage; between numbers it is ambiguous
+            if previous is None or previous in ('+', '-', '*', '/', '(', '**'):
+                return None
+            parts.append('/ 100')
+        elif symbol == 'mod':
+            parts.append('%')
+        elif symbol == '^' or symbol == '**':
+            parts.append('**')
+        elif symbol.startswith('^'):
+            parts.append('**' + symbol[1:])
+        elif symbol in ('+', '-', '*', '/', '(', ')'):
+            parts.append(symbol)
+        else:
+            return None
+        if symbol not in ('(', ')'):
+            operators += 1
+
+    if pending_function or not operators or not any(_number_value(part) is not None or '(' in part
+                                                     for part in parts):
+        return None
+    return ' '.join(parts)
+
+
+def solve_arithmetic(question: str) -> Optional[str]:
+    """Answer "what is 12.5 times 3 plus 7", "15% of 80", "square root of 144"."""
+    expression = to_expression(question)
+    if expression is None:
+        return None
+    try:
+        result = _evaluate(ast.parse(expression, mode='eval'))
+        if isinstance(result, complex) or math.isnan(result) or math.isinf(result):
+            return None
+        return format_number(result)
+    except (SyntaxError, ValueError, ZeroDivisionError, OverflowError, TypeError):
+        return None
+
+
+# --- Unit conversion -------------------------------------------------------------
+
+# name: (dimension, size in the dimension's base unit, aliases)
+_UNITS = {
+    'millimeter': ('length', 0.001, ('millimeters', 'millimetre', 'millimetres', 'mm')),
+    'centimeter': ('length', 0.01, ('centimeters', 'centimetre', 'centimetres', 'cm')),
+    'meter': ('length', 1.0, ('meters', 'metre', 'metres', 'm')),
+    'kilometer': ('length', 1000.0, ('kilometers', 'kilometre', 'kilometres', 'km', 'kms')),
+    'inch': ('length', 0.0254, ('inches',)),
+    'foot': ('length', 0.3048, ('feet', 'ft')),
+    'yard': ('length', 0.9144, ('yards', 'yd', 'yds')),
+    'mile': ('length', 1609.344, ('miles', 'mi')),
+    'nautical mile': ('length', 1852.0, ('nautical miles',)),
+    'milligram': ('mass', 0.001, ('milligrams', 'mg')),
+    'gram': ('mass', 1.0, ('grams', 'g')),
+    'kilogram': ('mass', 1000.0, ('kilograms', 'kg', 'kgs', 'kilo', 'kilos')),
+    'tonne': ('mass', 10 ** 6, ('tonnes', 'metric ton', 'metric tons')),
+    'ounce': ('mass', 28.349523125, ('ounces', 'oz')),
+    'pound': ('mass', 453.59237, ('pounds', 'lb', 'lbs')),
+    'stone': ('mass', 6350.29318, ('stones',)),
+    'ton': ('mass', 907184.74, ('tons', 'short ton', 'short tons')),
+    'milliliter': ('volume', 0.001, ('milliliters', 'millilitre', 'millilitres', 'ml')),
+    'liter': ('volume', 1.0, ('liters', 'litre', 'litres', 'l')),
+    'teaspoon': ('volume', 0.00492892159375, ('teaspoons', 'tsp')),
+    'tablespoon': ('volume', 0.01478676478125, ('tablespoons', 'tbsp')),
+    'fluid ounce': ('volume', 0.0295735295625, ('fluid ounces', 'fl oz')),
+    'cup': ('volume', 0.2365882365, ('cups',)),
+    'pint': ('volume', 0.473176473, ('pints',)),
+    'quart': ('volume', 0.946352946, ('quarts',)),
+    'gallon': ('volume', 3.785411784, ('gallons', 'gal')),
+    'second': ('time', 1.0, ('seconds', 'sec', 'secs')),
+    'minute': ('time', 60.0, ('minutes', 'min', 'mins')),
+    'hour': ('time', 3600.0, ('hours', 'hr', 'hrs')),
+    'day': ('time', 86400.0, ('days',)),
+    'week': ('time', 604800.0, ('weeks',)),
+    'year': ('time', 31536000.0, ('years',)),
+    'square meter': ('area', 1.0, ('square meters', 'square metre', 'square metres', 'sq m')),
+    'square kilometer': ('area', 10 ** 6, ('square kilometers', 'square kilometre', 'square kilometres', 'sq km')),
+    'square foot': ('area', 0.09290304, ('square feet', 'sq ft')),
+    'square mile': ('area', 2589988.110336, ('square miles', 'sq mi')),
+    'acre': ('area', 4046.8564224, ('acres',)),
+    'hectare': ('area', 10000.0, ('hectares', 'ha')),
+    'meter per second': ('speed', 1.0, ('meters per second', 'metres per second', 'm/s')),
+    'kilometer per hour': ('speed', 1 / 3.6, ('kilometers per hour', 'kilometres per hour', 'km/h', 'kph')),
+    'mile per hour': ('speed', 0.44704, ('miles per hour', 'mph')),
+    'knot': ('speed', 0.514444, ('knots',)),
+    'celsius': ('temperature', None, ('degrees celsius', 'degree celsius', 'centigrade', 'c')),
+    'fahrenheit': ('temperature', None, ('degrees fahrenheit', 'degree fahrenheit', 'f')),
+    'kelvin': ('temperature', None, ('kelvins', 'k'))
+}
+_PLURALS = {
+    'foot': 'feet', 'inch': 'inches', 'celsius': 'degrees Celsius', 'fahrenheit': 'degrees Fahrenheit',
+    'kelvin': 'kelvin', 'square foot': 'square feet', 'stone': 'stone',
+    'meter per second': 'meters per second', 'kilometer per hour': 'kilometers per hour',
+    'mile per hour': 'miles per hour'
+}
+_UNIT_ALIASES = {}
+for _name, (_, _, _aliases) in _UNITS.items():
+    for _alias in (_name,) + _aliases:
+        _UNIT_ALIASES[_alias] = _name
+# Longest first, so "square feet" wins over "feet" and "fluid ounces" over "ounces"
+_UNIT_PATTERN = '|'.join(re.escape(alias) for alias in sorted(_UNIT_ALIASES, key=len, reverse=True))
+_QUANTITY = r'(?P<amount>-?[\d,]*\.?\d+|a|an|one)'
+_CONVERSIONS = [
+    # how many feet are in a mile / how many grams in 3 pounds
+    re.compile(rf'^how\s+many\s+(?P<target>{_UNIT_PATTERN})\s+(?:are\s+)?(?:there\s+)?in\s+(?:a\s+|an\s+|one\s+)?'
+               rf'(?:(?P<amount>-?[\d,]*\.?\d+)\s+)?(?P<source>{_UNIT_PATTERN})$'),
+    # convert 5 miles to km / 100 f in c / 3 cups is how many ml
+    re.compile(rf'^(?:convert\s+)?{_QUANTITY}\s+(?:degrees?\s+)?(?P<source>{_UNIT_PATTERN})\s+'
+               rf'(?:to|in|into|in\s+terms\s+of|is\s+how\s+many|are\s+how\s+many|equals?\s+how\s+many)\s+'
+               rf'(?:degrees?\s+)?(?P<target>{_UNIT_PATTERN})$')
+]
+
+
+def _to_base(name: str, amount: float) -> float:
+    if name == 'fahrenheit':
+        return (amount - 32) * 5 / 9
+    if name == 'kelvin':
+        return amount - 273.15
+    if name == 'celsius':
+        return amount
+    return amount * _UNITS[name][1]
+
+
+def _from_base(name: str, amount: float) -> float:
+    if name == 'fahrenheit':
+        return amount * 9 / 5 + 32
+    if name == 'kelvin':
+        return amount + 273.15
+    if name == 'celsius':
+        return amount
+    return amount / _UNITS[name][1]
+
+
+def _unit_label(name: str, amount: float) -> str:
+    if abs(amount) == 1 and name not in ('celsius', 'fahrenheit'):
+        return name
+    return _PLURALS.get(name, name + 's')
+
+
+def convert_units(question: str) -> Optional[str]:
+    """Answer "how many feet in a mile", "convert 100 fahrenheit to celsius"."""
+    text = _clean(question)
+    text = ' '.join(_merge_number_words(text.split()))
+    for pattern in _CONVERSIONS:
+        match = pattern.match(text)
+        if match:
+            break
+    else:
+        return None
+
+    source = _UNIT_ALIASES[match.group('source')]
+    target = _UNIT_ALIASES[match.group('target')]
+    if source == target or _UNITS[source][0] != _UNITS[target][0]:
+        return None
+    amount_text = match.group('amount')
+    amount = 1.0 if amount_text in (None, 'a', 'an', 'one') else float(amount_text.replace(',', ''))
+    result = _from_base(target, _to_base(source, amount))
+
+    # Keep six significant digits, and separate thousands as people say them
+    rounded = float(f"{result:.6g}")
+    text = f"{rounded:,.6f}".rstrip('0').rstrip('.') if not rounded.is_integer() else f"{int(rounded):,}"
+    return f"{text} {_unit_label(target, rounded)}"
+
+
+# --- Calendar --------------------------------------------------------------------
+
+_MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): index for index, name in enumerate(calendar.month_abbr) if name})
+_MONTHS['sept'] = 9
+_MONTH_PATTERN = '|'.join(sorted(_MONTHS, key=len, reverse=True))
+_HOLIDAYS = {
+    'christmas': (12, 25), 'christmas day': (12, 25), 'christmas eve': (12, 24),
+    'new year': (1, 1), 'new years': (1, 1), 'new year s': (1, 1), 'new years day': (1, 1),
+    'new year s day': (1, 1), 'halloween': (10, 31), 'valentine s day': (2, 14),
+    'valentines day': (2, 14), 'independence day': (7, 4), 'the fourth of july': (7, 4),
+    'fourth of july': (7, 4), 'july 4th': (7, 4)
+}
+_HOLIDAY_PATTERN = '|'.join(sorted((re.escape(name) for name in _HOLIDAYS), key=len, reverse=True))
+_DATE = (
+    rf'(?:(?P<iso>\d{{4}}-\d{{1,2}}-\d{{1,2}})'
+    rf'|(?P<numeric>\d{{1,2}}/\d{{1,2}}/\d{{2,4}})'
+    rf'|(?P<month>{_MONTH_PATTERN})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<year>\d{{3,4}}))?'
+    rf'|(?:the\s+)?(?P<day2>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month2>{_MONTH_PATTERN})(?:,?\s+(?P<year2>\d{{3,4}}))?'
+    rf'|(?P<holiday>{_HOLIDAY_PATTERN})(?:\s+(?P<year3>\d{{4}}))?'
+    rf'|(?P<relative>today|tomorrow|yesterday|now))'
+)
+
+
+def _named(pattern: str, suffix: str) -> str:
+    """Give a copy of the date pattern's groups distinct names, for patterns with two dates."""
+    return re.sub(r'\(\?P<(\w+)>', lambda m: f'(?P<{m.group(1)}_{suffix}>', pattern)
+
+
+class DateSolver:
+    def __init__(self, today: Optional[Callable[[], date]] = None):
+        """Initialize calendar math.
+
+        Args:
+            today (callable): Returns the current date, for relative questions
+        """
+        self.today = today or date.today
+        start, end = _named(_DATE, 'a'), _named(_DATE, 'b')
+        self._patterns = [
+            ('weekday', re.compile(rf'^(?:what\s+)?day(?:\s+of\s+the\s+week)?\s+(?:was|is|will\s+be|did|does)\s+'
+                                   rf'{start}(?:\s+(?:be|fall|fall\s+on|land\s+on))?$')),
+            ('weekday', re.compile(rf'^(?:on\s+)?what\s+day(?:\s+of\s+the\s+week)?\s+(?:was|is|will)\s+{start}'
+                                   rf'(?:\s+(?:be|on))?$')),
+            ('between', re.compile(rf'^how\s+many\s+days\s+(?:are\s+there\s+)?(?:between|from)\s+{start}\s+'
+                                   rf'(?:and|to|until|till)\s+{end}$')),
+            ('until', re.compile(rf'^how\s+many\s+days\s+(?:are\s+)?(?:left\s+)?(?:until|till|before|to)\s+{start}$')),
+            ('since', re.compile(rf'^how\s+many\s+days\s+(?:have\s+passed\s+|has\s+it\s+been\s+|ago\s+was\s+)?'
+                                 rf'since\s+{start}$')),
+            ('offset', re.compile(rf'^(?:what\s+)?(?:date|day)\s+(?:is|was|will\s+it\s+be)\s+(?P<count>\d+)\s+'
+                                  rf'(?P<unit>days?|weeks?)\s+(?P<direction>after|from|before|since)\s+{start}$')),
+            ('offset', re.compile(rf'^(?P<count>\d+)\s+(?P<unit>days?|weeks?)\s+(?P<direction>after|from|before)\s+'
+                                  rf'{start}$')),
+            ('leap', re.compile(r'^(?:is\s+)?(?P<year>\d{3,4})\s+(?:was\s+|is\s+)?a\s+leap\s+year$')),
+            ('leap', re.compile(r'^was\s+(?P<year>\d{3,4})\s+a\s+leap\s+year$')),
+            ('today', re.compile(r'^(?:today\'?s\s+date|the\s+date\s+today|what\s+day\s+is\s+(?:it\s+)?today|'
+                                 r'what\s+is\s+the\s+date(?:\s+today)?|what\s+day\s+is\s+it|date\s+today)$'))
+        ]
+
+    def __call__(self, question: str) -> Optional[str]:
+        """Answer weekday, day-count, date-offset and leap-year questions."""
+        text = _clean(question).replace("'", ' ').replace('  ', ' ')
+        text = re.sub(r'\s+(?:on|in\s+the\s+calendar)$', '', text)
+        text = ' '.join(_merge_number_words(text.split()))
+        for kind, pattern in self._patterns:
+            match = pattern.match(text)
+            if match:
+                try:
+                    return getattr(self, f'_{kind}')(match)
+                except ValueError:
+                    # Not a real date, e.g. February 30
+                    return None
+        return None
+
+    def _date(self, match, suffix: str = 'a', future: bool = False) -> Optional[date]:
+        """Build the date captured by one copy of the date pattern."""
+        group = lambda name: match.groupdict().get(f'{name}_{suffix}')
+        today = self.today()
+        if group('iso'):
+            year, month, day = (int(part) for part in group('iso').split('-'))
+            return date(year, month, day)
+        if group('numeric'):
+            month, day, year = (int(part) for part in group('numeric').split('/'))
+            return date(year + 2000 if year < 100 else year, month, day)
+        if group('relative'):
+            offsets = {'today': 0, 'now': 0, 'tomorrow': 1, 'yesterday': -1}
+            return today + timedelta(days=offsets[group('relative')])
+        if group('holiday'):
+            month, day = _HOLIDAYS[group('holiday')]
+            year = group('year3')
+        elif group('month'):
+            month, day, year = _MONTHS[group('month')], int(group('day')), group('year')
+        else:
+            month, day, year = _MONTHS[group('month2')], int(group('day2')), group('year2')
+        if year:
+            return date(int(year), month, day)
+        result = date(today.year, month, day)
+        # "How many days until Christmas" means the next one
+        if future and result < today:
+            result = date(today.year + 1, month, day)
+        return result
+
+    def _weekday(self, match) -> str:
+        return calendar.day_name[self._date(match).weekday()]
+
+    def _between(self, match) -> str:
+        days = abs((self._date(match, 'b') - self._date(match)).days)
+        return f"{days:,} day{'s' if days != 1 else ''}"
+
+    def _until(self, match) -> str:
+        days = (self._date(match, future=True) - self.today()).days
+        return f"{days:,} day{'s' if days != 1 else ''}"
+
+    def _since(self, match) -> Optional[str]:
+        days = (self.today() - self._date(match)).days
+        if days < 0:
+            return None
+        return f"{days:,} day{'s' if days != 1 else ''}"
+
+    def _offset(self, match) -> str:
+        count = int(match.group('count')) * (7 if match.group('unit').startswith('week') else 1)
+        if match.group('direction') == 'before':
+            count = -count
+        result = self._date(match) + timedelta(days=count)
+        return f"{calendar.day_name[result.weekday()]}, {calendar.month_name[result.month]} {result.day}, {result.year}"
+
+    def _leap(self, match) -> str:
+        year = int(match.group('year'))
+        return f"Yes, {year} is a leap year" if calendar.isleap(year) else f"No, {year} is not a leap year"
+
+    def _today(self, match) -> str:
+        today = self.today()
+        return f"{calendar.day_name[today.weekday()]}, {calendar.month_name[today.month]} {today.day}, {today.year}"
+
+
+# --- Registry --------------------------------------------------------------------
+
+class LocalSolvers:
+    def __init__(self, solvers: Optional[List[Tuple[str, Solver]]] = None):
+        """Initialize the registry of solvers tried before any search.
+
+        Each solver takes the question and returns an answer, or None when
+        the question is not one it handles. Solvers run in order and the
+        first answer wins; the solver's name becomes the answer's source.
+
+        Args:
+            solvers (list): (name, solver) pairs, defaults to arithmetic
+                ('math'), unit conversion ('units') and calendar ('calendar')
+        """
+        if solvers is None:
+            solvers = [('math', solve_arithmetic), ('units', convert_units), ('calendar', DateSolver())]
+        self.solvers = list(solvers)
+
+    def register(self, name: str, solver: Solver, first: bool = False):
+        """Add a solver, after the existing ones unless first is True."""
+        if first:
+            self.solvers.insert(0, (name, solver))
+        else:
+            self.solvers.append((name, solver))
+
+    def solve(self, question: str) -> Optional[Tuple[str, str]]:
+        """Return (solver name, answer) from the first solver that answers, or None."""
+        for name, solver in self.solvers:
+            try:
+                with metrics.span('solver', name):
+                    answer = solver(question)
+            except Exception as e:
+                logger.error(f"Error in {name} solver: {e}")
+                continue
+            if answer:
+                logger.info(f"Answered locally by {name} solver: {answer}")
+                return name, answer
+        return None
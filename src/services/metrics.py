@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from loguru import logger
+from typing import Dict, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from sub-millisecond parsing to slow network calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_NAME = 'trivia_stage_duration_seconds'
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize a fixed-bucket latency histogram.
+
+        Args:
+            buckets (list): Sorted bucket upper bounds in seconds; an
+                implicit +Inf bucket catches everything larger
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add one observation. The caller holds the registry lock."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class _Span:
+    __slots__ = ('registry', 'key', 'start', 'cpu_start')
+
+    def __init__(self, registry: "MetricsRegistry", key: Tuple):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time() if self.registry.track_cpu else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        cpu = time.thread_time() - self.cpu_start if self.cpu_start is not None else None
+        self.registry._observe(self.key, elapsed, cpu)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: Optional[bool] = None, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 track_cpu: Optional[bool] = None):
+        """Initialize the pipeline stage timing registry.
+
+        Args:
+            enabled (bool): Record spans; read from METRICS_ENABLED when omitted.
+                When disabled, span() returns a shared no-op context manager.
+            buckets (list): Histogram bucket upper bounds in seconds
+            track_cpu (bool): Also total the CPU time of the calling thread
+                inside each span; read from METRICS_CPU (default off) when omitted
+        """
+        if enabled is None:
+            enabled = os.getenv('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no', 'off')
+        if track_cpu is None:
+            track_cpu = os.getenv('METRICS_CPU', 'false').lower() in ('1', 'true', 'yes', 'on')
+        self.enabled = enabled
+        self.track_cpu = track_cpu
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple, Histogram] = {}
+        self._cpu: Dict[Tuple, float] = {}
+        self._reporter = None
+
+    def span(self, stage: str, backend: Optional[str] = None):
+        """Time a pipeline stage with a ``with`` block.
+
+        Args:
+            stage (str): Stage name, e.g. 'search.network'
+            backend (str): Search backend the stage belongs to, if any
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, (stage, backend))
+
+    def observe(self, stage: str, seconds: float, backend: Optional[str] = None):
+        """Record a duration measured by the caller."""
+        if self.enabled:
+            self._observe((stage, backend), seconds)
+
+    def _observe(self, key: Tuple, seconds: float, cpu: Optional[float] = None):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if cpu is not None:
+                self._cpu[key] = self._cpu.get(key, 0.0) + cpu
+
+    def summary(self) -> Dict[str, dict]:
+        """Return count, average and estimated percentiles per stage.
+
+        With CPU tracking on, spans also report their average CPU time as "cpu".
+        """
+        with self._lock:
+            result = {}
+            for key, histogram in sorted(self._histograms.items(), key=_sort_key):
+                stage, backend = key
+                name = f"{stage}[{backend}]" if backend else stage
+                result[name] = {
+                    "count": histogram.count,
+                    "avg": histogram.sum / histogram.count,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95)
+                }
+                if key in self._cpu:
+                    result[name]["cpu"] = self._cpu[key] / histogram.count
+            return result
+
+    def render_prometheus(self) -> str:
+        """Render the histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each stage of answering a question.",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            for (stage, backend), histogram in sorted(self._histograms.items(), key=_sort_key):
+                labels = f'stage="{stage}"'
+                if backend:
+                    labels += f',backend="{backend}"'
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_NAME}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{METRIC_NAME}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def format_summary(self) -> str:
+        """Format the per-stage summary as a compact multi-line table."""
+        rows = [
+            f"{name:<28} n={stats['count']:<6} avg={stats['avg'] * 1000:8.1f}ms "
+            f"p50={stats['p50'] * 1000:8.1f}ms p95={stats['p95'] * 1000:8.1f}ms"
+            + (f" cpu={stats['cpu'] * 1000:8.1f}ms" if 'cpu' in stats else "")
+            for name, stats in self.summary().items()
+        ]
+        return '\n'.join(rows)
+
+    def start_reporter(self, interval: Optional[float] = None):
+        """Log the stage summary every interval seconds from a daemon thread.
+
+        Args:
+            interval (float): Seconds between summaries; read from
+                METRICS_SUMMARY_INTERVAL (default 60) when omitted, 0 disables
+        """
+        if interval is None:
+            interval = float(os.getenv('METRICS_SUMMARY_INTERVAL', '60'))
+        if not self.enabled or interval <= 0 or self._reporter is not None:
+            return
+
+        def report():
+            last_total = 0
+            while True:
+                time.sleep(interval)
+                with self._lock:
+                    total = sum(histogram.count for histogram in self._histograms.values())
+                # Stay quiet while nothing is being answered
+                if total != last_total:
+                    last_total = total
+                    logger.info(f"Stage timings:\n{self.format_summary()}")
+
+        self._reporter = threading.Thread(target=report, name='metrics-reporter', daemon=True)
+        self._reporter.start()
+
+    def reset(self):
+        """Drop all recorded observations."""
+        with self._lock:
+            self._histograms.clear()
+            self._cpu.clear()
+
+
+def _sort_key(item) -> Tuple[str, str]:
+    (stage, backend), _ = item
+    return stage, backend or ''
+
+
+# Shared by every service so one /metrics scrape covers the whole pipeline
+metrics = MetricsRegistry()
@@ -0,0 +1,100 @@
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from loguru import logger
+from typing import Callable, Dict, Optional, Tuple
+
+
+class DispatcherSaturated(Exception):
+    """Raised when the dispatcher has no room for another question."""
+
+
+class QuestionDispatcher:
+    def __init__(self, handler: Callable[[str], Optional[str]],
+                 max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """Initialize the request-scoped question dispatcher.
+
+        Args:
+            handler (callable): Function that answers a single question
+            max_workers (int): Number of questions answered in parallel
+            max_pending (int): Maximum questions queued or in flight before
+                new submissions are rejected
+        """
+        self.handler = handler
+        self.max_workers = max_workers or int(os.getenv('ANSWER_WORKERS', '4'))
+        self.max_pending = max_pending or int(os.getenv('ANSWER_MAX_PENDING', '32'))
+        if self.max_pending < self.max_workers:
+            self.max_pending = self.max_workers
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='answer-worker'
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, str] = {}
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, question: str, **kwargs) -> Tuple[str, Future]:
+        """Queue a question for answering.
+
+        Args:
+            question (str): The question to answer
+            **kwargs: Extra keyword arguments passed to the handler
+
+        Returns:
+            tuple: Correlation ID and the future holding the answer
+
+        Raises:
+            DispatcherSaturated: If the pending limit has been reached
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise DispatcherSaturated(
+                f"{self.max_pending} questions already pending"
+            )
+
+        request_id = uuid.uuid4().hex
+        with self._lock:
+            self._in_flight[request_id] = question
+
+        try:
+            future = self._executor.submit(self._run, request_id, question, kwargs)
+        except Exception:
+            self._release(request_id)
+            raise
+
+        future.add_done_callback(lambda _: self._release(request_id))
+        return request_id, future
+
+    def _run(self, request_id: str, question: str, kwargs: dict) -> Optional[str]:
+        """Answer a question inside a worker thread."""
+        logger.info(f"[{request_id[:8]}] Processing question: {question}")
+        return self.handler(question, **kwargs)
+
+    def _release(self, request_id: str):
+        """Free the slot held by a finished question."""
+        with self._lock:
+            if self._in_flight.pop(request_id, None) is None:
+                return
+            self._completed += 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the dispatcher state."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": len(self._in_flight),
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting questions and shut down the worker pool."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import threading
+from array import array
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 4096, depth: int = 4):
+        """Initialize a count-min sketch.
+
+        Counts are kept in depth rows of width counters, each row indexed by
+        a different hash of the key. A key's estimate is the smallest of its
+        counters: never below the true count, and above it only by the
+        collisions in its least crowded row.
+
+        Args:
+            width (int): Counters per row
+            depth (int): Rows, i.e. independent hashes per key
+        """
+        self.width = width
+        self.depth = depth
+        self._rows = [array('L', bytes(array('L').itemsize * width)) for _ in range(depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count a key and return its new estimate."""
+        estimate = None
+        for row, column in zip(self._rows, self._columns(key)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """Return the estimated count of a key."""
+        return min(row[column] for row, column in zip(self._rows, self._columns(key)))
+
+    def halve(self):
+        """Halve every counter, so old traffic counts for less than new."""
+        for row in self._rows:
+            row[:] = array('L', (value >> 1 for value in row))
+
+    def _columns(self, key: str) -> List[int]:
+        # One digest split into depth independent 32-bit hashes
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[i:i + 4], 'little') % self.width for i in range(0, 4 * self.depth, 4)]
+
+
+def worker_path(path: Optional[str]) -> Optional[str]:
+    """Return the state file for this worker of a multi-process server.
+
+    Each worker counts only the requests it serves, so workers saving to
+    one file would overwrite each other's counts. serve.py numbers its
+    workers in WEB_WORKER_INDEX, and worker i uses popularity.i.json in
+    place of popularity.json. A replacement worker takes over its
+    predecessor's number and file.
+    """
+    index = os.getenv('WEB_WORKER_INDEX')
+    if not path or index is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}{ext}"
+
+
+class QuestionPopularity:
+    def __init__(self, top_k: Optional[int] = None, decay_every: Optional[int] = None,
+                 path: Optional[str] = None, width: int = 4096, depth: int = 4):
+        """Initialize the question popularity tracker.
+
+        Every question asked is counted in a count-min sketch, and the top_k
+        questions with the highest estimates are kept by name, so memory is
+        bounded however many distinct questions arrive. Every decay_every
+        questions all counts are halved, so the list follows recent traffic.
+
+        Args:
+            top_k (int): Popular questions kept, defaults to POPULARITY_TOP_K
+                or 256 (0 disables tracking)
+            decay_every (int): Questions between halvings, defaults to
+                POPULARITY_DECAY_EVERY or 100000
+            path (str): JSON file the popular questions are saved to and
+                loaded from at startup, defaults to POPULARITY_STATE_PATH;
+                under serve.py each worker keeps its own file, see worker_path
+            width (int): Counters per sketch row
+            depth (int): Sketch rows
+        """
+        self.top_k = top_k if top_k is not None else int(os.getenv('POPULARITY_TOP_K', '256'))
+        self.decay_every = decay_every if decay_every is not None else int(os.getenv('POPULARITY_DECAY_EVERY', '100000'))
+        self.path = path if path is not None else worker_path(os.getenv('POPULARITY_STATE_PATH'))
+        self._sketch = CountMinSketch(width, depth)
+        self._top: Dict[str, int] = {}
+        # Smallest count in a full top list; a question must beat it to get in
+        self._floor = 0
+        self._since_decay = 0
+        self._total = 0
+        self._lock = threading.Lock()
+        if self.path:
+            self.load()
+
+    def record(self, key: str):
+        """Count one request for a normalized question."""
+        if self.top_k <= 0 or not key:
+            return
+        with self._lock:
+            self._total += 1
+            count = self._sketch.add(key)
+            if key in self._top:
+                self._top[key] = count
+            elif len(self._top) < self.top_k:
+                self._top[key] = count
+                if len(self._top) == self.top_k:
+                    self._floor = min(self._top.values())
+            elif count > self._floor:
+                # Counts only grow between decays, so the floor may be stale but never too high
+                coldest = min(self._top, key=self._top.get)
+                if count > self._top[coldest]:
+                    del self._top[coldest]
+                    self._top[key] = count
+                self._floor = min(self._top.values())
+            self._since_decay += 1
+            if self.decay_every > 0 and self._since_decay >= self.decay_every:
+                self._decay()
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return up to limit (question, estimated count) pairs, most asked first."""
+        with self._lock:
+            ranked = sorted(self._top.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit is not None else ranked
+
+    def stats(self, limit: int = 20) -> dict:
+        """Return the number of questions counted and the most popular ones."""
+        with self._lock:
+            total = self._total
+            tracked = len(self._top)
+        return {
+            "questions": total,
+            "tracked": tracked,
+            "top": [{"question": key, "count": count} for key, count in self.top(limit)]
+        }
+
+    def save(self):
+        """Write the popular questions to path, if set."""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            temp = f"{self.path}.tmp"
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump({"top": self.top()}, f)
+            os.replace(temp, self.path)
+        except Exception as e:
+            logger.error(f"Could not save question popularity to {self.path}: {e}")
+
+    def load(self):
+        """Seed the counts from questions saved by a previous run."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Could not load question popularity from {self.path}: {e}")
+            return
+        with self._lock:
+            for key, count in saved.get("top", [])[:self.top_k]:
+                self._top[key] = self._sketch.add(key, int(count))
+            self._floor = min(self._top.values()) if len(self._top) >= self.top_k else 0
+        logger.info(f"Loaded {len(self._top)} popular questions from {self.path}")
+
+    def _decay(self):
+        """Halve every count. Caller holds the lock."""
+        self._sketch.halve()
+        self._top = {key: count >> 1 for key, count in self._top.items() if count > 1}
+        self._floor = min(self._top.values()) if len(self._top) >= self.top_k else 0
+        self._since_decay = 0
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+from loguru import logger
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """Initialize a token bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (float): Bucket capacity, defaults to one second of tokens
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token, returning how long the caller must wait before using it.
+
+        The token is reserved even when the bucket is empty, so callers that
+        sleep for the returned delay are served in arrival order.
+
+        Args:
+            max_wait (float): Longest acceptable wait; if the token would
+                take longer, nothing is reserved and None is returned
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = _wait_for(self._tokens - 1, self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self):
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _wait_for(tokens: float, rate: float) -> float:
+    """Seconds until a bucket holding tokens (possibly negative) is back at zero."""
+    return 0.0 if tokens >= 0 else -tokens / rate
+
+
+class SharedTokenBucket:
+    def __init__(self, path: str, name: str, rate: float, burst: Optional[float] = None):
+        """Initialize a token bucket whose state is shared between processes.
+
+        The bucket lives in a row of a SQLite database, so every worker
+        process of a multi-process server draws from the same budget.
+        Each reservation is one short write transaction.
+
+        Args:
+            path (str): SQLite file holding the bucket state
+            name (str): Bucket name (the backend)
+            rate (float): Tokens added per second
+            burst (float): Bucket capacity, defaults to one second of tokens
+        """
+        self.path = path
+        self.name = name
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token, returning how long the caller must wait before using it.
+
+        Args:
+            max_wait (float): Longest acceptable wait; if the token would
+                take longer, nothing is reserved and None is returned
+        """
+        with self._lock:
+            conn = self._connect()
+            # Wall-clock time, since monotonic clocks are not comparable across processes
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (self.capacity, now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+                wait = _wait_for(tokens - 1, self.rate)
+                if max_wait is not None and wait > max_wait:
+                    conn.execute('ROLLBACK')
+                    return None
+                conn.execute(
+                    'INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                    (self.name, tokens - 1, now)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def acquire(self):
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this process's connection; a forked child opens its own. Caller holds the lock."""
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5,
+                                         isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, float]] = None, path: Optional[str] = None):
+        """Initialize per-backend rate limits.
+
+        Args:
+            limits (dict): Requests per second by backend name; backends
+                without a positive limit are not throttled
+            path (str): SQLite file to share the limits between processes,
+                None to keep them in this process
+        """
+        limits = {name: rate for name, rate in (limits or {}).items() if rate and rate > 0}
+        self._lock = threading.Lock()
+        self._throttled: Dict[str, int] = {name: 0 for name in limits}
+        self._rejected: Dict[str, int] = {name: 0 for name in limits}
+        self._waited: Dict[str, float] = {name: 0.0 for name in limits}
+        if path:
+            self._buckets = {name: SharedTokenBucket(path, name, rate) for name, rate in limits.items()}
+        else:
+            self._buckets = {name: TokenBucket(rate) for name, rate in limits.items()}
+
+    @classmethod
+    def from_env(cls, backends) -> "RateLimiter":
+        """Read <BACKEND>_RATE_LIMIT (requests per second) for each backend.
+
+        RATE_LIMIT_STATE_PATH, when set, shares the budgets between processes.
+        """
+        return cls({
+            name: float(os.getenv(f"{name.upper()}_RATE_LIMIT", '0'))
+            for name in backends
+        }, path=os.getenv('RATE_LIMIT_STATE_PATH'))
+
+    def reserve(self, name: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve a request slot for a backend and return the wait in seconds.
+
+        Args:
+            name (str): Backend name
+            max_wait (float): Longest acceptable wait; None (the default)
+                waits as long as needed
+
+        Returns:
+            float: Seconds to wait before calling, or None if the backend is
+                over its limit for longer than max_wait (nothing is reserved)
+        """
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            return 0.0
+        try:
+            wait = bucket.reserve(max_wait)
+        except Exception as e:
+            # A locked or unreadable shared store should not stop the search
+            logger.error(f"Error reserving a {name} rate limit token: {e}")
+            return 0.0
+        with self._lock:
+            if wait is None:
+                self._rejected[name] += 1
+            elif wait > 0:
+                self._throttled[name] += 1
+                self._waited[name] += wait
+        return wait
+
+    def acquire(self, name: str):
+        """Block until the backend may be called."""
+        wait = self.reserve(name)
+        if wait > 0:
+            time.sleep(wait)
+
+    def limits(self) -> Dict[str, float]:
+        """Return the configured requests-per-second limits."""
+        return {name: bucket.rate for name, bucket in self._buckets.items()}
+
+    def stats(self) -> Dict[str, dict]:
+        """Return per-backend limits with throttled and rejected call counts."""
+        with self._lock:
+            return {
+                name: {
+                    "rate": bucket.rate,
+                    "throttled": self._throttled[name],
+                    "wait_seconds": round(self._waited[name], 3),
+                    "rejected": self._rejected[name]
+                }
+                for name, bucket in self._buckets.items()
+            }
@@ -1,385 +1,912 @@
 import requests
-from bs4 import BeautifulSoup
 from loguru import logger
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional, Tuple
 import re
+import threading
 import time
 import urllib.parse
 import os
 import json
+import random
+
+from services.answer_aggregator import SERP_FIELD_WEIGHTS, create_answer_aggregator
+from services.answer_cache import AnswerCache
+from services.answer_extractor import AnswerExtractor
+from services.backend_health import ANSWERED, EMPTY, ERROR, BackendError, BackendHealth
+from services.backend_stats import BackendStats
+from services.cache_refresher import create_cache_refresher
+from services.content_encoding import ContentDecoder, accept_encoding
+from services.html_parser import AnswerRegion, ResultPageParser
+from services.http_recorder import HttpRecorder
+from services.knowledge_base import KnowledgeBase, load_knowledge_base
+from services.local_solvers import LocalSolvers
+from services.metrics import metrics
+from services.question_popularity import QuestionPopularity
+from services.rate_limiter import RateLimiter
+from services.single_flight import SingleFlight
+from services.text_normalization import normalize_question
+
+SEARCH_MODES = ('sequential', 'race', 'hedge')
+BACKEND_NAMES = ('serp_api', 'google', 'duckduckgo')
+
+# Receives (event name, event data) as a question is resolved
+EventCallback = Callable[[str, dict], None]
+
+# Modern Google selectors
+GOOGLE_SELECTORS = [
+    'div[data-tts="answers"]',
+    'div[data-attrid*="description"]',
+    'div[data-attrid*="answer"]',
+    'span.ILfuVd',
+    'div.wDYxhc',
+    'div.kno-rdesc',
+    'div.LGOjhe',
+    'div.hgKElc',
+    'div.FzvWSb',
+    'div.IZ6rdc',
+    'div.gsrt',
+    'div.Z0LcW',
+    'div.zCubwf',
+    'div.XcVN5d',
+    'div.PZPZlf',
+    'div.iKJnec',
+    'div.card-section'
+]
+
+# The first Google selectors match the featured answer box rather than result snippets
+GOOGLE_FEATURED_SELECTORS = 3
+# DuckDuckGo snippets are links or divs depending on the page layout
+DUCKDUCKGO_ANSWER_SELECTORS = 2
+# Organic results the Search API is asked for
+SERP_API_RESULTS = 3
+# Characters of a sampled response body written to the log
+LOG_SAMPLE_CHARS = 2000
+
+# DuckDuckGo selectors
+DUCKDUCKGO_SELECTORS = [
+    'div.result__snippet',
+    'a.result__snippet',
+    'div.result__body',
+    'div.result__title'
+]
+
+@dataclass
+class SearchResult:
+    """Outcome of answering one question."""
+    question: str
+    answer: Optional[str]
+    # A local solver ('math', 'units', 'calendar'), 'knowledge_base', 'cache',
+    # 'similar' (a rephrased cached question) or the backend that answered
+    source: Optional[str] = None
+    latency: float = 0.0
+    # With ANSWER_AGGREGATION, the share of candidate weight (0-1) that agrees
+    # with the answer and the backend fields it came from
+    confidence: Optional[float] = None
+    sources: List[str] = field(default_factory=list)
 
 class SearchService:
-    def __init__(self):
-        """Initialize search service."""
+    def __init__(self, search_mode: Optional[str] = None, hedge_delay: Optional[float] = None,
+                 cache: Optional[AnswerCache] = None,
+                 knowledge_base: Optional[KnowledgeBase] = None):
+        """Initialize search service.
+        
+        Args:
+            search_mode (str): How backends are combined: 'sequential' tries them
+                one after another, 'race' starts them all at once and 'hedge'
+                starts each fallback after hedge_delay seconds
+            hedge_delay (float): Seconds to wait on a backend before hedging
+            cache (AnswerCache): Answer cache consulted before the backends,
+                configured from the environment when omitted
+            knowledge_base (KnowledgeBase): Local fact store consulted before
+                the cache, loaded from KNOWLEDGE_BASE_PATH when omitted
+        """
         self.api_key = os.getenv('SERP_API_KEY')
         if not self.api_key:
             logger.warning("SERP API key not found in environment variables. Using fallback search methods.")
         else:
             logger.info(f"SERP API key found: {self.api_key[:4]}...{self.api_key[-4:]}")
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-        })
+        self.search_mode = (search_mode or os.getenv('SEARCH_MODE', 'sequential')).lower()
+        if self.search_mode not in SEARCH_MODES:
+            logger.warning(f"Unknown search mode '{self.search_mode}', using sequential")
+            self.search_mode = 'sequential'
+        self.hedge_delay = hedge_delay if hedge_delay is not None else float(os.getenv('SEARCH_HEDGE_DELAY', '1.0'))
+        self.backend_stats = BackendStats()
+        self.health = BackendHealth()
+        self.rate_limiter = RateLimiter.from_env(BACKEND_NAMES)
+        # A backend whose limit would hold a call back longer than this is skipped for the next one
+        self.rate_limit_max_wait = float(os.getenv('RATE_LIMIT_MAX_WAIT', '1.0'))
+        # Identical questions asked at the same time share one backend search
+        self.coalesce = os.getenv('SEARCH_COALESCE', 'true').lower() not in ('0', 'false', 'no', 'off')
+        self.inflight = SingleFlight()
+        self.cache = cache if cache is not None else AnswerCache()
+        self.knowledge_base = knowledge_base if knowledge_base is not None else load_knowledge_base()
+        # Arithmetic, unit conversion and calendar questions never need the network
+        self.local_solvers = LocalSolvers()
+        # Imported here so numpy is only loaded once a search service is built
+        from services.semantic_cache import create_semantic_cache
+        self.similar_questions = create_semantic_cache()
+        self.extractor = AnswerExtractor(max_snippets=int(os.getenv('SEARCH_MAX_SNIPPETS', '3')))
+        # Votes across every answer field and snippet instead of taking the first field
+        self.aggregator = create_answer_aggregator(self.extractor)
+        # Below this confidence, the next backend is asked too and the answers are voted on together
+        self.min_confidence = float(os.getenv('AGGREGATION_MIN_CONFIDENCE', '0'))
+        max_matches = self.extractor.max_snippets
+        if self.aggregator is not None:
+            max_matches = max(max_matches, self.aggregator.max_candidates)
+        self.google_parser = ResultPageParser(GOOGLE_SELECTORS, min_length=1, max_matches=max_matches)
+        self.duckduckgo_parser = ResultPageParser(DUCKDUCKGO_SELECTORS, min_length=15, max_matches=max_matches)
+        self.max_body_bytes = int(os.getenv('SEARCH_MAX_BODY_BYTES', '0'))
+        # Result pages are read only until their answer region has been received
+        self.stop_at_answer = os.getenv('SEARCH_STOP_AT_ANSWER', 'true').lower() not in ('0', 'false', 'no', 'off')
+        # Ask the Search API for just the fields the answer is taken from
+        self.serp_api_fields = os.getenv('SERP_API_RESTRICT_FIELDS', 'false').lower() in ('1', 'true', 'yes', 'on')
+        # Fraction of responses whose status, headers and start of body are logged
+        self.log_sample_rate = float(os.getenv('SEARCH_LOG_SAMPLE_RATE', '0'))
+        self._backend_executor = None
+        self._executor_lock = threading.Lock()
+        
+        # requests.Session is not thread-safe, so each thread gets its own
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+            'Accept-Encoding': accept_encoding()
+        }
+        self._local = threading.local()
+        # Records or replays backend responses when SEARCH_HTTP_MODE is set
+        self.http_recorder = HttpRecorder.from_env()
+        # Counts questions so the most popular answers can be kept fresh in the cache
+        self.popularity = QuestionPopularity()
+        self.last_request = 0.0
+        self.refresher = create_cache_refresher(self, self.popularity)
 
-    def search_for_answer(self, question: str) -> Optional[str]:
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session for the calling thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            if self.http_recorder is not None:
+                self.http_recorder.mount(session)
+            self._local.session = session
+        return session
+
+    def search_for_answer(self, question: str, on_event: Optional[EventCallback] = None) -> Optional[str]:
         """Search for an answer to the given question."""
+        return self.resolve(question, on_event).answer
+
+    def resolve(self, question: str, on_event: Optional[EventCallback] = None,
+                speculative: Optional[threading.Event] = None) -> SearchResult:
+        """Answer a question and report which source answered it.
+
+        Args:
+            question (str): The question to answer
+            on_event (callable): Called with (event, data) as the search
+                progresses: 'hit' for a math, knowledge base or cache answer,
+                'trying' when a backend is called, 'candidate' or 'no_answer'
+                (with the error, if it failed) when it returns, 'skipped' for
+                a backend whose circuit breaker is open or that is over its
+                rate limit, 'coalesced' when the answer came from an identical
+                question's search already in flight, and finally 'answer'
+                (with confidence and sources when answers are aggregated).
+                Backend events may arrive from worker threads.
+            speculative (threading.Event): Marks a search for a partial
+                transcript. Its outcome is not cached, indexed or counted as
+                a request unless passed to commit, and backends not yet
+                called are skipped once the event is set.
+
+        Returns:
+            SearchResult: The answer and where it came from
+        """
+        start = time.perf_counter()
+        self.last_request = time.monotonic()
+        emit = self._event_emitter(on_event, start)
         try:
-            # Handle basic math questions first
-            if self._is_math_question(question):
-                answer = self._calculate_math(question)
-                if answer:
-                    return answer
-            
-            # Try SERP API if available
-            if self.api_key:
-                answer = self._serp_api_search(question)
-                if answer:
-                    return answer
-            
-            # Fallback to Google
-            answer = self._google_search(question)
-            if answer:
-                return answer
+            result = self._local_answer(question)
+            if result is not None:
+                emit('hit', source=result.source, answer=result.answer)
+            elif speculative is not None:
+                # Not shared, so no asked question ends up waiting on an abandoned speculation
+                result = self._search_backends(question, emit, speculative)
+            elif not self.coalesce:
+                result = self._search_backends(question, emit)
+            else:
+                result, shared = self.inflight.do(
+                    normalize_question(question), lambda: self._search_backends(question, emit)
+                )
+                if shared:
+                    result = replace(result, question=question)
+                    metrics.observe('search.coalesced_wait', time.perf_counter() - start)
+                    emit('coalesced', source=result.source, answer=result.answer)
             
-            # Finally try DuckDuckGo
-            logger.info("Falling back to DuckDuckGo search")
-            answer = self._duckduckgo_search(question)
+        except Exception as e:
+            logger.error(f"Unexpected error during search: {e}")
+            result = SearchResult(question, None)
+        result.latency = time.perf_counter() - start
+        metrics.observe('search.resolve', result.latency)
+        if speculative is None:
+            self._track_request(question, result)
+        self._emit_answer(emit, result)
+        return result
+
+    def commit(self, question: str, result: SearchResult) -> SearchResult:
+        """Record a speculative search's result as the answer to a question that was asked.
+
+        A backend answer is cached and indexed as resolve would have done,
+        and the question is counted as a request. A speculation without an
+        answer is not cached, since its search may have been cut short.
+
+        Returns:
+            SearchResult: The result, for the asked question
+        """
+        result = replace(result, question=question)
+        if result.answer and result.source in BACKEND_NAMES:
+            self._store_result(question, result)
+        self._track_request(question, result)
+        return result
+
+    def refresh(self, question: str) -> Optional[SearchResult]:
+        """Search the backends for a question again and cache the new answer.
+
+        Used by the cache refresher, so no events are emitted and the
+        question is not counted as a request. A request for the same
+        question arriving meanwhile waits for this search.
+
+        Returns:
+            SearchResult: The outcome, or None if a local solver or the
+                knowledge base answers the question without searching
+        """
+        if self._answers_locally(question):
+            return None
+        emit = self._event_emitter(None, time.perf_counter())
+        result, _ = self.inflight.do(normalize_question(question), lambda: self._search_backends(question, emit))
+        return result
+
+    def _answers_locally(self, question: str) -> bool:
+        """True if a local solver or the knowledge base answers a question."""
+        if self.local_solvers.solve(question) is not None:
+            return True
+        return self.knowledge_base is not None and bool(self.knowledge_base.lookup(question))
+
+    def start_refresher(self):
+        """Start keeping popular answers fresh in the background, if CACHE_REFRESH_BUDGET is set."""
+        if self.refresher is not None:
+            self.refresher.start()
+
+    def _track_request(self, question: str, result: SearchResult):
+        """Count a request towards its question's popularity."""
+        self.last_request = time.monotonic()
+        key = normalize_question(question)
+        self.popularity.record(key)
+        if self.refresher is not None:
+            self.refresher.record(key, result.source)
+
+    def _emit_answer(self, emit: Callable[..., None], result: SearchResult):
+        """Emit the final 'answer' event for a resolved question."""
+        if result.confidence is not None:
+            emit('answer', answer=result.answer, source=result.source,
+                 confidence=result.confidence, sources=result.sources)
+        else:
+            emit('answer', answer=result.answer, source=result.source)
+
+    def _event_emitter(self, on_event: Optional[EventCallback], start: float) -> Callable[..., None]:
+        """Build the emit(event, **data) function used while resolving one question.
+
+        Every event carries the seconds elapsed since start. The first event
+        with an answer is recorded as the question's time to first answer.
+        """
+        lock = threading.Lock()
+        answered = []
+
+        def emit(event: str, **data):
+            elapsed = time.perf_counter() - start
+            if data.get('answer'):
+                with lock:
+                    first = not answered
+                    answered.append(event)
+                if first:
+                    self.backend_stats.record_first_answer(elapsed)
+            if on_event is None:
+                return
+            data['elapsed'] = round(elapsed, 4)
+            try:
+                on_event(event, data)
+            except Exception as e:
+                logger.warning(f"Search event callback failed: {e}")
+
+        return emit
+
+    def _local_answer(self, question: str) -> Optional[SearchResult]:
+        """Answer without the network when possible.
+
+        Returns:
+            SearchResult: The answer, or None when the backends are needed
+        """
+        # Calculate arithmetic, unit conversions and dates first
+        solved = self.local_solvers.solve(question)
+        if solved is not None:
+            source, answer = solved
+            return SearchResult(question, answer, source)
+        
+        # Answer well-known facts from the local knowledge base
+        if self.knowledge_base is not None:
+            answer = self.knowledge_base.lookup(question)
             if answer:
-                return answer
-            
+                logger.info(f"Found answer in knowledge base: {answer}")
+                return SearchResult(question, answer, 'knowledge_base')
+        
+        # Reuse a previous answer for the same question
+        cache_key = normalize_question(question)
+        found, answer = self.cache.lookup(cache_key)
+        if found:
+            logger.info(f"Answer cache hit for: {cache_key}")
+            return SearchResult(question, answer, 'cache')
+
+        # Reuse the answer to a differently worded question asked before
+        if self.similar_questions is not None:
+            with metrics.span('cache.similar'):
+                match = self.similar_questions.match(question)
+            if match is not None:
+                similar_key, score = match
+                found, answer = self.cache.lookup(similar_key)
+                if found and answer:
+                    logger.info(f"Similar question cache hit ({score:.2f}): {cache_key} -> {similar_key}")
+                    return SearchResult(question, answer, 'similar')
+                # The answer has expired or been evicted since
+                self.similar_questions.discard(similar_key)
+        return None
+
+    def _search_backends(self, question: str, emit: Callable[..., None],
+                         speculative: Optional[threading.Event] = None) -> SearchResult:
+        """Search the backends with the configured mode and cache the outcome unless speculative."""
+        if self.search_mode == 'sequential':
+            source, answer = self._search_sequential(question, emit, speculative)
+        else:
+            delay = 0.0 if self.search_mode == 'race' else self.hedge_delay
+            source, answer = self._search_concurrent(question, delay, emit, speculative)
+        return self._finish_search(question, source, answer, record=speculative is None)
+
+    def _finish_search(self, question: str, source: Optional[str], answer: Optional[str],
+                       record: bool = True) -> SearchResult:
+        """Build the result of a backend search and, if record is set, cache it."""
+        if answer:
+            result = SearchResult(question, answer, source, confidence=getattr(answer, 'confidence', None),
+                                  sources=list(getattr(answer, 'sources', [])))
+        else:
             logger.warning("No suitable answer found from any search method")
-            return None
-            
+            result = SearchResult(question, None)
+        if record:
+            self._store_result(question, result)
+        return result
+
+    def _store_result(self, question: str, result: SearchResult):
+        """Cache a backend search's answer and index its question for similar questions."""
+        cache_key = normalize_question(question)
+        if result.answer:
+            # Cache the plain text, not the candidates an aggregated answer carries
+            self.cache.store(cache_key, str(result.answer))
+            if self.similar_questions is not None:
+                self.similar_questions.add(question, cache_key)
+        # While a backend is failing, "no answer" may just mean it was not asked
+        elif not self.health.degraded():
+            self.cache.store(cache_key, None)
+
+    def get_backend_stats(self) -> dict:
+        """Return per-backend latency and win-rate statistics."""
+        stats = {
+            "mode": self.search_mode,
+            "hedge_delay": self.hedge_delay,
+            "backends": self.backend_stats.snapshot(),
+            "health": self.health.snapshot([name for name, _ in self._backends()]),
+            "order": [name for name, _ in self.health.order(self._backends())],
+            "coalesced": self.inflight.coalesced,
+            "rate_limits": self.rate_limiter.stats(),
+            "time_to_first_answer": self.backend_stats.first_answer_snapshot()
+        }
+        if self.http_recorder is not None:
+            stats["http"] = self.http_recorder.stats()
+        return stats
+
+    def get_cache_stats(self) -> dict:
+        """Return answer cache hit/miss/eviction counters."""
+        stats = self.cache.stats()
+        if self.similar_questions is not None:
+            stats["similar"] = self.similar_questions.stats()
+        stats["popular"] = self.popularity.stats()
+        if self.refresher is not None:
+            stats["refresh"] = self.refresher.stats()
+        return stats
+
+    def close(self):
+        """Stop the cache refresher and shut down the pool used for concurrent backend calls."""
+        if self.refresher is not None:
+            self.refresher.stop()
+        self.popularity.save()
+        with self._executor_lock:
+            executor = self._backend_executor
+            self._backend_executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _backends(self) -> List[Tuple[str, Callable[[str], Optional[str]]]]:
+        """Return the search backends in priority order."""
+        backends = []
+        if self.api_key:
+            backends.append(('serp_api', self._serp_api_search))
+        backends.append(('google', self._google_search))
+        backends.append(('duckduckgo', self._duckduckgo_search))
+        return backends
+
+    def _run_backend(self, name: str, backend: Callable[[str], Optional[str]], question: str,
+                     emit: Callable[..., None], wait: float = 0.0) -> Optional[str]:
+        """Call a backend admitted by _admit_backend and record its latency and health.
+
+        Args:
+            wait (float): Seconds to hold back for the backend's rate limit
+        """
+        if wait > 0:
+            metrics.observe('search.throttle_wait', wait, name)
+            time.sleep(wait)
+        emit('trying', backend=name)
+        start = time.perf_counter()
+        answer = None
+        error = None
+        try:
+            answer = backend(question)
         except Exception as e:
-            logger.error(f"Unexpected error during search: {e}")
+            error = str(e) or type(e).__name__
+            logger.error(f"Error during {name} search: {error}")
+        latency = time.perf_counter() - start
+        self.backend_stats.record_call(name, latency, bool(answer))
+        self.health.record(name, latency, ERROR if error else ANSWERED if answer else EMPTY, error)
+        if answer:
+            emit('candidate', backend=name, answer=answer)
+        else:
+            emit('no_answer', backend=name, error=error)
+        return answer
+
+    def _admit_backend(self, name: str, emit: Callable[..., None], last: bool = False) -> Optional[float]:
+        """Decide whether a backend may be called for this question.
+
+        A backend is skipped while its circuit breaker is open, or when its
+        rate limit would hold the call back for more than
+        rate_limit_max_wait seconds and another backend can be tried instead.
+
+        Args:
+            last (bool): No backend follows this one, so wait for the rate limit however long it takes
+
+        Returns:
+            float: Seconds to wait for the rate limit, or None to skip the backend
+        """
+        if not self.health.allow(name):
+            logger.info(f"Skipping {name} search, circuit open")
+            emit('skipped', backend=name, reason='circuit_open')
             return None
+        wait = self.rate_limiter.reserve(name, None if last else self.rate_limit_max_wait)
+        if wait is None:
+            # The claimed half-open probe, if any, was not used
+            self.health.release(name)
+            logger.info(f"Skipping {name} search, over its rate limit")
+            emit('skipped', backend=name, reason='rate_limited')
+        return wait
+
+    def _search_sequential(self, question: str, emit: Callable[..., None],
+                           speculative: Optional[threading.Event] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Try each healthy backend, best ranked first, until one answers.
+
+        With answer aggregation, an answer below min_confidence does not stop
+        the search; the next backend is asked and all answers are voted on.
+        An abandoned speculative search calls no further backends.
+
+        Returns:
+            tuple: (backend name, answer), or (None, None)
+        """
+        backends = self.health.order(self._backends())
+        tried = 0
+        answers = []
+        for index, (name, backend) in enumerate(backends):
+            if speculative is not None and speculative.is_set():
+                break
+            wait = self._admit_backend(name, emit, last=index == len(backends) - 1)
+            if wait is None:
+                continue
+            if tried > 0:
+                logger.info(f"Falling back to {name} search")
+            tried += 1
+            answer = self._run_backend(name, backend, question, emit, wait)
+            if answer:
+                answers.append((name, answer))
+                if self._confident(answer):
+                    break
+        return self._pick_answer(question, answers)
+
+    def _confident(self, answer: str) -> bool:
+        """True if an answer is good enough to stop asking further backends."""
+        return self.aggregator is None or getattr(answer, 'confidence', 1.0) >= self.min_confidence
+
+    def _pick_answer(self, question: str, answers: List[Tuple[str, str]]) -> Tuple[Optional[str], Optional[str]]:
+        """Return the winning (backend name, answer) of several, best ranked first, and record the win.
+
+        With answer aggregation the candidates of all answers are voted on
+        together; otherwise the first answer wins.
+        """
+        if not answers:
+            return None, None
+        name, answer = answers[0]
+        if len(answers) > 1 and self.aggregator is not None:
+            with metrics.span('answer.aggregate', 'merge'):
+                merged = self.aggregator.merge(question, [answer for _, answer in answers])
+            if merged is not None:
+                name, answer = merged.backend, merged
+        self.backend_stats.record_win(name)
+        return name, answer
+
+    def _get_backend_executor(self) -> ThreadPoolExecutor:
+        """Return the shared pool used for concurrent backend calls."""
+        with self._executor_lock:
+            if self._backend_executor is None:
+                self._backend_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('SEARCH_BACKEND_THREADS', '16')),
+                    thread_name_prefix='search-backend'
+                )
+            return self._backend_executor
+
+    def _search_concurrent(self, question: str, hedge_delay: float, emit: Callable[..., None],
+                           speculative: Optional[threading.Event] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Run backends concurrently and return the first (backend name, answer).
+
+        Healthy backends are started in ranked order, each one hedge_delay
+        seconds after the previous (or immediately once the previous one
+        fails). The first answer to arrive wins; when several are ready
+        together the higher-ranked backend wins, or with answer aggregation
+        they are voted on together. An aggregated answer below
+        min_confidence waits for the other backends too. Backends that have
+        not started yet are cancelled and late results are discarded. An
+        abandoned speculative search starts no further backends.
+        """
+        backends = self.health.order(self._backends())
+        executor = self._get_backend_executor()
+        running = {}
+        results = {}
+        launched = 0
+        next_launch = time.monotonic()
+
+        def launch():
+            nonlocal launched, next_launch
+            name, backend = backends[launched]
+            launched += 1
+            wait = self._admit_backend(name, emit, last=launched == len(backends))
+            if wait is None:
+                return
+            future = executor.submit(self._run_backend, name, backend, question, emit, wait)
+            running[future] = launched - 1
+            next_launch = time.monotonic() + hedge_delay
 
-    def _serp_api_search(self, question: str) -> Optional[str]:
-        """Search using Search API."""
         try:
-            search_query = self._prepare_search_query(question)
-            logger.info(f"Searching with Search API: {search_query}")
-            
-            url = 'https://www.searchapi.io/api/v1/search'
-            headers = {
-                'Accept': 'application/json',
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
-            params = {
-                'q': search_query,
-                'engine': 'google',
-                'google_domain': 'google.com',
-                'gl': 'us',
-                'hl': 'en',
-                'num': '3'  # Get top 3 results for better context
-            }
-            
-            response = requests.get(
+            while True:
+                if speculative is not None and speculative.is_set():
+                    launched = len(backends)
+                while launched < len(backends) and (not running or time.monotonic() >= next_launch):
+                    launch()
+                if not running:
+                    return self._pick_answer(question, self._answered(backends, results))
+
+                timeout = None
+                if launched < len(backends):
+                    timeout = max(0.0, next_launch - time.monotonic())
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error in {backends[index][0]} search: {e}")
+                        results[index] = None
+
+                answered = self._answered(backends, results)
+                if answered and any(self._confident(answer) for _, answer in answered):
+                    return self._pick_answer(question, answered)
+        finally:
+            for future, index in running.items():
+                if future.cancel():
+                    self.backend_stats.record_cancel(backends[index][0])
+                    self.health.release(backends[index][0])
+
+    def _answered(self, backends: list, results: dict) -> List[Tuple[str, str]]:
+        """Return (backend name, answer) for the backends that answered, best ranked first."""
+        return [(backends[index][0], results[index]) for index in sorted(results) if results[index]]
+
+    def _serp_api_search(self, question: str) -> Optional[str]:
+        """Search using Search API.
+
+        Raises:
+            Exception: If the API could not be queried; _run_backend records it
+        """
+        url, headers, params = self._serp_api_request(question)
+        with metrics.span('search.network', 'serp_api'):
+            response = self.session.get(
                 url,
                 headers=headers,
                 params=params,
-                timeout=30
+                timeout=30,
+                stream=True
             )
-            
-            if response.status_code != 200:
-                logger.error(f"Search API error: {response.status_code}")
-                return None
+            body = self._read_body('serp_api', response, limit=False)
+        
+        if response.status_code != 200:
+            raise BackendError(f"Search API error: {response.status_code}")
 
-            data = response.json()
-            search_texts = []
-            
-            # Extract answer from answer box if available
-            if 'answer_box' in data:
-                answer_box = data['answer_box']
-                if isinstance(answer_box, dict):
-                    for field in ['answer', 'snippet', 'title', 'result']:
-                        if field in answer_box and answer_box[field]:
-                            return self._clean_answer(answer_box[field])
-
-            # Try knowledge graph next
-            if 'knowledge_graph' in data:
-                kg = data['knowledge_graph']
-                if isinstance(kg, dict):
-                    for field in ['description', 'answer', 'snippet', 'title']:
-                        if field in kg and kg[field]:
-                            return self._clean_answer(kg[field])
-
-            # Finally check organic results
-            if 'organic_results' in data and data['organic_results']:
-                for result in data['organic_results'][:3]:
-                    for field in ['snippet', 'title']:
-                        if field in result and result[field]:
-                            cleaned = self._clean_answer(result[field])
-                            if cleaned:
-                                return cleaned
+        with metrics.span('search.parse', 'serp_api'):
+            return self._parse_serp_api_response(json.loads(body), question)
 
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error during search: {e}")
-            return None
+    def _serp_api_request(self, question: str) -> Tuple[str, dict, dict]:
+        """Build the Search API URL, headers and query parameters."""
+        search_query = self._prepare_search_query(question)
+        logger.info(f"Searching with Search API: {search_query}")
+        
+        url = 'https://www.searchapi.io/api/v1/search'
+        headers = {
+            'Accept': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        
+        params = {
+            'q': search_query,
+            'engine': 'google',
+            'google_domain': 'google.com',
+            'gl': 'us',
+            'hl': 'en',
+            'num': str(SERP_API_RESULTS)  # Get top 3 results for better context
+        }
+        if self.serp_api_fields:
+            params['json_restrictor'] = serp_api_restrictor(SERP_API_RESULTS)
+        return url, headers, params
+
+    def _parse_serp_api_response(self, data: dict, question: str = '') -> Optional[str]:
+        """Extract an answer from a Search API JSON response."""
+        if self.aggregator is not None:
+            with metrics.span('answer.aggregate', 'serp_api'):
+                return self.aggregator.aggregate(question, self.aggregator.serp_candidates(data))
+
+        # Extract answer from answer box if available
+        if 'answer_box' in data:
+            answer_box = data['answer_box']
+            if isinstance(answer_box, dict):
+                for field in ['answer', 'snippet', 'title', 'result']:
+                    if field in answer_box and answer_box[field]:
+                        return self._clean_answer(answer_box[field])
+
+        # Try knowledge graph next
+        if 'knowledge_graph' in data:
+            kg = data['knowledge_graph']
+            if isinstance(kg, dict):
+                for field in ['description', 'answer', 'snippet', 'title']:
+                    if field in kg and kg[field]:
+                        return self._clean_answer(kg[field])
+
+        # Finally check organic results
+        if 'organic_results' in data and data['organic_results']:
+            for result in data['organic_results'][:SERP_API_RESULTS]:
+                for field in ['snippet', 'title']:
+                    if field in result and result[field]:
+                        cleaned = self._clean_answer(result[field])
+                        if cleaned:
+                            return cleaned
+
+        return None
 
     def _prepare_search_query(self, question: str) -> str:
         """Prepare the search query to improve results."""
-        # Remove question marks and clean up
-        question = question.strip('?').strip().lower()
+        with metrics.span('search.query_prep'):
+            # Remove question marks and clean up
+            question = normalize_question(question)
         
-        # Special handling for math questions
-        if re.search(r'\d[\s+\-*/]\d', question):
-            return f"calculator {question}"
-
-        # For questions asking about "most", "biggest", etc.
-        superlative_pattern = r'\b(?:largest|biggest|highest|most|best)\b'
-        if re.search(superlative_pattern, question):
-            return f"{question} facts confirmed"
-
-        # For questions starting with common question words
-        if question.startswith(('what', 'when', 'who', 'where', 'which', 'how')):
-            return f"{question} facts direct answer"
+            # Arithmetic the local solvers could not parse is left to the search engine's calculator
+            if re.search(r'\d\s*[+*/^]\s*\d|\d\s+-\s+\d', question):
+                return f"calculator {question}"
+
+            # For questions asking about "most", "biggest", etc.
+            superlative_pattern = r'\b(?:largest|biggest|highest|most|best)\b'
+            if re.search(superlative_pattern, question):
+                return f"{question} facts confirmed"
+
+            # For questions starting with common question words
+            if question.startswith(('what', 'when', 'who', 'where', 'which', 'how')):
+                return f"{question} facts direct answer"
         
-        return question
+            return question
 
     def _clean_answer(self, text: str) -> str:
         """Clean up the answer text."""
-        if not text:
-            return None
-            
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common prefixes
-        prefixes = [
-            'Search Results',
-            'Featured snippet from the web',
-            'Web results',
-            'People also ask',
-            'Description',
-            'Overview',
-            'Quick Answer',
-            'Top answer:',
-            'Advertisement',
-            'According to',
-            'Below, we\'ve compiled',
-            'Here are',
-            'In this article'
-        ]
-        for prefix in prefixes:
-            if text.lower().startswith(prefix.lower()):
-                text = text[len(prefix):].strip()
-        
-        # Remove citations and URLs
-        text = re.sub(r'\[\d+\]', '', text)
-        text = re.sub(r'http\S+', '', text)
-
-        # Split into sentences
-        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-        if not sentences:
-            return text.strip()
-
-        # Score each sentence based on information density and relevance
-        scored_sentences = []
-        for sentence in sentences:
-            score = 0
-            lower_sentence = sentence.lower()
-            
-            # Filter out non-answers and meta-text
-            if any(word in lower_sentence for word in ['click here', 'read more', 'learn more', 'find out', 'subscribe']):
-                continue
-            
-            # Prefer sentences with specific facts
-            if re.search(r'\d', sentence):  # Contains numbers
-                score += 3
-            if re.search(r'\b(?:19|20)\d{2}\b', sentence):  # Contains years
-                score += 2
-            if re.search(r'\$\s*\d+(?:\.\d+)?', sentence):  # Contains monetary values
-                score += 2
-            
-            # Prefer sentences that directly answer questions
-            if re.search(r'\b(?:is|are|was|were|has|have|had)\b', lower_sentence):
-                score += 2
-            
-            # Prefer sentences with key information indicators
-            if re.search(r'\b(?:because|therefore|thus|hence|since|due to)\b', lower_sentence):
-                score += 2
-            
-            # Prefer sentences with proper nouns
-            if re.search(r'[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*', sentence):
-                score += 1
-            
-            # Prefer sentences of reasonable length
-            words = sentence.split()
-            if 6 <= len(words) <= 20:  # Ideal length range
-                score += 2
-            elif len(words) < 6:  # Too short
-                score -= 1
-            else:  # Too long
-                score -= len(words) // 20
-            
-            scored_sentences.append((score, sentence))
-        
-        # Sort by score and length (preferring higher scores and shorter sentences)
-        scored_sentences.sort(key=lambda x: (-x[0], len(x[1])))
-        
-        # Return the highest scoring sentence
-        if scored_sentences:
-            return scored_sentences[0][1].strip()
-        
-        # Fallback to first sentence
-        return sentences[0].strip()
-
-    def _is_math_question(self, question: str) -> bool:
-        """Check if the question is a basic math question."""
-        # Remove 'what is' and other common prefixes and clean whitespace
-        clean_q = question.lower()
-        clean_q = re.sub(r'^(?:what\s+is|calculate|solve|find|tell\s+me)\s*', '', clean_q)
-        clean_q = clean_q.strip('?').strip()
-        
-        # Convert word operators to symbols
-        clean_q = clean_q.replace('plus', '+').replace('minus', '-')
-        clean_q = clean_q.replace('times', '*').replace('divided by', '/')
+        with metrics.span('answer.clean'):
+            return self.extractor.clean(text)
+
+    def _google_search(self, question: str) -> Optional[str]:
+        """Perform Google search.
+
+        Raises:
+            Exception: If Google could not be queried or served a captcha
+        """
+        url = self._google_request(question)
+        with metrics.span('search.network', 'google'):
+            response = self.session.get(url, timeout=5, stream=True)
+            response.raise_for_status()
+            check_google_captcha(response.url)
+            html = self._read_body('google', response, self.google_parser.answer_region(GOOGLE_FEATURED_SELECTORS))
         
-        # Look for math expression patterns
-        return bool(re.match(r'^\s*\d+\s*[\+\-\*/]\s*\d+\s*$', clean_q))
+        with metrics.span('search.parse', 'google'):
+            return self._parse_google_html(html, question)
+
+    def _read_body(self, name: str, response: requests.Response,
+                   region: Optional[AnswerRegion] = None, limit: bool = True) -> str:
+        """Read a streamed response and record the bytes it took.
+
+        The body is read as it came over the network and decompressed here,
+        so the count is of compressed bytes. Reading stops after
+        max_body_bytes if set and limit is on, and once a result page's
+        answer region has been received if stop_at_answer is on; the
+        connection is then closed rather than drained.
 
-    def _calculate_math(self, question: str) -> Optional[str]:
-        """Calculate basic math expressions."""
+        Args:
+            name (str): Backend the response came from
+            response (requests.Response): Response opened with stream=True
+            region (AnswerRegion): Detector for the end of the answers
+            limit (bool): Whether max_body_bytes applies; off for JSON
+                responses, which cannot be parsed once cut
+
+        Raises:
+            BackendError: If the response uses a content encoding that
+                cannot be decoded
+        """
+        if not self.stop_at_answer:
+            region = None
+        max_body_bytes = self.max_body_bytes if limit else 0
+        decoder = None
+        chunks = []
+        size = 0
         try:
-            # Clean and normalize the question
-            clean_q = question.lower()
-            clean_q = re.sub(r'^(?:what\s+is|calculate|solve|find|tell\s+me)\s*', '', clean_q)
-            clean_q = clean_q.strip('?').strip()
-            
-            # Convert word operators to symbols
-            clean_q = clean_q.replace('plus', '+').replace('minus', '-')
-            clean_q = clean_q.replace('times', '*').replace('divided by', '/')
-            
-            # Remove all whitespace
-            clean_q = re.sub(r'\s+', '', clean_q)
-            
-            # Match the exact math expression
-            if not re.match(r'^\d+[\+\-\*/]\d+$', clean_q):
-                return None
-            
-            # Parse numbers and operator
-            match = re.match(r'^(\d+)([\+\-\*/])(\d+)$', clean_q)
-            if not match:
-                return None
-            
-            num1, op, num2 = match.groups()
-            num1, num2 = int(num1), int(num2)
-            
-            # Perform calculation
-            if op == '+':
-                result = num1 + num2
-            elif op == '-':
-                result = num1 - num2
-            elif op == '*':
-                result = num1 * num2
-            elif op == '/' and num2 != 0:
-                result = num1 / num2
+            decoder = self._content_decoder(response.headers.get('Content-Encoding'))
+            for chunk in response.raw.stream(16384, decode_content=False):
+                chunk = decoder.decode(chunk)
+                chunks.append(chunk)
+                size += len(chunk)
+                if 0 < max_body_bytes <= size:
+                    break
+                if region is not None and region.feed(chunk):
+                    break
             else:
-                return None
-            
-            # Format result (remove trailing zeros for decimals)
-            if isinstance(result, float):
-                return f"{result:.6f}".rstrip('0').rstrip('.')
-            return str(result)
-            
-        except Exception as e:
-            logger.error(f"Error during math calculation: {e}")
-            return None
+                chunks.append(decoder.flush())
+        finally:
+            if decoder is not None:
+                self.backend_stats.record_bytes(name, decoder.wire_bytes)
+            response.close()
+        body = b''.join(chunks)
+        if region is not None and region.end is not None:
+            body = body[:region.end]
+        if max_body_bytes > 0:
+            body = body[:max_body_bytes]
+        text = body.decode(response.encoding or 'utf-8', errors='replace')
+        self._log_response(name, response.status_code, response.headers, text)
+        return text
 
-    def _google_search(self, question: str) -> Optional[str]:
-        """Perform Google search."""
+    @staticmethod
+    def _content_decoder(encoding: Optional[str]) -> ContentDecoder:
+        """Return a decoder for a response's Content-Encoding, or raise BackendError."""
         try:
-            # Clean up the question and create search query
-            search_query = self._prepare_search_query(question)
-            logger.info(f"Searching Google for: {search_query}")
-            
-            # Perform the search
-            url = f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&hl=en&gl=us"
-            response = self.session.get(url, timeout=5)
-            
-            # Log response status and headers
-            logger.debug(f"Google Response Status: {response.status_code}")
-            logger.debug(f"Google Response Headers: {dict(response.headers)}")
-            
-            response.raise_for_status()
-            
-            # Parse the response
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Modern Google selectors
-            selectors = [
-                'div[data-tts="answers"]',
-                'div[data-attrid*="description"]',
-                'div[data-attrid*="answer"]',
-                'span.ILfuVd',
-                'div.wDYxhc',
-                'div.kno-rdesc',
-                'div.LGOjhe',
-                'div.hgKElc',
-                'div.FzvWSb',
-                'div.IZ6rdc',
-                'div.gsrt',
-                'div.Z0LcW',
-                'div.zCubwf',
-                'div.XcVN5d',
-                'div.PZPZlf',
-                'div.iKJnec',
-                'div.card-section'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    text = element.get_text().strip()
-                    if text and len(text) > 1:
-                        cleaned = self._clean_answer(text)
-                        if cleaned:
-                            logger.info(f"Found answer in Google: {cleaned}")
-                            return cleaned
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error during Google search: {e}")
-            return None
+            return ContentDecoder(encoding)
+        except ValueError as e:
+            raise BackendError(str(e)) from e
+
+    def _log_response(self, name: str, status: int, headers, body: str):
+        """Log a raw response for a sampled fraction of backend calls."""
+        if self.log_sample_rate <= 0 or random.random() >= self.log_sample_rate:
+            return
+        logger.debug(f"{name} response {status}, headers {dict(headers)}, "
+                     f"{len(body)} characters: {body[:LOG_SAMPLE_CHARS]}")
+
+    def _google_request(self, question: str) -> str:
+        """Build the Google search URL."""
+        # Clean up the question and create search query
+        search_query = self._prepare_search_query(question)
+        logger.info(f"Searching Google for: {search_query}")
+        return f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&hl=en&gl=us"
+
+    def _parse_google_html(self, html: str, question: str = '') -> Optional[str]:
+        """Extract an answer from a Google result page."""
+        # Score every snippet of the highest-priority selector that matched
+        selector, texts = self.google_parser.find_texts(html)
+        if texts:
+            if self.aggregator is not None:
+                with metrics.span('answer.aggregate', 'google'):
+                    cleaned = self.aggregator.aggregate(
+                        question, self.aggregator.page_candidates(
+                            'google', texts, featured=selector < GOOGLE_FEATURED_SELECTORS
+                        )
+                    )
+            else:
+                with metrics.span('answer.clean'):
+                    cleaned = self.extractor.extract(texts)
+            if cleaned:
+                logger.info(f"Found answer in Google: {cleaned}")
+                return cleaned
+        
+        return None
 
     def _duckduckgo_search(self, question: str) -> Optional[str]:
-        """Perform DuckDuckGo search as fallback."""
-        try:
-            search_query = self._prepare_search_query(question)
-            logger.info(f"Searching DuckDuckGo for: {search_query}")
-            
-            url = f"https://html.duckduckgo.com/html/?q={urllib.parse.quote(search_query)}"
-            response = self.session.get(url, timeout=5)
+        """Perform DuckDuckGo search as fallback.
+
+        Raises:
+            Exception: If DuckDuckGo could not be queried
+        """
+        url = self._duckduckgo_request(question)
+        with metrics.span('search.network', 'duckduckgo'):
+            response = self.session.get(url, timeout=5, stream=True)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # DuckDuckGo selectors
-            selectors = [
-                'div.result__snippet',
-                'a.result__snippet',
-                'div.result__body',
-                'div.result__title'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    text = element.get_text().strip()
-                    if text and len(text) > 15:
-                        cleaned = self._clean_answer(text)
-                        if cleaned:
-                            logger.info(f"Found answer in DuckDuckGo: {cleaned}")
-                            return cleaned
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error during DuckDuckGo search: {e}")
-            return None 
\ No newline at end of file
+            html = self._read_body(
+                'duckduckgo', response, self.duckduckgo_parser.answer_region(DUCKDUCKGO_ANSWER_SELECTORS)
+            )
+        
+        with metrics.span('search.parse', 'duckduckgo'):
+            return self._parse_duckduckgo_html(html, question)
+
+    def _duckduckgo_request(self, question: str) -> str:
+        """Build the DuckDuckGo HTML search URL."""
+        search_query = self._prepare_search_query(question)
+        logger.info(f"Searching DuckDuckGo for: {search_query}")
+        return f"https://html.duckduckgo.com/html/?q={urllib.parse.quote(search_query)}"
+
+    def _parse_duckduckgo_html(self, html: str, question: str = '') -> Optional[str]:
+        """Extract an answer from a DuckDuckGo result page."""
+        # Score every snippet of the highest-priority selector that matched
+        _, texts = self.duckduckgo_parser.find_texts(html)
+        if texts:
+            if self.aggregator is not None:
+                with metrics.span('answer.aggregate', 'duckduckgo'):
+                    cleaned = self.aggregator.aggregate(
+                        question, self.aggregator.page_candidates('duckduckgo', texts)
+                    )
+            else:
+                with metrics.span('answer.clean'):
+                    cleaned = self.extractor.extract(texts)
+            if cleaned:
+                logger.info(f"Found answer in DuckDuckGo: {cleaned}")
+                return cleaned
+        
+        return None
+
+
+def serp_api_restrictor(results: int) -> str:
+    """Build a json_restrictor value keeping only the fields answers are taken from."""
+    sections = []
+    for section, fields in SERP_FIELD_WEIGHTS.items():
+        if section == 'organic_results':
+            section = f"{section}[0:{results}]"
+        sections.append(f"{section}.{{{','.join(sorted(fields))}}}")
+    return ','.join(sections)
+
+
+def check_google_captcha(url) -> None:
+    """Raise BackendError if Google redirected the search to its captcha page."""
+    if '/sorry/' in str(url):
+        raise BackendError("Google served a captcha")
+
+
+def create_search_service() -> SearchService:
+    """Create the search service selected by SEARCH_BACKEND ('sync' or 'async') and start its refresher."""
+    service = None
+    if os.getenv('SEARCH_BACKEND', 'sync').lower() == 'async':
+        if os.getenv('SEARCH_HTTP_MODE', 'off').lower() not in ('', 'off', 'live'):
+            logger.warning("HTTP record/replay works with the sync backend only, using sync backend")
+        else:
+            try:
+                from services.async_search_service import AsyncSearchService
+                service = AsyncSearchService()
+            except ImportError as e:
+                logger.warning(f"Async search backend unavailable ({e}), using sync backend")
+    if service is None:
+        service = SearchService()
+    service.start_refresher()
+    return service
@@ -0,0 +1,309 @@
+import os
+import re
+import threading
+import zlib
+from loguru import logger
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from services.knowledge_base import STOPWORDS
+from services.text_normalization import normalize_question
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Question words that fix the kind of answer wanted; 'what' and 'which' can ask for anything
+_ANSWER_KINDS = {
+    'who': 'person', 'whom': 'person', 'whose': 'person',
+    'when': 'time', 'where': 'place'
+}
+# Nouns that narrow 'what'/'which' to a kind of answer ("what year", "which city")
+_KIND_NOUNS = {
+    'year': 'time', 'date': 'time', 'century': 'time',
+    'city': 'place', 'country': 'place', 'state': 'place', 'museum': 'place'
+}
+
+# Nouns naming the person a question is after ("Mona Lisa painter?")
+_PERSON_NOUNS = frozenset("""
+painter artist author writer inventor discoverer composer director actor actress founder
+playwright poet singer
+""".split())
+
+# Ordinals and roman numerals, compared like the numbers they stand for
+_NUMBER_WORDS = {
+    'first': '1', 'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5', 'sixth': '6',
+    'seventh': '7', 'eighth': '8', 'ninth': '9', 'tenth': '10', 'eleventh': '11',
+    'twelfth': '12', 'thirteenth': '13', 'fourteenth': '14', 'fifteenth': '15',
+    'sixteenth': '16', 'seventeenth': '17', 'eighteenth': '18', 'nineteenth': '19',
+    'twentieth': '20'
+}
+_ROMAN = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6', 'vii': '7', 'viii': '8'}
+_ORDINAL_SUFFIX = re.compile(r'^(\d+)(?:st|nd|rd|th)$')
+
+# Words trivia questions use interchangeably, mapped to one spelling
+SYNONYMS = {
+    'biggest': 'largest', 'greatest': 'largest', 'highest': 'tallest', 'earth': 'world',
+    'planet': 'planet', 'author': 'write', 'writer': 'write', 'wrote': 'write', 'written': 'write',
+    'artist': 'paint', 'painter': 'paint', 'painted': 'paint', 'inventor': 'invent',
+    'invented': 'invent', 'inventing': 'invent', 'discoverer': 'discover', 'discovered': 'discover',
+    'composer': 'compose', 'composed': 'compose', 'director': 'direct', 'directed': 'direct',
+    'film': 'movie', 'movies': 'movie', 'us': 'united states', 'usa': 'united states',
+    'america': 'united states', 'american': 'united states', 'wwii': 'world war 2',
+    'ww2': 'world war 2', 'wwi': 'world war 1', 'ww1': 'world war 1',
+    'man': 'person', 'people': 'person', 'number': 'many', 'newborn': 'baby'
+}
+
+# Relative weight of each feature family in a question's vector
+WORD_WEIGHT = 1.0
+CHAR_WEIGHT = 0.6
+PAIR_WEIGHT = 0.5
+
+
+class QuestionFeatures:
+    __slots__ = ('vector', 'kind', 'numbers')
+
+    def __init__(self, vector: np.ndarray, kind: Optional[str], numbers: FrozenSet[str]):
+        self.vector = vector
+        self.kind = kind
+        self.numbers = numbers
+
+    def compatible(self, other: "QuestionFeatures") -> bool:
+        """False if the two questions must have different answers whatever their wording."""
+        if self.numbers != other.numbers:
+            return False
+        return self.kind is None or other.kind is None or self.kind == other.kind
+
+
+def _answer_kind(tokens: List[str]) -> Optional[str]:
+    """Return the kind of answer a question's wording asks for, if it says."""
+    for index, token in enumerate(tokens):
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token in _ANSWER_KINDS:
+            return _ANSWER_KINDS[token]
+        if token == 'how' and following in ('many', 'much'):
+            return 'amount'
+        if token in ('what', 'which') and following in _KIND_NOUNS:
+            return _KIND_NOUNS[following]
+    if any(token in _PERSON_NOUNS for token in tokens):
+        return 'person'
+    return None
+
+
+def _numbers(tokens: List[str]) -> List[str]:
+    """Rewrite ordinals and roman numerals ("16th", "sixteenth", "War II") as plain numbers."""
+    result = []
+    previous = None
+    for token in tokens:
+        ordinal = _ORDINAL_SUFFIX.match(token)
+        if ordinal:
+            token = ordinal.group(1)
+        elif token in _NUMBER_WORDS:
+            token = _NUMBER_WORDS[token]
+        elif token in _ROMAN and previous is not None and previous not in STOPWORDS:
+            # "World War I", "Henry V"; a lone "i" is the pronoun
+            token = _ROMAN[token]
+        result.append(token)
+        previous = token
+    return result
+
+
+def _stem(word: str) -> str:
+    """Map a word to its synonym group, or strip a plural or verb ending."""
+    if word in SYNONYMS:
+        return SYNONYMS[word]
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def question_features(question: str, dim: int) -> QuestionFeatures:
+    """Hash a question's words, character trigrams and word pairs into a dim-sized count vector."""
+    tokens = _numbers(_TOKEN.findall(normalize_question(question)))
+    words = ' '.join(_stem(token) for token in tokens if token not in STOPWORDS).split()
+    vector = np.zeros(dim, dtype=np.float32)
+
+    def add(feature: str, weight: float):
+        vector[zlib.crc32(feature.encode('utf-8')) % dim] += weight
+
+    for word in words:
+        add('w:' + word, WORD_WEIGHT)
+        # Trigrams let inflections ("painted", "painter") and typos share most of their features
+        padded = f" {word} "
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            add('c:' + gram, CHAR_WEIGHT / len(grams))
+    for first, second in zip(words, words[1:]):
+        add(f'p:{first} {second}', PAIR_WEIGHT)
+
+    numbers = frozenset(word for word in words if word.isdigit())
+    return QuestionFeatures(vector, _answer_kind(tokens), numbers)
+
+
+class SemanticCache:
+    def __init__(self, max_entries: Optional[int] = None, threshold: Optional[float] = None,
+                 dim: int = 2048, candidates: int = 4):
+        """Initialize the near-duplicate question index.
+
+        Answered questions are stored as hashed word, character-trigram and
+        word-pair vectors in a NumPy matrix. A new question is compared with
+        all of them in one vector-matrix product (cosine similarity, with
+        features weighted by how rare they are among the stored questions),
+        so rephrasings of an answered question can reuse its cached answer.
+        The matrix is kept feature-major, so the product only reads the few
+        rows of features the new question has.
+        A match is rejected when the questions mention different numbers or
+        ask for different kinds of answer (who/when/where/how many).
+
+        Args:
+            max_entries (int): Questions kept before the oldest are dropped,
+                defaults to SEMANTIC_CACHE_SIZE or 2048
+            threshold (float): Minimum cosine similarity (0-1) for a match,
+                defaults to SEMANTIC_CACHE_THRESHOLD or 0.75
+            dim (int): Hashed feature dimensions
+            candidates (int): Best-scoring entries checked for compatibility
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('SEMANTIC_CACHE_SIZE', '2048'))
+        self.threshold = threshold if threshold is not None else float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.75'))
+        self.dim = dim
+        self.candidates = candidates
+        self._lock = threading.Lock()
+        capacity = min(self.max_entries, 64)
+        # Raw feature counts per question, and the same vectors weighted by idf,
+        # normalized and stored one column per question for scoring
+        self._counts = np.zeros((capacity, dim), dtype=np.float32)
+        self._weighted = np.zeros((dim, capacity), dtype=np.float32)
+        self._features: List[Optional[QuestionFeatures]] = []
+        self._keys: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._doc_freq = np.zeros(dim, dtype=np.float32)
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._next = 0
+        self._stale = 0
+        self._counters = {"hits": 0, "misses": 0, "rejected": 0, "stores": 0}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, question: str, key: str):
+        """Index an answered question under its answer cache key."""
+        if self.max_entries <= 0:
+            return
+        features = question_features(question, self.dim)
+        if not features.vector.any():
+            return
+        with self._lock:
+            if key in self._slots:
+                return
+            slot = self._claim_slot()
+            self._counts[slot] = features.vector
+            self._doc_freq += features.vector > 0
+            self._features[slot] = features
+            self._keys[slot] = key
+            self._slots[key] = slot
+            self._counters["stores"] += 1
+
+            # Idf drifts as questions arrive; re-weight every row once enough have changed it
+            self._stale += 1
+            if self._stale * 8 >= len(self._slots):
+                self._reweight()
+            else:
+                self._weighted[:, slot] = self._weigh(features.vector)
+
+    def match(self, question: str) -> Optional[Tuple[str, float]]:
+        """Return (answer cache key, similarity) of the closest compatible question, or None."""
+        if self.max_entries <= 0:
+            return None
+        features = question_features(question, self.dim)
+        with self._lock:
+            size = len(self._keys)
+            if not size or not features.vector.any():
+                self._counters["misses"] += 1
+                return None
+            query = self._weigh(features.vector)
+            present = np.flatnonzero(query)
+            scores = query[present] @ self._weighted[present, :size]
+            count = min(self.candidates, size)
+            best = np.argpartition(-scores, count - 1)[:count]
+            for slot in best[np.argsort(-scores[best])]:
+                score = float(scores[slot])
+                if score < self.threshold:
+                    break
+                stored = self._features[slot]
+                if stored is not None and features.compatible(stored):
+                    self._counters["hits"] += 1
+                    return self._keys[slot], score
+                self._counters["rejected"] += 1
+            self._counters["misses"] += 1
+            return None
+
+    def discard(self, key: str):
+        """Forget a question, e.g. when its cached answer has expired."""
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._clear_slot(slot)
+
+    def stats(self) -> dict:
+        """Return the entry count and hit/miss/rejected/store counters."""
+        with self._lock:
+            return {"entries": len(self._slots), "threshold": self.threshold, **self._counters}
+
+    def _claim_slot(self) -> int:
+        """Return a free row, growing the matrices or dropping the oldest question. Caller holds the lock."""
+        if len(self._keys) < self.max_entries:
+            if len(self._keys) == len(self._counts):
+                capacity = min(self.max_entries, len(self._counts) * 2)
+                self._counts = _grow(self._counts, capacity)
+                self._weighted = _grow(self._weighted.T, capacity).T.copy()
+            self._keys.append(None)
+            self._features.append(None)
+            return len(self._keys) - 1
+        slot = self._next
+        self._next = (self._next + 1) % self.max_entries
+        old_key = self._keys[slot]
+        if old_key is not None:
+            del self._slots[old_key]
+            self._clear_slot(slot)
+        return slot
+
+    def _clear_slot(self, slot: int):
+        """Empty a row so it can never match. Caller holds the lock."""
+        self._doc_freq -= self._counts[slot] > 0
+        self._counts[slot] = 0
+        self._weighted[:, slot] = 0
+        self._features[slot] = None
+        self._keys[slot] = None
+
+    def _weigh(self, vector: np.ndarray) -> np.ndarray:
+        """Scale a count vector by idf and normalize it to unit length. Caller holds the lock."""
+        weighted = vector * self._idf
+        norm = float(np.linalg.norm(weighted))
+        return weighted / norm if norm else weighted
+
+    def _reweight(self):
+        """Recompute idf and every stored row from the raw counts. Caller holds the lock."""
+        documents = len(self._slots)
+        self._idf = (np.log((1 + documents) / (1 + self._doc_freq)) + 1).astype(np.float32)
+        size = len(self._keys)
+        weighted = self._counts[:size] * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self._weighted[:, :size] = (weighted / norms).T
+        self._stale = 0
+
+
+def _grow(matrix: np.ndarray, rows: int) -> np.ndarray:
+    """Return matrix with zero rows appended up to rows."""
+    grown = np.zeros((rows, matrix.shape[1]), dtype=matrix.dtype)
+    grown[:len(matrix)] = matrix
+    return grown
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    """Create the near-duplicate index, or None when SEMANTIC_CACHE_SIZE is 0."""
+    cache = SemanticCache()
+    if cache.max_entries <= 0:
+        return None
+    logger.info(f"Near-duplicate question matching on, threshold {cache.threshold}")
+    return cache
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self):
+        """Initialize request coalescing for threads.
+
+        While a call for a key is in flight, further calls for the same key
+        wait for it and receive its result (or its exception) instead of
+        doing the work again.
+        """
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Run fn for key, or join the call already running for it.
+
+        Returns:
+            tuple: (result, shared) where shared is True if another caller did the work
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        """Return the number of keys currently being worked on."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight(Generic[T]):
+    def __init__(self):
+        """Initialize request coalescing for coroutines on one event loop."""
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Await fn() for key, or join the call already running for it.
+
+        Returns:
+            tuple: (result, shared) where shared is True if another caller did the work
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shielded so one waiter giving up does not cancel the lookup for the others
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = asyncio.ensure_future(fn())
+        try:
+            return await asyncio.shield(future), False
+        finally:
+            if future.done():
+                del self._calls[key]
+            else:
+                # The leader was cancelled; let the lookup finish for any followers
+                future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+    def in_flight(self) -> int:
+        """Return the number of keys currently being worked on."""
+        return len(self._calls)
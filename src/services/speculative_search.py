@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from loguru import logger
+from typing import Optional, Tuple
+
+from services.search_service import SearchResult, SearchService
+from services.text_normalization import normalize_question
+
+
+class SpeculativeSearch:
+    def __init__(self, search_service: SearchService, executor: Executor,
+                 min_words: Optional[int] = None, max_inflight: Optional[int] = None):
+        """Start searches from partial transcripts of a question still being spoken.
+
+        A search is launched for each new partial transcript with at least
+        min_words words. Searches stay alive while later partials extend
+        them; a speculation the transcript moves away from, or the oldest
+        when more than max_inflight are running, is cancelled. When the
+        final transcript arrives its search is reused if one was already
+        launched for the same (normalized) text. Speculative searches leave
+        no trace in the answer cache, the similar-question index or the
+        popularity counts; only the one reused is committed to them.
+        Cancelling a speculation that is already running stops it before
+        its next backend call.
+
+        Args:
+            search_service (SearchService): Service used to answer questions
+            executor (Executor): Pool the searches run on
+            min_words (int): Words a partial needs before it is searched,
+                defaults to SPECULATIVE_MIN_WORDS or 3
+            max_inflight (int): Speculative searches kept at once, defaults
+                to SPECULATIVE_MAX_INFLIGHT or 2
+        """
+        self.search_service = search_service
+        self.executor = executor
+        self.min_words = min_words or int(os.getenv('SPECULATIVE_MIN_WORDS', '3'))
+        self.max_inflight = max_inflight or int(os.getenv('SPECULATIVE_MAX_INFLIGHT', '2'))
+        # Normalized partial -> (search, event set to abandon it)
+        self._searches: "OrderedDict[str, Tuple[Future, threading.Event]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.discarded = 0
+        self.reused = False
+
+    def on_partial(self, text: str):
+        """Speculatively search a partial transcript."""
+        key = normalize_question(text)
+        if len(key.split()) < self.min_words:
+            return
+        with self._lock:
+            if key in self._searches:
+                return
+            # Searches for text the speaker has since revised are no longer useful
+            for other in list(self._searches):
+                if not key.startswith(other):
+                    self._discard(other)
+            while len(self._searches) >= self.max_inflight:
+                self._discard(next(iter(self._searches)))
+            logger.debug(f"Speculatively searching: {key}")
+            abandoned = threading.Event()
+            future = self.executor.submit(self.search_service.resolve, text, None, abandoned)
+            self._searches[key] = (future, abandoned)
+            self.launched += 1
+
+    def answer(self, question: str) -> Future:
+        """Return the search for the final transcript, reusing a speculation if possible.
+
+        Returns:
+            Future: Resolves to the SearchResult for the question
+        """
+        key = normalize_question(question)
+        with self._lock:
+            speculation = self._searches.pop(key, None)
+            self._cancel_all()
+        if speculation is not None and not speculation[0].cancelled():
+            logger.info(f"Reusing speculative search for: {key}")
+            self.reused = True
+            return self._commit(question, speculation[0])
+        return self.executor.submit(self.search_service.resolve, question)
+
+    def _commit(self, question: str, speculation: Future) -> Future:
+        """Return a future for the speculation's result, committed to the search service once it is ready."""
+        committed = Future()
+
+        def done(future: Future):
+            try:
+                result: SearchResult = future.result()
+                committed.set_result(self.search_service.commit(question, result))
+            except BaseException as e:
+                committed.set_exception(e)
+
+        speculation.add_done_callback(done)
+        return committed
+
+    def cancel(self):
+        """Cancel every outstanding speculation."""
+        with self._lock:
+            self._cancel_all()
+
+    def _cancel_all(self):
+        """Cancel every outstanding speculation; the caller holds the lock."""
+        for key in list(self._searches):
+            self._discard(key)
+
+    def _discard(self, key: str):
+        """Drop a speculation, cancelling it if it has not started yet or abandoning it if it has."""
+        future, abandoned = self._searches.pop(key)
+        future.cancel()
+        abandoned.set()
+        self.discarded += 1
@@ -1,69 +1,344 @@
 import speech_recognition as sr
-import whisper
+import math
 import os
+import threading
+from collections import deque
 from loguru import logger
-from typing import Optional
+from typing import Callable, Optional
+
+from services.metrics import metrics
+from services.voice_activity import VoiceActivityDetector, pcm_to_int16_scale
 
 class SpeechRecognitionService:
-    def __init__(self, engine: str = "google"):
+    def __init__(self, engine: Optional[str] = None):
         """Initialize speech recognition service.
-        
+
+        The microphone is opened on the first question and kept open
+        between questions, so the voice activity detector's estimate of
+        the room noise carries over from one question to the next.
+
         Args:
-            engine (str): Speech recognition engine to use ('google' or 'whisper')
+            engine (str): Speech recognition engine to use ('google' or 'whisper'),
+                defaults to SPEECH_ENGINE or 'google'
         """
-        self.engine = engine.lower()
+        self.engine = (engine or os.getenv('SPEECH_ENGINE', 'google')).lower()
         self.recognizer = sr.Recognizer()
-        self.whisper_model = None
-        
+        self.whisper_worker = None
+        # A question ends after this many seconds without speech
+        self.trailing_silence = float(os.getenv('VAD_TRAILING_SILENCE', '0.5'))
+        # Speech must last this long to start a question, which ignores clicks
+        self.min_speech = float(os.getenv('VAD_MIN_SPEECH', '0.1'))
+        # Audio kept from before the onset so the first syllable is not clipped
+        self.pre_speech = float(os.getenv('VAD_PRE_SPEECH', '0.3'))
+        self.listen_timeout = float(os.getenv('SPEECH_TIMEOUT', '5'))
+        self.phrase_time_limit = float(os.getenv('SPEECH_PHRASE_LIMIT', '10'))
+        self._source: Optional[sr.AudioSource] = None
+        self._vad: Optional[VoiceActivityDetector] = None
+        self._source_lock = threading.Lock()
+        # In hands-free mode only speech that starts with the wake phrase is transcribed
+        self.wake_word = None
+        if os.getenv('HANDS_FREE', 'false').lower() in ('1', 'true', 'yes', 'on'):
+            from services.wake_word import WakeWordSpotter
+            self.wake_word = WakeWordSpotter.from_directory()
+
         if self.engine == "whisper":
-            logger.info("Loading Whisper model...")
-            self.whisper_model = whisper.load_model("base")
-        
-        # Adjust recognition parameters for faster response
-        self.recognizer.dynamic_energy_threshold = False
-        self.recognizer.energy_threshold = 1000
-        
-    def listen_for_question(self) -> Optional[str]:
+            # The shared worker loads the model in the background
+            from services.whisper_worker import get_whisper_worker
+            self.whisper_worker = get_whisper_worker()
+
+    def listen_for_question(self, on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """Listen for a question using the microphone.
-        
+
+        Args:
+            on_partial (callable): Receives partial transcripts while the
+                question is still being spoken (whisper engine only)
+
         Returns:
             str: Recognized text or None if recognition failed
         """
         try:
-            with sr.Microphone() as source:
-                logger.info("Listening for question...")
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                
+            if self.engine == "whisper":
+                return self._listen_whisper(on_partial)
+
+            audio = self._capture(lambda chunk: None)
+            if audio is None:
+                return None
+
             if self.engine == "google":
                 try:
-                    text = self.recognizer.recognize_google(audio)
+                    with metrics.span('speech.transcribe', 'google'):
+                        text = self.recognizer.recognize_google(audio)
                     logger.info(f"Google recognized: {text}")
                     return text
                 except sr.UnknownValueError:
                     logger.error("Google Speech Recognition could not understand audio")
                 except sr.RequestError as e:
                     logger.error(f"Could not request results from Google Speech Recognition service; {e}")
-            
-            elif self.engine == "whisper":
-                try:
-                    # Save audio to temporary file for Whisper
-                    with open("temp_audio.wav", "wb") as f:
-                        f.write(audio.get_wav_data())
-                    
-                    # Use Whisper to transcribe
-                    result = self.whisper_model.transcribe("temp_audio.wav")
-                    text = result["text"].strip()
-                    logger.info(f"Whisper recognized: {text}")
-                    
-                    # Clean up temporary file
-                    os.remove("temp_audio.wav")
-                    return text
-                except Exception as e:
-                    logger.error(f"Error with Whisper transcription: {e}")
-                    if os.path.exists("temp_audio.wav"):
-                        os.remove("temp_audio.wav")
-            
+
+        except sr.WaitTimeoutError:
+            logger.debug("No question heard before the listening timeout")
         except Exception as e:
             logger.error(f"Error during speech recognition: {e}")
-        
-        return None 
\ No newline at end of file
+
+        return None
+
+    def _listen_whisper(self, on_partial: Optional[Callable[[str], None]]) -> Optional[str]:
+        """Capture a question and transcribe it in memory with the Whisper worker."""
+        from services.whisper_worker import StreamingTranscription, audio_to_array, pcm_to_float32
+
+        try:
+            source = self._open_source()
+            if on_partial is None:
+                stream = None
+                audio = self._capture(lambda chunk: None)
+            else:
+                stream = StreamingTranscription(self.whisper_worker, on_partial,
+                                                sample_rate=source.SAMPLE_RATE)
+                audio = self._capture(lambda chunk: stream.feed(pcm_to_float32(chunk, source.SAMPLE_WIDTH)))
+            if audio is None:
+                return None
+
+            # Listening stops before the final transcription
+            if stream is None:
+                text = self.whisper_worker.transcribe(audio_to_array(audio))
+            else:
+                text = stream.finish()
+
+            logger.info(f"Whisper recognized: {text}")
+            return text or None
+        except sr.WaitTimeoutError:
+            logger.debug("No question heard before the listening timeout")
+        except Exception as e:
+            logger.error(f"Error with Whisper transcription: {e}")
+        return None
+
+    def _capture(self, on_chunk: Callable[[bytes], None]) -> Optional[sr.AudioData]:
+        """Record one question from the open microphone.
+
+        Returns:
+            AudioData: The question, or None if the audio source ran out
+        """
+        source = self._open_source()
+        try:
+            lead = None
+            if self.wake_word is not None:
+                lead = self.wait_for_wake_word(source, timeout=self.listen_timeout)
+                if lead is None:
+                    self.close()
+                    return None
+            logger.info("Listening for question...")
+            with metrics.span('speech.capture'):
+                raw = self.capture_phrase(source, on_chunk, timeout=self.listen_timeout,
+                                          phrase_time_limit=self.phrase_time_limit, lead=lead)
+        except sr.WaitTimeoutError:
+            raise
+        except Exception:
+            # A failed device is reopened on the next question
+            self.close()
+            raise
+        if not raw:
+            # Only a finite source such as a recording runs dry
+            self.close()
+            return None
+        return sr.AudioData(raw, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def _open_source(self) -> sr.AudioSource:
+        """Return the microphone, opening it on first use."""
+        with self._source_lock:
+            if self._source is not None:
+                return self._source
+            if self.engine == "whisper":
+                from services.whisper_worker import WHISPER_SAMPLE_RATE
+                # Record at Whisper's own rate so no resampling is needed
+                source = sr.Microphone(sample_rate=WHISPER_SAMPLE_RATE)
+            else:
+                source = sr.Microphone()
+            source.__enter__()
+            self._source = source
+            self._vad = VoiceActivityDetector(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            logger.debug(f"Opened microphone at {source.SAMPLE_RATE} Hz")
+            return source
+
+    def close(self):
+        """Release the microphone; the next question opens it again."""
+        with self._source_lock:
+            source, self._source, self._vad = self._source, None, None
+        if source is not None:
+            try:
+                source.__exit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Error closing microphone: {e}")
+
+    def wait_for_wake_word(self, source: sr.AudioSource, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Block until someone says the wake phrase and return the audio heard after it.
+
+        Only the voice activity detector runs on idle audio. When speech
+        starts, up to pre_speech seconds from before the onset are taken
+        from a ring buffer and the stretch of speech is collected until it
+        ends or is long enough to hold the wake phrase, then matched
+        against the spotter's templates. Speech that does not start with
+        the wake phrase is skipped until the next pause. On a match the
+        audio after the phrase, which may already hold the start of the
+        question, is returned for capture_phrase to continue from.
+
+        Args:
+            source (AudioSource): An opened microphone or audio file
+            timeout (float): Seconds of silence after which to give up
+
+        Returns:
+            bytes: PCM following the wake phrase, or None if the source ran out
+
+        Raises:
+            sr.WaitTimeoutError: If nobody speaks within timeout
+        """
+        vad = self._detector_for(source)
+        _discard_buffered(source)
+        vad.reset()
+
+        bytes_per_second = source.SAMPLE_RATE * source.SAMPLE_WIDTH
+        onset_frames = max(1, int(math.ceil(self.min_speech / vad.frame_duration)))
+        silence_frames = max(1, int(math.ceil(self.trailing_silence / vad.frame_duration)))
+        window = int((self.wake_word.max_duration + self.pre_speech) * bytes_per_second)
+        ring = deque(maxlen=int(math.ceil(self.pre_speech * bytes_per_second / (source.CHUNK * source.SAMPLE_WIDTH))) + 1)
+
+        segment = None
+        checked = False
+        waited = 0.0
+        speech_run = 0
+        silent_frames = 0
+        while True:
+            buffer = source.stream.read(source.CHUNK)
+            if not buffer:
+                return None
+            speech = vad.process(buffer)
+
+            if segment is None:
+                waited += len(buffer) / bytes_per_second
+                ring.append(buffer)
+                onset = False
+                for is_speech in speech:
+                    speech_run = speech_run + 1 if is_speech else 0
+                    if speech_run >= onset_frames:
+                        onset = True
+                if not onset:
+                    if timeout and waited > timeout:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for the wake word")
+                    continue
+                segment = bytearray(b''.join(ring))
+                ring.clear()
+                checked = False
+                silent_frames = 0
+            elif not checked:
+                segment += buffer
+
+            for is_speech in speech:
+                silent_frames = 0 if is_speech else silent_frames + 1
+            ended = silent_frames >= silence_frames
+            if not checked and (ended or len(segment) >= window):
+                checked = True
+                samples = pcm_to_int16_scale(bytes(segment), source.SAMPLE_WIDTH)
+                with metrics.span('speech.wake_word'):
+                    end = self.wake_word.find(samples, source.SAMPLE_RATE)
+                if end is not None:
+                    logger.info("Wake word heard")
+                    return bytes(segment[end * source.SAMPLE_WIDTH:])
+            if ended:
+                # Background speech is dropped without being transcribed
+                segment = None
+                speech_run = 0
+                waited = 0.0
+
+    def capture_phrase(self, source: sr.AudioSource, on_chunk: Callable[[bytes], None],
+                       timeout: Optional[float] = None,
+                       phrase_time_limit: Optional[float] = None,
+                       lead: Optional[bytes] = None) -> bytes:
+        """Record one phrase, handing each chunk to on_chunk as it arrives.
+
+        A phrase starts once the voice activity detector has heard
+        min_speech seconds of speech in a row, and includes up to
+        pre_speech seconds of audio from before that. It ends after
+        trailing_silence seconds without speech.
+
+        Args:
+            source (AudioSource): An opened microphone or audio file
+            on_chunk (callable): Receives raw PCM chunks of the phrase
+            timeout (float): Seconds to wait for speech to start
+            phrase_time_limit (float): Maximum length of the phrase in seconds
+            lead (bytes): Audio already read from the source, such as the
+                words after the wake phrase, to examine before reading more
+
+        Returns:
+            bytes: The raw PCM of the whole phrase
+
+        Raises:
+            sr.WaitTimeoutError: If no speech starts within timeout
+        """
+        vad = self._detector_for(source)
+        if lead is None:
+            _discard_buffered(source)
+        vad.reset()
+
+        chunk_bytes = source.CHUNK * source.SAMPLE_WIDTH
+        bytes_per_second = source.SAMPLE_RATE * source.SAMPLE_WIDTH
+        onset_frames = max(1, int(math.ceil(self.min_speech / vad.frame_duration)))
+        silence_frames = max(1, int(math.ceil(self.trailing_silence / vad.frame_duration)))
+        before_speech = deque(maxlen=int(math.ceil(self.pre_speech * bytes_per_second / chunk_bytes)) + 1)
+        buffered = deque(lead[i:i + chunk_bytes] for i in range(0, len(lead or b''), chunk_bytes))
+
+        frames = []
+        waited = 0.0
+        phrase_time = 0.0
+        speech_run = 0
+        silent_frames = 0
+        started = False
+        while True:
+            buffer = buffered.popleft() if buffered else source.stream.read(source.CHUNK)
+            if not buffer:
+                break
+            speech = vad.process(buffer)
+
+            if not started:
+                waited += len(buffer) / bytes_per_second
+                before_speech.append(buffer)
+                for is_speech in speech:
+                    speech_run = speech_run + 1 if is_speech else 0
+                    if speech_run >= onset_frames:
+                        started = True
+                if not started:
+                    if timeout and waited > timeout:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                    continue
+                pending = list(before_speech)
+            else:
+                pending = [buffer]
+
+            for chunk in pending:
+                frames.append(chunk)
+                on_chunk(chunk)
+                phrase_time += len(chunk) / bytes_per_second
+            for is_speech in speech:
+                silent_frames = 0 if is_speech else silent_frames + 1
+            if silent_frames >= silence_frames:
+                break
+            if phrase_time_limit and phrase_time >= phrase_time_limit:
+                break
+        return b''.join(frames)
+
+    def _detector_for(self, source: sr.AudioSource) -> VoiceActivityDetector:
+        """Return the open microphone's detector, or a fresh one for any other source."""
+        if source is self._source and self._vad is not None:
+            return self._vad
+        return VoiceActivityDetector(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+
+def _discard_buffered(source: sr.AudioSource):
+    """Drop audio the device buffered while nobody was listening, such as the last spoken answer."""
+    stream = getattr(getattr(source, 'stream', None), 'pyaudio_stream', None)
+    if stream is None:
+        return
+    try:
+        available = stream.get_read_available()
+        if available:
+            stream.read(available, exception_on_overflow=False)
+    except Exception as e:
+        logger.debug(f"Could not flush microphone buffer: {e}")
@@ -0,0 +1,20 @@
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question(question: str) -> str:
+    """Return the canonical form of a question.
+
+    Strips surrounding question marks and whitespace, lowercases and
+    collapses runs of whitespace, so that trivially different phrasings of
+    the same text share one form.
+
+    Args:
+        question (str): The raw question text
+
+    Returns:
+        str: The normalized question
+    """
+    question = question.strip().strip('?').strip().lower()
+    return _WHITESPACE.sub(' ', question)
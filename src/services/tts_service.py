@@ -1,69 +1,267 @@
-import pyttsx3
 from loguru import logger
 import threading
 import platform
 import os
+import io
+import queue
+import subprocess
+import tempfile
+import wave
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from services.metrics import metrics
+
+# Frames written to the sound card at a time; an interrupt takes effect between blocks
+PLAYBACK_FRAMES = 1024
+
+
+class _SpeechJob:
+    __slots__ = ('text', 'generation', 'render_only', 'done')
+
+    def __init__(self, text: str, generation: Optional[int], render_only: bool = False):
+        self.text = text
+        self.generation = generation
+        self.render_only = render_only
+        self.done = threading.Event()
+
 
 class TTSService:
-    def __init__(self):
-        """Initialize text-to-speech service."""
+    def __init__(self, cache_size: Optional[int] = None):
+        """Initialize text-to-speech service.
+
+        All speech goes through one worker thread that owns the engine and
+        speaks queued phrases in order. Each phrase is rendered to WAV once
+        with the engine's save-to-file support and cached in memory, so
+        repeated answers are played back without synthesizing them again.
+
+        Args:
+            cache_size (int): Rendered phrases kept in memory, defaults to
+                TTS_CACHE_SIZE or 64
+        """
         self.engine = None
+        self.voice = os.getenv('TTS_VOICE') or None
+        self.rate = int(os.getenv('TTS_RATE', '175'))
+        self.cache_size = cache_size or int(os.getenv('TTS_CACHE_SIZE', '64'))
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._jobs: queue.Queue = queue.Queue()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._audio = None
         self.init_engine()
-    
+
     def init_engine(self):
         """Initialize the TTS engine."""
         try:
             if platform.system() == 'Darwin':
-                # On macOS, we need to initialize differently
-                import subprocess
+                # On macOS the built-in say command renders and speaks
                 self.engine = 'macos'
             else:
+                # Imported here so processes that never speak do not load the engine drivers
+                import pyttsx3
                 self.engine = pyttsx3.init()
                 # Configure the engine
-                self.engine.setProperty('rate', 175)  # Speed of speech
+                self.engine.setProperty('rate', self.rate)  # Speed of speech
                 self.engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-                
+                if self.voice:
+                    self.engine.setProperty('voice', self.voice)
+
         except Exception as e:
             logger.error(f"Error initializing TTS engine: {e}")
             self.engine = None
-    
-    def speak(self, text: str, async_mode: bool = True):
+
+    def speak(self, text: str, async_mode: bool = True, interrupt: bool = False):
         """Speak the given text.
-        
+
         Args:
             text (str): The text to speak
-            async_mode (bool): Whether to speak asynchronously
+            async_mode (bool): Whether to return before the text has been spoken
+            interrupt (bool): Stop the current phrase and drop queued ones
+                first, for an answer that supersedes earlier ones
         """
         if not self.engine:
             logger.error("TTS engine not initialized")
             return
-            
+
         try:
-            if async_mode:
-                # Run in a separate thread to avoid blocking
-                thread = threading.Thread(target=self._speak_sync, args=(text,))
-                thread.daemon = True
-                thread.start()
-            else:
-                self._speak_sync(text)
-                
+            if interrupt:
+                self.interrupt()
+            job = _SpeechJob(text, self._generation)
+            self._submit(job)
+            if not async_mode:
+                job.done.wait()
+
         except Exception as e:
             logger.error(f"Error during text-to-speech: {e}")
-    
-    def _speak_sync(self, text: str):
+
+    def interrupt(self):
+        """Stop the phrase being spoken and discard the queued ones."""
+        with self._lock:
+            self._generation += 1
+        kept = []
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None or job.render_only:
+                # Shutdown and precomputation are not speech, so keep them
+                kept.append(job)
+            else:
+                job.done.set()
+        for job in kept:
+            self._jobs.put(job)
+
+    def precompute(self, phrases: Iterable[str]):
+        """Render phrases into the cache in the background so they play instantly.
+
+        Args:
+            phrases (iterable): Fixed phrases the bot is likely to say
+        """
+        if not self.engine:
+            return
+        for text in phrases:
+            self._submit(_SpeechJob(text, None, render_only=True))
+
+    def stop(self):
+        """Stop the speech worker after the queued phrases."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join(timeout=5)
+
+    def _submit(self, job: _SpeechJob):
+        """Queue a job, starting the worker thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='tts-worker', daemon=True)
+                self._thread.start()
+        self._jobs.put(job)
+
+    def _run(self):
+        """Speak queued phrases one at a time until stopped."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                if job.render_only:
+                    self._get_audio(job.text)
+                elif job.generation == self._generation:
+                    self._speak_sync(job.text, job.generation)
+            finally:
+                job.done.set()
+
+    def _speak_sync(self, text: str, generation: Optional[int] = None):
         """Speak the text synchronously.
-        
+
         Args:
             text (str): The text to speak
+            generation (int): Interrupt generation the phrase was queued in
         """
         try:
-            if self.engine == 'macos':
-                # Use macOS's built-in say command
-                os.system(f'say "{text}"')
-            else:
-                self.engine.say(text)
-                self.engine.runAndWait()
+            data = self._get_audio(text)
+            if data is not None and self._play(data, generation):
+                return
+            # No cached audio or no audio output, so let the engine speak directly
+            with metrics.span('tts.synthesis'):
+                if self.engine == 'macos':
+                    subprocess.run(self._say_command(text), check=False)
+                else:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
         except Exception as e:
             logger.error(f"Error during synchronous speech: {e}")
             # Try to reinitialize the engine
-            self.init_engine() 
\ No newline at end of file
+            self.init_engine()
+
+    def _get_audio(self, text: str) -> Optional[bytes]:
+        """Return the rendered WAV for a phrase, rendering it on a cache miss."""
+        key = (text, self.voice, self.rate)
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return data
+
+        data = self._render(text)
+        if data is not None:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def _render(self, text: str) -> Optional[bytes]:
+        """Synthesize a phrase to WAV bytes with the engine."""
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            with metrics.span('tts.synthesis'):
+                if self.engine == 'macos':
+                    subprocess.run(self._say_command(text, '-o', path, '--data-format=LEI16@22050'),
+                                   check=True, capture_output=True)
+                else:
+                    self.engine.save_to_file(text, path)
+                    self.engine.runAndWait()
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Some drivers write other formats; only WAV can be replayed from memory
+            with wave.open(io.BytesIO(data)):
+                pass
+            return data
+        except Exception as e:
+            logger.warning(f"Could not render speech to audio, speaking it directly: {e}")
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _play(self, data: bytes, generation: Optional[int]) -> bool:
+        """Play WAV bytes, stopping early if the phrase is interrupted.
+
+        Returns:
+            bool: False if there is no audio output to play on
+        """
+        audio = self._get_output()
+        if audio is None:
+            return False
+        with wave.open(io.BytesIO(data)) as wav, metrics.span('tts.playback'):
+            stream = audio.open(
+                format=audio.get_format_from_width(wav.getsampwidth()),
+                channels=wav.getnchannels(),
+                rate=wav.getframerate(),
+                output=True
+            )
+            try:
+                while generation is None or generation == self._generation:
+                    frames = wav.readframes(PLAYBACK_FRAMES)
+                    if not frames:
+                        break
+                    stream.write(frames)
+            finally:
+                stream.stop_stream()
+                stream.close()
+        return True
+
+    def _get_output(self):
+        """Open the audio output on first use; None if it is unavailable."""
+        if self._audio is None:
+            try:
+                import pyaudio
+                self._audio = pyaudio.PyAudio()
+            except Exception as e:
+                logger.warning(f"No audio output for cached speech: {e}")
+                self._audio = False
+        return self._audio or None
+
+    def _say_command(self, text: str, *options: str) -> list:
+        """Build the macOS say command for a phrase."""
+        command = ['say', '-r', str(self.rate), *options]
+        if self.voice:
+            command += ['-v', self.voice]
+        # The text is passed as an argument, so no shell quoting is involved
+        return command + ['--', text]
@@ -0,0 +1,158 @@
+import math
+import os
+from collections import deque
+from loguru import logger
+from typing import Optional
+
+import numpy as np
+
+# Frames quieter than this percentile of the recent ones are taken to be background
+AMBIENT_PERCENTILE = 20
+
+# Energies are reported on the 16-bit scale of audioop.rms, whatever the sample width
+_PCM_SCALE = {1: 256.0, 2: 1.0, 4: 1.0 / 65536.0}
+
+
+def pcm_to_int16_scale(raw: bytes, sample_width: int = 2) -> np.ndarray:
+    """Decode little-endian PCM to float64 samples on the 16-bit scale.
+
+    Args:
+        raw (bytes): Mono PCM frames
+        sample_width (int): Bytes per sample (1, 2 or 4)
+
+    Returns:
+        numpy.ndarray: Samples in [-32768, 32768)
+    """
+    if sample_width == 1:
+        # 8-bit PCM is unsigned
+        samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128.0
+    elif sample_width in (2, 4):
+        samples = np.frombuffer(raw, dtype=f"<i{sample_width}").astype(np.float64)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    return samples * _PCM_SCALE[sample_width]
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int, sample_width: int = 2,
+                 frame_duration: Optional[float] = None, energy_ratio: Optional[float] = None,
+                 min_energy: Optional[float] = None, zero_crossing_margin: Optional[float] = None,
+                 calibration: Optional[float] = None, recalibrate_interval: Optional[float] = None,
+                 ambient_window: Optional[float] = None):
+        """Classify short frames of live audio as speech or background.
+
+        Audio is cut into fixed frames and each frame's RMS energy and
+        zero-crossing rate are computed in one vectorized pass. A frame is
+        speech when its energy is energy_ratio times the ambient noise
+        floor. A quieter frame, down to the geometric mean of the floor and
+        that threshold, still counts if it crosses zero noticeably more
+        often than the background does, which keeps soft fricatives such
+        as a trailing "s" inside the question.
+
+        The noise floor and background zero-crossing rate are first
+        estimated from the opening calibration seconds, during which no
+        speech is reported, and then every recalibrate_interval seconds
+        from a low percentile over the last ambient_window seconds. Pauses
+        between words keep that percentile close to the room noise even
+        while someone speaks, so the detector follows a room that gets
+        louder or quieter.
+
+        Args:
+            sample_rate (int): Samples per second of the audio
+            sample_width (int): Bytes per PCM sample
+            frame_duration (float): Seconds per frame, defaults to VAD_FRAME or 0.02
+            energy_ratio (float): Speech threshold as a multiple of the noise
+                floor, defaults to VAD_ENERGY_RATIO or 2.5
+            min_energy (float): Lowest threshold, on the 16-bit RMS scale,
+                defaults to VAD_MIN_ENERGY or 300
+            zero_crossing_margin (float): Rise in the fraction of samples
+                changing sign over the background that marks a fricative,
+                defaults to VAD_ZERO_CROSSING_MARGIN or 0.15
+            calibration (float): Seconds of audio the first estimate is
+                taken from, defaults to VAD_CALIBRATION or 0.25
+            recalibrate_interval (float): Seconds of audio between noise floor
+                updates, defaults to VAD_RECALIBRATE_INTERVAL or 2.0
+            ambient_window (float): Seconds of audio the noise floor is
+                estimated from, defaults to VAD_AMBIENT_WINDOW or 5.0
+        """
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        frame_duration = frame_duration or float(os.getenv('VAD_FRAME', '0.02'))
+        self.frame_length = max(1, int(round(sample_rate * frame_duration)))
+        self.frame_duration = self.frame_length / sample_rate
+        self.energy_ratio = energy_ratio or float(os.getenv('VAD_ENERGY_RATIO', '2.5'))
+        self.min_energy = min_energy if min_energy is not None else float(os.getenv('VAD_MIN_ENERGY', '300'))
+        self.zero_crossing_margin = (zero_crossing_margin if zero_crossing_margin is not None
+                                     else float(os.getenv('VAD_ZERO_CROSSING_MARGIN', '0.15')))
+        calibration = calibration or float(os.getenv('VAD_CALIBRATION', '0.25'))
+        recalibrate_interval = recalibrate_interval or float(os.getenv('VAD_RECALIBRATE_INTERVAL', '2.0'))
+        ambient_window = ambient_window or float(os.getenv('VAD_AMBIENT_WINDOW', '5.0'))
+        self._recalibrate_frames = max(1, int(math.ceil(recalibrate_interval / self.frame_duration)))
+        self._calibration_frames = max(1, int(math.ceil(calibration / self.frame_duration)))
+        window = max(1, int(math.ceil(ambient_window / self.frame_duration)))
+        self._energies: deque = deque(maxlen=window)
+        self._crossings: deque = deque(maxlen=window)
+        self._since_calibration = 0
+        self._pending = np.empty(0)
+        self.noise_floor: Optional[float] = None
+        self.ambient_crossings = 0.0
+
+    @property
+    def calibrated(self) -> bool:
+        """True once the first ambient estimate has been taken."""
+        return self.noise_floor is not None
+
+    @property
+    def threshold(self) -> float:
+        """Energy a frame needs to count as speech."""
+        return max(self.min_energy, (self.noise_floor or 0.0) * self.energy_ratio)
+
+    def process(self, buffer: bytes) -> np.ndarray:
+        """Classify the complete frames in a chunk of PCM.
+
+        Samples left over after the last complete frame are carried into
+        the next call, so chunks need not line up with frames.
+
+        Returns:
+            numpy.ndarray: One bool per frame, True for speech
+        """
+        samples = pcm_to_int16_scale(buffer, self.sample_width)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        count = len(samples) // self.frame_length
+        self._pending = samples[count * self.frame_length:]
+        if not count:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        energies = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, self.frame_length - 1)
+
+        if self.calibrated:
+            threshold = self.threshold
+            soft = max(self.min_energy, math.sqrt(threshold * self.noise_floor))
+            fricative = crossings > self.ambient_crossings + self.zero_crossing_margin
+            speech = (energies > threshold) | ((energies > soft) & fricative)
+        else:
+            speech = np.zeros(count, dtype=bool)
+        self._observe(energies, crossings)
+        return speech
+
+    def reset(self):
+        """Drop a partial frame, e.g. after audio was discarded, keeping the noise estimate."""
+        self._pending = np.empty(0)
+
+    def _observe(self, energies: np.ndarray, crossings: np.ndarray):
+        """Add frame measurements to the ambient window and recalibrate when due."""
+        self._energies.extend(energies.tolist())
+        self._crossings.extend(crossings.tolist())
+        self._since_calibration += len(energies)
+        due = self._recalibrate_frames if self.calibrated else self._calibration_frames
+        if self._since_calibration >= due:
+            self._since_calibration = 0
+            energies = np.fromiter(self._energies, dtype=np.float64)
+            quiet = energies <= np.percentile(energies, AMBIENT_PERCENTILE)
+            self.noise_floor = float(energies[quiet].max())
+            self.ambient_crossings = float(np.median(np.fromiter(self._crossings, dtype=np.float64)[quiet]))
+            logger.debug(f"Ambient noise floor {self.noise_floor:.0f}, speech threshold {self.threshold:.0f}")
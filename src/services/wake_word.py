@@ -0,0 +1,184 @@
+import glob
+import os
+import wave
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.voice_activity import pcm_to_int16_scale
+
+# Feature frames: 25ms windows every 10ms, 20 mel bands up to telephone bandwidth
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.01
+MEL_BANDS = 20
+MEL_RANGE = (100.0, 4000.0)
+
+_filterbanks: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def _mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int) -> np.ndarray:
+    """Triangular mel filters for an n_fft spectrum, built once per rate."""
+    key = (sample_rate, n_fft)
+    bank = _filterbanks.get(key)
+    if bank is None:
+        high = min(MEL_RANGE[1], sample_rate / 2)
+        edges = np.linspace(_mel(MEL_RANGE[0]), _mel(high), MEL_BANDS + 2)
+        hz = 700.0 * (10 ** (edges / 2595.0) - 1.0)
+        bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        lower, centre, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+        rising = (bins - lower) / (centre - lower)
+        falling = (upper - bins) / (upper - centre)
+        bank = _filterbanks[key] = np.maximum(0.0, np.minimum(rising, falling))
+    return bank
+
+
+def log_mel_features(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Log mel spectrum of every feature frame, normalized to unit length.
+
+    The mean of each frame is removed first, so the features describe the
+    shape of the spectrum and not how loudly the phrase was spoken.
+
+    Args:
+        samples (numpy.ndarray): Mono samples at any scale
+        sample_rate (int): Samples per second
+
+    Returns:
+        numpy.ndarray: One row of MEL_BANDS values per frame
+    """
+    length = int(sample_rate * FRAME_SECONDS)
+    hop = int(sample_rate * HOP_SECONDS)
+    if len(samples) < length:
+        return np.zeros((0, MEL_BANDS))
+    count = 1 + (len(samples) - length) // hop
+    index = np.arange(length)[None, :] + hop * np.arange(count)[:, None]
+    frames = samples[index] * np.hamming(length)
+    n_fft = 1 << (length - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2
+    features = np.log(power @ _mel_filterbank(sample_rate, n_fft).T + 1e-3)
+    features -= features.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-9)
+
+
+def _trim_silence(features: np.ndarray, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Drop the quiet frames at either end of a template recording."""
+    hop = int(sample_rate * HOP_SECONDS)
+    length = int(sample_rate * FRAME_SECONDS)
+    energies = np.array([np.sqrt(np.mean(samples[i * hop:i * hop + length] ** 2)) for i in range(len(features))])
+    loud = np.nonzero(energies > energies.max() * 0.1)[0] if len(energies) else []
+    if not len(loud):
+        return features
+    return features[loud[0]:loud[-1] + 1]
+
+
+class WakeWordSpotter:
+    def __init__(self, templates: List[np.ndarray], threshold: Optional[float] = None,
+                 start_slack: Optional[float] = None):
+        """Spot a wake phrase by matching recorded examples against live audio.
+
+        Each template is the log mel spectrum of one recording of the wake
+        phrase. Audio is compared to every template with dynamic time
+        warping, which lets the phrase be spoken up to twice as fast or
+        slow as in the recording, and the phrase is heard when the average
+        cosine distance along the best path is below threshold. Matching
+        only runs on stretches of speech found by the voice activity
+        detector, so silence and steady noise cost nothing beyond the
+        detector itself.
+
+        Args:
+            templates (list): Feature arrays from log_mel_features
+            threshold (float): Largest accepted distance, defaults to
+                WAKE_WORD_THRESHOLD or 0.2
+            start_slack (float): Seconds into the audio the phrase may start,
+                defaults to 0.6
+        """
+        if not templates:
+            raise ValueError("at least one wake word template is required")
+        self.templates = templates
+        self.threshold = threshold if threshold is not None else float(os.getenv('WAKE_WORD_THRESHOLD', '0.2'))
+        self.start_slack = start_slack if start_slack is not None else 0.6
+        longest = max(len(template) for template in templates)
+        # Seconds of speech needed to rule the phrase in or out, at half speed
+        self.max_duration = 2 * longest * HOP_SECONDS + self.start_slack
+
+    @classmethod
+    def from_directory(cls, directory: Optional[str] = None, **kwargs) -> "WakeWordSpotter":
+        """Load every WAV recording of the wake phrase in a directory.
+
+        Args:
+            directory (str): Defaults to WAKE_WORD_TEMPLATES or 'data/wake_word'
+        """
+        directory = directory or os.getenv('WAKE_WORD_TEMPLATES', os.path.join('data', 'wake_word'))
+        templates = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.wav'))):
+            with wave.open(path, 'rb') as f:
+                if f.getnchannels() != 1:
+                    logger.warning(f"Skipping wake word template {path}: not mono")
+                    continue
+                rate = f.getframerate()
+                samples = pcm_to_int16_scale(f.readframes(f.getnframes()), f.getsampwidth())
+            templates.append(_trim_silence(log_mel_features(samples, rate), samples, rate))
+        if not templates:
+            raise ValueError(f"No wake word recordings in {directory}; record some with src/record_wake_word.py")
+        logger.info(f"Loaded {len(templates)} wake word templates from {directory}")
+        return cls(templates, **kwargs)
+
+    def score(self, samples: np.ndarray, sample_rate: int) -> Tuple[float, int]:
+        """Find the best match of any template near the start of the audio.
+
+        Returns:
+            tuple: (distance, sample index just after the matched phrase);
+                the distance is infinite if the audio is too short
+        """
+        features = log_mel_features(samples, sample_rate)
+        best, end = float('inf'), 0
+        for template in self.templates:
+            distance, frame = self._match(template, features)
+            if distance < best:
+                best, end = distance, frame
+        hop = int(sample_rate * HOP_SECONDS)
+        return best, min(len(samples), end * hop + int(sample_rate * FRAME_SECONDS))
+
+    def find(self, samples: np.ndarray, sample_rate: int) -> Optional[int]:
+        """Return the sample index just after the wake phrase, or None if it was not spoken."""
+        distance, end = self.score(samples, sample_rate)
+        if distance > self.threshold:
+            logger.debug(f"No wake word (distance {distance:.3f})")
+            return None
+        logger.debug(f"Wake word heard (distance {distance:.3f})")
+        return end
+
+    def _match(self, template: np.ndarray, features: np.ndarray) -> Tuple[float, int]:
+        """Subsequence DTW of a template against audio features.
+
+        Steps advance the template by one frame and the audio by one or
+        two, or the template by two and the audio by one, so each row
+        depends only on the two before it and is computed as a whole.
+
+        Returns:
+            tuple: (mean distance along the best path, audio frame it ends on)
+        """
+        rows, columns = len(template), len(features)
+        if rows == 0 or columns < rows // 2:
+            return float('inf'), 0
+        cost = 1.0 - template @ features.T
+        inf = np.full(columns, np.inf)
+        before = inf
+        current = inf.copy()
+        slack = max(1, int(self.start_slack / HOP_SECONDS))
+        current[:slack] = cost[0, :slack]
+        for row in range(1, rows):
+            best = inf.copy()
+            best[1:] = current[:-1]
+            best[2:] = np.minimum(best[2:], current[:-2])
+            if row >= 2:
+                best[1:] = np.minimum(best[1:], before[:-1] + cost[row - 1, 1:])
+            before, current = current, cost[row] + best
+        distances = current / rows
+        end = int(np.argmin(distances))
+        return float(distances[end]), end + 1
@@ -0,0 +1,255 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from loguru import logger
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.metrics import metrics
+
+# Whisper models expect 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm_to_float32(raw: bytes, sample_width: int = 2) -> np.ndarray:
+    """Convert little-endian PCM samples to float32 in [-1, 1].
+
+    Args:
+        raw (bytes): Mono PCM frames, e.g. from AudioData.get_raw_data()
+        sample_width (int): Bytes per sample (1, 2 or 4)
+
+    Returns:
+        numpy.ndarray: float32 samples
+    """
+    if sample_width == 2:
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    if sample_width == 4:
+        return np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    if sample_width == 1:
+        # 8-bit PCM is unsigned
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def audio_to_array(audio) -> np.ndarray:
+    """Convert a speech_recognition AudioData to Whisper's input format in memory."""
+    raw = audio.get_raw_data(convert_rate=WHISPER_SAMPLE_RATE, convert_width=2)
+    return pcm_to_float32(raw, 2)
+
+
+class WhisperWorker:
+    def __init__(self, model_name: Optional[str] = None, language: Optional[str] = None,
+                 preload: Optional[bool] = None):
+        """Initialize a long-lived Whisper inference worker.
+
+        The model is loaded once on the worker thread, either as soon as the
+        worker starts (preload) or when the first clip is submitted. Clips
+        from any number of listeners are transcribed one at a time in
+        submission order, since a model instance is not safe to share
+        between threads.
+
+        Args:
+            model_name (str): Whisper model size, defaults to WHISPER_MODEL or 'base'
+            language (str): Spoken language, defaults to WHISPER_LANGUAGE or 'en';
+                an empty value makes Whisper detect it on every clip
+            preload (bool): Start loading the model in the background now,
+                defaults to WHISPER_PRELOAD or True
+        """
+        self.model_name = model_name or os.getenv('WHISPER_MODEL', 'base')
+        self.language = language if language is not None else os.getenv('WHISPER_LANGUAGE', 'en')
+        self._model = None
+        self._load_error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._jobs: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        if preload is None:
+            preload = os.getenv('WHISPER_PRELOAD', 'true').lower() not in ('0', 'false', 'no', 'off')
+        if preload:
+            self.start()
+
+    @property
+    def ready(self) -> bool:
+        """True once the model has loaded (or failed to load)."""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Start the worker and block until the model is loaded.
+
+        Returns:
+            bool: True if the model is usable
+        """
+        self.start()
+        self._ready.wait(timeout)
+        return self._model is not None
+
+    def start(self):
+        """Start the worker thread, which begins by loading the model."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='whisper-worker', daemon=True)
+                self._thread.start()
+
+    def submit(self, audio: np.ndarray, **options) -> Future:
+        """Queue a clip for transcription.
+
+        Args:
+            audio (numpy.ndarray): 16 kHz mono float32 samples
+            **options: Extra keyword arguments for model.transcribe
+
+        Returns:
+            Future: Resolves to the transcribed text
+        """
+        self.start()
+        future = Future()
+        self._jobs.put((future, audio, options))
+        return future
+
+    def transcribe(self, audio: np.ndarray, timeout: Optional[float] = None, **options) -> str:
+        """Transcribe a clip, blocking until the worker gets to it."""
+        return self.submit(audio, **options).result(timeout)
+
+    def stop(self):
+        """Stop the worker thread after the queued clips."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join(timeout=5)
+
+    def _run(self):
+        """Load the model, then transcribe queued clips until stopped."""
+        self._load_model()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, audio, options = job
+            # Skip clips whose caller no longer wants the result
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._transcribe(audio, options))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _load_model(self):
+        """Load the Whisper model on the worker thread."""
+        try:
+            logger.info(f"Loading Whisper model '{self.model_name}'...")
+            # Imported here so processes that never transcribe do not pay for torch
+            import whisper
+            with metrics.span('speech.model_load', 'whisper'):
+                self._model = whisper.load_model(self.model_name)
+            logger.info(f"Whisper model '{self.model_name}' loaded")
+        except Exception as e:
+            logger.error(f"Error loading Whisper model: {e}")
+            self._load_error = e
+        finally:
+            self._ready.set()
+
+    def _transcribe(self, audio: np.ndarray, options: dict) -> str:
+        """Run the model on one clip."""
+        if self._model is None:
+            raise RuntimeError(f"Whisper model '{self.model_name}' is not available: {self._load_error}")
+        settings = {
+            'language': self.language or None,
+            # Half precision is only supported on GPU; asking for it on CPU just logs a warning
+            'fp16': self._model.device.type == 'cuda',
+            # Clips are independent questions, so do not prompt with earlier text
+            'condition_on_previous_text': False
+        }
+        settings.update(options)
+        with metrics.span('speech.transcribe', 'whisper'):
+            result = self._model.transcribe(audio, **settings)
+        return result['text'].strip()
+
+
+class StreamingTranscription:
+    def __init__(self, worker: WhisperWorker, on_partial: Callable[[str], None],
+                 interval: Optional[float] = None, min_audio: float = 1.0,
+                 sample_rate: int = WHISPER_SAMPLE_RATE):
+        """Transcribe an utterance while it is still being spoken.
+
+        Every interval seconds of new audio, everything heard so far is
+        sent to the worker, so consecutive partial windows overlap and each
+        partial transcript supersedes the previous one. A new partial is only
+        queued once the previous one has finished, so a slow model never
+        falls behind the speaker by more than one clip.
+
+        Args:
+            worker (WhisperWorker): Worker that runs the model
+            on_partial (callable): Called with each new partial transcript,
+                from the worker thread, so it must return quickly
+            interval (float): Seconds of audio between partials, defaults
+                to WHISPER_PARTIAL_INTERVAL or 1.0
+            min_audio (float): Seconds of audio required before the first partial
+            sample_rate (int): Sample rate of the fed audio
+        """
+        self.worker = worker
+        self.on_partial = on_partial
+        self.interval = interval if interval is not None else float(os.getenv('WHISPER_PARTIAL_INTERVAL', '1.0'))
+        self.min_samples = int(min_audio * sample_rate)
+        self.interval_samples = max(1, int(self.interval * sample_rate))
+        self._chunks: List[np.ndarray] = []
+        self._samples = 0
+        self._next_partial = self.min_samples
+        self._pending: Optional[Future] = None
+        self._last_text = ''
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def feed(self, samples: np.ndarray):
+        """Add captured audio and queue a partial transcription when due."""
+        self._chunks.append(samples)
+        self._samples += len(samples)
+        if self._samples < self._next_partial:
+            return
+        if self._pending is not None and not self._pending.done():
+            return
+        self._next_partial = self._samples + self.interval_samples
+        self._pending = self.worker.submit(np.concatenate(self._chunks))
+        self._pending.add_done_callback(self._deliver)
+
+    def finish(self, timeout: Optional[float] = None) -> str:
+        """Transcribe the complete utterance and return the final text."""
+        with self._lock:
+            self._finished = True
+        if self._pending is not None:
+            # A partial that has not started yet is no longer useful
+            self._pending.cancel()
+        if not self._chunks:
+            return ''
+        return self.worker.transcribe(np.concatenate(self._chunks), timeout=timeout)
+
+    def _deliver(self, future: Future):
+        """Pass a finished partial transcript to the callback."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        text = future.result()
+        with self._lock:
+            if self._finished or not text or text == self._last_text:
+                return
+            self._last_text = text
+        try:
+            self.on_partial(text)
+        except Exception as e:
+            logger.warning(f"Partial transcript callback failed: {e}")
+
+
+_workers: Dict[str, WhisperWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def get_whisper_worker(model_name: Optional[str] = None) -> WhisperWorker:
+    """Return the process-wide worker for a model, creating it on first use."""
+    name = model_name or os.getenv('WHISPER_MODEL', 'base')
+    with _workers_lock:
+        worker = _workers.get(name)
+        if worker is None:
+            worker = _workers[name] = WhisperWorker(name)
+        return worker
@@ -8,24 +8,108 @@ import sys
 import threading
 import signal
 
-from services.speech_recognition_service import SpeechRecognitionService
-from services.search_service import SearchService
+from services.metrics import metrics
+from services.search_service import EventCallback, SearchService, create_search_service
+from services.speculative_search import SpeculativeSearch
 from services.tts_service import TTSService
 
+NO_ANSWER_MESSAGE = "I'm sorry, I couldn't find an answer to that question."
+ERROR_MESSAGE = "Sorry, there was an error processing your question."
+
 class TriviaBot:
     def __init__(self):
-        """Initialize the Trivia Bot with its services."""
+        """Initialize the Trivia Bot.
+
+        Services are constructed on first use, or ahead of time by warm_up,
+        so an entry point only pays for the ones it needs; the web server
+        never opens the microphone.
+        """
         try:
-            self.search_service = SearchService()
-            self.speech_service = SpeechRecognitionService()
-            self.tts_service = TTSService()
+            self._services = {}
+            self._services_lock = threading.Lock()
+            self._warm_up_thread = None
             self.is_listening = False
             self.listen_thread = None
+            # Overlap listening with searching and speaking the previous answer
+            self.voice_pipeline = os.getenv('VOICE_PIPELINE', 'false').lower() in ('1', 'true', 'yes', 'on')
+            # Listen from the start and answer only questions that begin with the wake phrase
+            self.hands_free = os.getenv('HANDS_FREE', 'false').lower() in ('1', 'true', 'yes', 'on')
+            # Whether web answers are also spoken aloud on the server
+            self.speak_answers = os.getenv('SPEAK_ANSWERS', 'true').lower() in ('1', 'true', 'yes', 'on')
+            self._search_executor = None
+            self._answer_executor = None
             logger.info("Trivia Bot initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing Trivia Bot: {e}")
             raise
 
+    @property
+    def search_service(self) -> SearchService:
+        """The search service, created on first use."""
+        return self._get_service('search', create_search_service)
+
+    @property
+    def speech_service(self):
+        """The speech recognition service, created on first use."""
+        return self._get_service('speech', _create_speech_service)
+
+    @property
+    def tts_service(self) -> TTSService:
+        """The text-to-speech service, created on first use."""
+        return self._get_service('tts', _create_tts_service)
+
+    def _get_service(self, name: str, factory):
+        """Return a service, constructing it once even if several threads ask at the same time."""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._services_lock:
+            service = self._services.get(name)
+            if service is None:
+                start = time.perf_counter()
+                service = self._services[name] = factory()
+                logger.info(f"Started {name} service in {time.perf_counter() - start:.2f}s")
+            return service
+
+    def warm_up(self, services: Tuple[str, ...] = ('search', 'tts'), background: bool = True):
+        """Construct services ahead of their first use.
+
+        Args:
+            services (tuple): Names of the services to start: 'search', 'speech', 'tts'
+            background (bool): Start them on a background thread and return immediately
+        """
+        def run():
+            for name in services:
+                try:
+                    getattr(self, f"{name}_service")
+                except Exception as e:
+                    logger.error(f"Error warming up {name} service: {e}")
+            logger.info("Trivia Bot ready")
+
+        if not background:
+            run()
+            return
+        self._warm_up_thread = threading.Thread(target=run, name='warm-up', daemon=True)
+        self._warm_up_thread.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until a background warm-up has finished.
+
+        Returns:
+            bool: True if the bot is ready
+        """
+        if self._warm_up_thread is not None:
+            self._warm_up_thread.join(timeout)
+        return self.readiness()["ready"]
+
+    def readiness(self) -> dict:
+        """Report which services have started and whether warm-up has finished."""
+        warming = self._warm_up_thread is not None and self._warm_up_thread.is_alive()
+        return {
+            "ready": not warming and 'search' in self._services,
+            "services": {name: name in self._services for name in ('search', 'speech', 'tts')}
+        }
+
     def start(self):
         """Start the bot in CLI mode."""
         try:
@@ -35,6 +119,9 @@ class TriviaBot:
             logger.info("Starting Trivia Bot...")
             logger.info("Press Enter to start/stop listening")
             logger.info("Press Ctrl+C to exit")
+            if self.hands_free:
+                logger.info("Hands-free mode: say the wake phrase, then your question")
+                self.start_listening()
             
             while True:
                 input()  # Wait for Enter key
@@ -45,16 +132,24 @@ class TriviaBot:
             self.cleanup()
             sys.exit(1)
 
-    def get_answer(self, question: str) -> str:
-        """Get answer for a question (web interface mode)."""
+    def get_answer(self, question: str, on_event: Optional[EventCallback] = None) -> str:
+        """Get answer for a question (web interface mode).
+
+        Args:
+            question (str): The question to answer
+            on_event (callable): Receives search progress events, see SearchService.resolve
+        """
         try:
             logger.info(f"Processing question: {question}")
-            answer = self.search_service.search_for_answer(question)
+            answer = self.search_service.search_for_answer(question, on_event=on_event)
             
             if answer:
+                if not self.speak_answers:
+                    return answer
                 # Speak the answer if TTS is available
                 try:
-                    self.tts_service.speak(answer)
+                    # A newer question's answer replaces one still being spoken
+                    self.tts_service.speak(answer, interrupt=True)
                 except Exception as e:
                     logger.warning(f"TTS failed: {e}")
                 return answer
@@ -93,7 +188,10 @@ class TriviaBot:
         """Main listening loop."""
         while self.is_listening:
             try:
-                self.listen_and_answer()
+                if self.voice_pipeline:
+                    self.listen_and_answer_pipelined()
+                else:
+                    self.listen_and_answer()
             except Exception as e:
                 logger.error(f"Error in listening loop: {e}")
                 self.is_listening = False
@@ -107,20 +205,76 @@ class TriviaBot:
             if not question:
                 return
                 
+            heard_at = time.perf_counter()
             logger.info(f"Question detected: {question}")
             
             # Search for answer
             answer = self.search_service.search_for_answer(question)
+            metrics.observe('voice.answer_latency', time.perf_counter() - heard_at)
             
             # Provide answer
             if answer:
                 self.tts_service.speak(answer)
             else:
-                self.tts_service.speak("I'm sorry, I couldn't find an answer to that question.")
+                self.tts_service.speak(NO_ANSWER_MESSAGE)
                 
         except Exception as e:
             logger.error(f"Error in listen and answer: {e}")
-            self.tts_service.speak("Sorry, there was an error processing your question.")
+            self.tts_service.speak(ERROR_MESSAGE)
+
+    def listen_and_answer_pipelined(self):
+        """Listen for a question while earlier answers are still being searched and spoken.
+
+        Partial transcripts start speculative searches, so the answer is
+        often ready by the time the speaker finishes. The answer is then
+        spoken on a separate thread and this returns straight away, letting
+        the next listen begin.
+        """
+        speculation = SpeculativeSearch(self.search_service, self._get_search_executor())
+        try:
+            question = self.speech_service.listen_for_question(on_partial=speculation.on_partial)
+            if not question:
+                speculation.cancel()
+                return
+            
+            heard_at = time.perf_counter()
+            logger.info(f"Question detected: {question}")
+            future = speculation.answer(question)
+            
+            self._get_answer_executor().submit(self._speak_answer, question, future, heard_at)
+            
+        except Exception as e:
+            speculation.cancel()
+            logger.error(f"Error in pipelined listen and answer: {e}")
+
+    def _speak_answer(self, question: str, future, heard_at: float):
+        """Wait for a search to finish and speak its answer."""
+        try:
+            answer = future.result().answer
+        except Exception as e:
+            logger.error(f"Error searching for '{question}': {e}")
+            answer = None
+        metrics.observe('voice.answer_latency', time.perf_counter() - heard_at)
+        
+        if answer:
+            self.tts_service.speak(answer, async_mode=False)
+        else:
+            self.tts_service.speak(NO_ANSWER_MESSAGE, async_mode=False)
+
+    def _get_search_executor(self) -> ThreadPoolExecutor:
+        """Return the pool speculative searches run on."""
+        if self._search_executor is None:
+            self._search_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('SPECULATIVE_MAX_INFLIGHT', '2')) + 2,
+                thread_name_prefix='speculative-search'
+            )
+        return self._search_executor
+
+    def _get_answer_executor(self) -> ThreadPoolExecutor:
+        """Return the single speaker thread, which keeps answers in the order they were asked."""
+        if self._answer_executor is None:
+            self._answer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='voice-answer')
+        return self._answer_executor
 
     def signal_handler(self, signum, frame):
         """Handle shutdown signals."""
@@ -132,10 +286,25 @@ class TriviaBot:
         """Clean up resources."""
         try:
             self.stop_listening()
+            if 'speech' in self._services:
+                self._services['speech'].close()
+            if 'tts' in self._services:
+                self._services['tts'].stop()
             logger.info("Cleanup completed")
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
 
+def _create_speech_service():
+    """Import and construct the speech service, which loads the audio libraries."""
+    from services.speech_recognition_service import SpeechRecognitionService
+    return SpeechRecognitionService()
+
+def _create_tts_service() -> TTSService:
+    """Construct the TTS service and render the fixed replies so they play without synthesis delay."""
+    service = TTSService()
+    service.precompute([NO_ANSWER_MESSAGE, ERROR_MESSAGE])
+    return service
+
 if __name__ == "__main__":
     bot = TriviaBot()
     bot.start() 
\ No newline at end of file
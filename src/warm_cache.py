@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from loguru import logger
+
+from services.answer_cache import AnswerCache
+from services.batch_runner import read_questions
+from services.search_service import SearchService
+from services.text_normalization import normalize_question
+
+# Load environment variables from .env file
+load_dotenv()
+
+def main():
+    """Warm the answer cache from a list of questions."""
+    parser = argparse.ArgumentParser(description="Warm the trivia answer cache from a question list")
+    parser.add_argument('questions', help='Text file with one question per line, or JSONL/CSV with a "question" field')
+    parser.add_argument('--cache-path', default=os.getenv('ANSWER_CACHE_PATH'),
+                        help='SQLite cache file (defaults to ANSWER_CACHE_PATH)')
+    parser.add_argument('--workers', type=int, default=4, help='Questions resolved in parallel')
+    parser.add_argument('--refresh', action='store_true', help='Re-fetch questions that are already cached')
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if not args.cache_path:
+        parser.error("a persistent cache is required: pass --cache-path or set ANSWER_CACHE_PATH")
+
+    cache = AnswerCache(path=args.cache_path)
+    search_service = SearchService(cache=cache)
+
+    # Deduplicate on the cache key so each question is fetched once
+    by_key = {}
+    for question in read_questions(args.questions):
+        by_key.setdefault(normalize_question(question), question)
+    unique = list(by_key.values())
+    if args.refresh:
+        for question in unique:
+            cache.invalidate(normalize_question(question))
+
+    def warm(question):
+        answer = search_service.search_for_answer(question)
+        print(f"{question}\t{answer or '-'}", flush=True)
+        return answer
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        answers = list(pool.map(warm, unique))
+
+    stats = cache.stats()
+    answered = sum(1 for answer in answers if answer)
+    print(
+        f"Warmed {len(unique)} questions ({answered} answered) | "
+        f"already cached: {stats['hits']} | fetched: {stats['misses']}",
+        file=sys.stderr
+    )
+    cache.close()
+
+if __name__ == "__main__":
+    main()